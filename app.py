@@ -21,11 +21,12 @@ from pages.faire.faire_winter import faire_winter
 
 
 
-from database import db_insert, db_setup
+from database import db_insert, db_queries, db_setup
+from flask import jsonify, request
 import os
 
 from components.navbar_links import generate_navbar  # Import navbar generator
-from data_preprocessing import root_processing, ecom_processing, wholesale_processing, faire_processing
+from data_preprocessing import debug_export, root_processing, ecom_processing, wholesale_processing, faire_processing
 
 # Disable file watching for Dash
 os.environ["DASH_NO_DEV_TOOLS"] = "1"
@@ -50,25 +51,61 @@ app = dash.Dash(
 # Access the Flask server
 server = app.server
 
-# Initilize DB
-try:
-    db_setup.initialize_db()  # Creates tables if they don't exist
-    logging.info("Database initialized successfully.")
-except Exception as e:
-    logging.error(f"Failed to initialize the database: {e}")
+# Search / autocomplete over products and customers, e.g. /api/search?q=silk&kind=product
+@server.route("/api/search")
+def search():
+    """
+    Return the products and customers matching the `q` query parameter as JSON.
+    Optional parameters: `kind` ("product" or "customer") and `limit` (a positive
+    integer, capped at `db_queries.SEARCH_MAX_LIMIT`); other values get a 400.
+    """
+    kind = request.args.get("kind") or None
+    if kind not in (None, "product", "customer"):
+        return jsonify(error="kind must be 'product' or 'customer'."), 400
+
+    try:
+        limit = int(request.args.get("limit", db_queries.SEARCH_LIMIT))
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        return jsonify(error="limit must be a positive integer."), 400
+
+    results = db_queries.search(request.args.get("q", ""), kind=kind, limit=limit)
+    return jsonify(results=results)
+
+# Tables loaded into the database from the configured data source
+SOURCE_TABLES = ["master_sku", "sale_order_line", *db_insert.ORDER_LISTS]
+
+# Build the database next to the live file and swap it in once loaded
+def load_database(db_file, data):
+    """
+    Load the source data into a database file under construction.
+
+    Args:
+        db_file (str): Path to the build database.
+        data (DataSource): Source of the `SOURCE_TABLES`.
+    """
+    # master_sku and the order lists are loaded in memory, the order-line
+    # history is streamed in chunks
+    db_insert.insert_data_into_db(data, db_file=db_file)
+
 
 # Preload data during initialization
 try:
-    # Load raw data using data_loader
-    data = data_loader.load_data()
-    
-    # Store the processed data in Flask's server config
-    db_insert.insert_data_into_db(data)
+    source = data_loader.load_data(keys=SOURCE_TABLES)
+    if source is None:
+        raise RuntimeError("No data source available.")
+
+    # The database is only rebuilt when a source file changed since the last start
+    db_setup.rebuild_database(
+        lambda db_file: load_database(db_file, source),
+        unchanged=lambda db_file: db_insert.sources_unchanged(source, db_file),
+    )
     logging.info("Data preloaded successfully and stored in SQL DB")
 
-    #Checking
-    db_insert.save_sql_table_to_csv("sale_order_line", "./data/sql_sale_order_line.csv")
-    db_insert.save_sql_table_to_csv("master_sku", "./data/sql_master_sku.csv")
+    # Checking (opt-in, written in the background)
+    debug_export.export_table("sale_order_line_view", "sql_sale_order_line")
+    debug_export.export_table("master_sku")
 except Exception as e:
     logging.error(f"Error during data preloading: {e}")
     # Better fallback logic
@@ -80,7 +117,8 @@ except Exception as e:
 ### Data Loading / Filter Helpers
 def execute_cache(start_date=None, end_date=None):
     """
-    Executes the caching process, ensuring that all required data is loaded and cached.
+    Executes the caching process, declaring every derived dataset. Datasets are
+    computed when a page first asks for them and memoized per data version.
 
     Args:
         start_date (str, optional): The start date for filtering data (YYYY-MM-DD).
@@ -101,66 +139,46 @@ def execute_cache(start_date=None, end_date=None):
 
 def load_root_data(start_date=None, end_date=None):
     """
-    Loads root data and filters it based on the provided date range.
+    Declares the root datasets, computed on first use and filtered to the provided date range.
 
     Args:
         start_date (str, optional): The start date for filtering data (YYYY-MM-DD).
         end_date (str, optional): The end date for filtering data (YYYY-MM-DD).
     """
     try:
-        root_data = root_processing.process_root_data()
+        # Only the sales months in the date range are read, once a page asks for them
+        root_data = root_processing.process_root_data(start_date, end_date)
 
-        # Filter root_data if dates are provided
-        if start_date or end_date:
-            root_data = root_data[
-                (root_data["date"] >= start_date if start_date else True) &
-                (root_data["date"] <= end_date if end_date else True)
-            ]
-
-        # Store the filtered data in Flask's app config
+        # Store the lazy datasets in Flask's app config
         app.server.config["root_data"] = root_data
-        logger.info(f"Root data successfully loaded and filtered. Rows: {len(root_data)}")
+        logger.info(f"Root datasets declared: {', '.join(root_data)}.")
     except Exception as e:
         logger.error(f"Failed to load root data: {e}")
 
 
 def load_ecom_data():
     """
-    Loads eCommerce data and stores it in Flask app's configuration.
+    Declares the eCommerce datasets and stores them in Flask app's configuration.
     """
     try:
-        ecom_data_result = ecom_processing.process_ecom_data()
-
-        # Save eCommerce data into Flask's config
-        app.server.config["ecom_stats"] = ecom_data_result.get("stats")
-        app.server.config["ecom_merged_data"] = ecom_data_result.get("merged_data")
-        app.server.config["ecom_filtered_sale_order_line"] = ecom_data_result.get("filtered_sale_order_line")
-        app.server.config['ec_collection_data'] = ecom_data_result.get("ec_collection_data")
-        
+        # Save the lazy eCommerce datasets into Flask's config
+        app.server.config["ecom_data"] = ecom_processing.process_ecom_data()
 
-        logger.info("eCommerce data successfully loaded and stored.")
+        logger.info("eCommerce datasets successfully declared.")
     except Exception as e:
         logger.error(f"Failed to load eCommerce data: {e}")
 
 
 def load_faire_data():
     """
-    Loads Faire data and stores it in Flask app's configuration, including winter-specific data and statistics.
+    Declares the Faire datasets, including winter-specific data and statistics, and
+    stores them in Flask app's configuration.
     """
     try:
-        # Process Faire data
-        faire_data_result = faire_processing.process_faire_data()
-
-        # Save Faire data and stats into Flask's config
-        app.server.config["faire_stats"] = faire_data_result.get("stats")
-        app.server.config["faire_merged_data"] = faire_data_result.get("faire_data")
-        app.server.config["faire_filtered_sale_order_line"] = faire_data_result.get("filtered_sale_order_line")
-        
-        # Save Winter Faire data and stats into Flask's config
-        app.server.config["winter_stats"] = faire_data_result.get("winter_stats")
-        app.server.config["winter_data"] = faire_data_result.get("winter_data")
-
-        logger.info("Faire data and Winter Faire data successfully loaded and stored.")
+        # Save the lazy Faire and Winter Faire datasets into Flask's config
+        app.server.config["faire_data"] = faire_processing.process_faire_data()
+
+        logger.info("Faire and Winter Faire datasets successfully declared.")
     except Exception as e:
         logger.error(f"Failed to load Faire data: {e}")
 
@@ -168,23 +186,13 @@ def load_faire_data():
 
 def load_wholesale_data():
     """
-    Loads wholesale data and stores it in Flask app's configuration.
+    Declares the wholesale datasets and stores them in Flask app's configuration.
     """
     try:
-        wholesale_data_result = wholesale_processing.process_wholesale_data()
-
-        # Save wholesale data into Flask's config
-        app.server.config["wholesale_stats"] = wholesale_data_result.get("stats")
-        app.server.config["wholesale_merged_data"] = wholesale_data_result.get("merged_data")
-        app.server.config["wholesale_filtered_sale_order_line"] = wholesale_data_result.get("filtered_sale_order_line")
-        app.server.config["wholesale_delivery_distribution"] = wholesale_data_result.get("delivery_distribution")
-        app.server.config["wholesale_rep_summary"] = wholesale_data_result.get("rep_summary")
-        app.server.config["wholesale_product_profit_analysis"] = wholesale_data_result.get("product_profit_analysis")
-        app.server.config["wholesale_customer_scatter_data"] = wholesale_data_result.get("customer_scatter_data")
-        app.server.config["wholesale_geospatial_data"] = wholesale_data_result.get("geospatial_data")
-        app.server.config["wholesale_customer_segmentation_data"] = wholesale_data_result.get("customer_segmentation_data")
-
-        logger.info("Wholesale data successfully loaded and stored.")
+        # Save the lazy wholesale datasets into Flask's config
+        app.server.config["wholesale_data"] = wholesale_processing.process_wholesale_data()
+
+        logger.info("Wholesale datasets successfully declared.")
     except Exception as e:
         logger.error(f"Failed to load wholesale data: {e}")
 
@@ -197,11 +205,6 @@ except Exception as e:
 
 
 
-
-execute_cache()
-
-
-
 # Log app initialization
 logger.debug("Dash app initialized successfully.")
 
@@ -258,21 +261,35 @@ page_mapping = {
     "/faire/winter-market": faire_winter,
 }
 
+# Pages that follow the date filter, rolled up from the sales cube; the others
+# always show the full history
+DATE_FILTERED_PAGES = {home, ws_home, ec_home, faire_home}
+
 
 
 # Callback for dynamic page rendering
 @app.callback(
     Output("page-content", "children"),  # Update the page-content container
-    Input("url", "pathname"),           # Listen to changes in the URL pathname
+    [
+        Input("url", "pathname"),           # Listen to changes in the URL pathname
+        Input("date-picker-range", "start_date"),
+        Input("date-picker-range", "end_date"),
+    ],
 )
 
-def render_page_content(pathname):
+def render_page_content(pathname, start_date, end_date):
+    """
+    Renders the page of the current pathname. Date-filtered pages are sliced to the
+    selected range for this request only; the cached data is left untouched.
+    """
     try:
-        logger.info(f"Routing triggered with pathname: {pathname}")
+        logger.info(f"Routing triggered with pathname: {pathname}, dates: {start_date} to {end_date}")
         page = page_mapping.get(pathname, lambda: html.Div(
             dmc.Text("404: Page not found", ta="center", c="red", size="xl"),
             style={"textAlign": "center", "marginTop": "50px"},
         ))
+        if page in DATE_FILTERED_PAGES:
+            return page(start_date, end_date)
         return page()
     except Exception as e:
         logger.error(f"Error in render_page_content callback: {e}")
@@ -322,60 +339,6 @@ def update_theme(is_dark_mode):
         return {"theme": "light"}, light_theme, "light", header_style, text_style
 
 
-'''
-@app.callback(
-    Output("page-content", "children"),  # Re-render the page content
-    [
-        Input("date-picker-range", "start_date"),
-        Input("date-picker-range", "end_date"),
-        Input("url", "pathname"),  # Re-render only the current page
-    ],
-)
-def update_data_by_date(start_date, end_date, pathname):
-    """
-    Filters data based on the selected date range and reloads the cached data.
-
-    Args:
-        start_date (str): The selected start date in "YYYY-MM-DD" format.
-        end_date (str): The selected end date in "YYYY-MM-DD" format.
-        pathname (str): The current page pathname.
-
-    Returns:
-        Updated page content based on the filtered data.
-    """
-    try:
-        # Check if start_date or end_date is missing
-        if not start_date or not end_date:
-            logger.warning(f"Missing start_date or end_date: start_date={start_date}, end_date={end_date}")
-            # Default to rendering the page without filtering the cache
-            with app.server.app_context():
-                execute_cache()  # Load all data if no date range is provided
-
-        else:
-            logger.info(f"Callback triggered with start_date={start_date}, end_date={end_date}, pathname={pathname}")
-            with app.server.app_context():
-                execute_cache(start_date=start_date, end_date=end_date)
-
-        # Retrieve the page rendering function from the mapping
-        page_function = page_mapping.get(
-            pathname,
-            lambda: html.Div(
-                dmc.Text("404: Page not found", ta="center", c="red", size="xl"),
-                style={"textAlign": "center", "marginTop": "50px"},
-            ),
-        )
-
-        # Log the rendering action
-        logger.info(f"Rendering page for pathname: {pathname}")
-        return page_function()
-    except Exception as e:
-        logger.error(f"Error in update_data_by_date callback: {e}")
-        return html.Div(
-            "An error occurred while updating the page. Please check the logs.", style={"color": "red"}
-        )
-
-'''
-
 
 
 if __name__ == "__main__":
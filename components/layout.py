@@ -20,9 +20,9 @@ layout = dmc.AppShell(
                         style={"color": "black", "marginRight": "25px"},
                     ),
 
-                    # Dark mode toggle and date filter can be uncommented when needed
+                    # Dark mode toggle can be uncommented when needed
                     # darkModeToggle(),
-                    # date_filter(),
+                    date_filter(),
                 ],
                 align="center",  # Vertically align elements
                 justify="space-between",  # Spread elements to opposite ends
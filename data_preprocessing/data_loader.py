@@ -1,8 +1,12 @@
 # data_loader.py
 
+import hashlib
+import json
 import logging
-from odoo_api.odoo_integration import query_odoo_data  # Future integration
+import time
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import os
 
 
@@ -17,61 +21,345 @@ FILES = {
     "master_sku": "master-sku.csv",
     "listings": "listings.csv",
     "listing_items": "listing-items.csv",
+    "faire_orders": "f-sales-orders.csv",
+    "se_orders": "se-sales-orders.csv",
 }
 
+# Column types used by the schema registry
+TEXT = "string[pyarrow]"
+CATEGORY = "category"
+DATETIME = "datetime64[ns]"
+INTEGER = "Int32"
+MONEY = "float64"
+
+# Declared column types per dataset. Files without a schema fall back to
+# inferred types in `preprocess_frame`.
+SCHEMAS = {
+    "sale_order_line": {
+        "Created on": DATETIME,
+        "Sales Date": DATETIME,
+        "Delivery Date": DATETIME,
+        "Order Reference": TEXT,
+        "Sales Team": CATEGORY,
+        "Salesperson": TEXT,
+        "Customer": TEXT,
+        "State": TEXT,
+        "SKU": TEXT,
+        "Product": TEXT,
+        "Collection": TEXT,
+        "Product Template": TEXT,
+        "Product Category": TEXT,
+        "Fabric SKU": TEXT,
+        "Fabric Type": TEXT,
+        "Quantity": INTEGER,
+        "Subtotal": MONEY,
+        "Total Cost": MONEY,
+        "Unit Cost": MONEY,
+        "Unit Price": MONEY,
+        "Order Status": CATEGORY,
+        "Invoice Status": CATEGORY,
+        "Delivery Status": CATEGORY,
+        "Total Tax": MONEY,
+    },
+    "master_sku": {
+        "WS Ship Date": TEXT,
+        "Release Month": TEXT,
+        "Category Group": CATEGORY,
+        "Category": TEXT,
+        "Sub-Category": TEXT,
+        "Collection": TEXT,
+        "Fabric Code": TEXT,
+        "SKU (Parent)": TEXT,
+        "SKU": TEXT,
+        "Name": TEXT,
+        "Season": TEXT,
+        "SPSU25 Status": CATEGORY,
+        "Sold by Info": TEXT,
+        "Carded / Non-Carded": TEXT,
+        "CARD PROPERTIES": TEXT,
+        "Properties": TEXT,
+        "Stones": TEXT,
+        "Color": TEXT,
+        "CORD/PRINT/PATTERN": TEXT,
+        "Material": TEXT,
+        "Length": TEXT,
+        "Size": TEXT,
+        "Size Abbreviation": TEXT,
+        "Unit Cost": MONEY,
+        "WS ($)": MONEY,
+        "EC ($)": MONEY,
+        "WEIGHT (LBS)": MONEY,
+        "UPC": TEXT,
+        "WS SKU?": TEXT,
+        "EC SKU?": TEXT,
+        "Amazon SKU": TEXT,
+        "Vendor": TEXT,
+        "Yards Per Unit": MONEY,
+        "Labor Cost": MONEY,
+        "Prefix": TEXT,
+        "Prepack SKU": TEXT,
+        "Available Sizes": TEXT,
+    },
+    "faire_orders": {
+        "Order Reference": TEXT,
+    },
+    "se_orders": {
+        "Order Reference": TEXT,
+    },
+}
+
+# Columns each downstream consumer reads from a dataset. Only their union is
+# parsed, stored and inserted; datasets not listed here are loaded in full.
+COLUMN_MANIFEST = {
+    "sale_order_line": {
+        "root_processing": [
+            "Sales Date", "Order Reference", "Sales Team", "SKU", "Collection",
+            "Quantity", "Subtotal", "Order Status",
+        ],
+        "pages.overview.home": ["SKU", "Fabric SKU", "Quantity", "Subtotal"],
+        "ecom_processing": ["Sales Team", "Order Reference", "SKU", "Collection", "Quantity", "Subtotal"],
+        "wholesale_processing": [
+            "Delivery Date", "Order Reference", "Sales Team", "Salesperson", "Customer", "State",
+            "SKU", "Quantity", "Subtotal", "Total Cost", "Unit Cost", "Unit Price", "Order Status",
+        ],
+        "faire_processing": ["Sales Date", "Order Reference", "SKU", "Quantity", "Subtotal"],
+        "se_processing": [
+            "Order Reference", "Salesperson", "Customer", "State", "SKU", "Collection",
+            "Product Category", "Quantity", "Subtotal", "Total Cost", "Order Status",
+        ],
+        "customer_segmentation": ["Order Reference", "Customer", "Subtotal", "Total Cost"],
+    },
+    "master_sku": {
+        "root_processing.merge_master_sku": ["SKU", "SKU (Parent)", "Category Group", "Category", "SPSU25 Status"],
+        "database.search_index": ["SKU", "Name", "Collection"],
+    },
+    "faire_orders": {
+        "database.order_list": ["Order Reference"],
+    },
+    "se_orders": {
+        "database.order_list": ["Order Reference"],
+    },
+}
+
+# Parallel ingestion: data sources load their tables concurrently (see
+# `DataSource.prefetch`) with the multithreaded pyarrow CSV reader
+PARALLEL_INGEST = True
+INGEST_WORKERS = min(len(FILES), os.cpu_count() or 1)
+PARALLEL_CSV_ENGINE = "pyarrow"
+
+# Rows per chunk when streaming a CSV file (see `iter_csv_chunks`)
+INGEST_CHUNK_SIZE = 50_000
+
+# Columnar snapshots of the preprocessed frames, keyed by their source file
+SNAPSHOT_FOLDER = os.path.join(DATA_FOLDER, ".snapshots")
+USE_SNAPSHOTS = True
+# Bump whenever preprocessing changes so stale snapshots are rebuilt
+SNAPSHOT_VERSION = 4
+
 # Global state for cached/preloaded data
 cached_data = None
 
 
-def load_csv_data():
+def load_csv_file(key, file_name, engine=None):
     """
-    Load all datasets from CSV files, preprocess them, and return as a dictionary of DataFrames.
+    Load one dataset, from its snapshot when available, otherwise from the CSV file.
+
+    Args:
+        key (str): Dataset key from `FILES`.
+        file_name (str): CSV file name inside `DATA_FOLDER`.
+        engine (str, optional): pandas CSV parser engine.
 
     Returns:
-        dict: Dictionary of preprocessed DataFrames for each CSV file.
+        pd.DataFrame: The preprocessed DataFrame.
     Raises:
-        Exception: If any CSV file fails to load.
-    """
-    dataframes = {}
-    for key, file_name in FILES.items():
-        file_path = os.path.join(DATA_FOLDER, file_name)
-        try:
-            dataframes[key] = pd.read_csv(file_path)
-            logger.info(f"Loaded {file_name} successfully.")
-        except Exception as e:
-            logger.error(f"Error loading {file_name}: {e}")
-            raise  # Re-raise exception to handle it at a higher level
-
-    # Preprocess the loaded DataFrames
-    dataframes = preprocess_csv(dataframes)
-    return dataframes
+        Exception: If the CSV file fails to load.
+    """
+    file_path = os.path.join(DATA_FOLDER, file_name)
+    start = time.perf_counter()
+    try:
+        # Reuse the columnar snapshot when the source file is unchanged
+        df = load_snapshot(key, file_path) if USE_SNAPSHOTS else None
+        source = "snapshot"
+        if df is None:
+            df = read_csv_file(key, file_path, engine=engine)
+            source = engine or "csv"
+            if USE_SNAPSHOTS:
+                write_snapshot(key, file_path, df)
+        logger.info(f"Loaded {file_name} from {source} in {time.perf_counter() - start:.2f}s ({len(df)} rows).")
+        return df
+    except Exception as e:
+        logger.error(f"Error loading {file_name}: {e}")
+        raise  # Re-raise exception to handle it at a higher level
 
 
-def load_data():
+def load_data(keys=None):
     """
-    Preload data during app startup. Attempts to query Odoo, falls back to CSV.
+    Preload data during app startup from the configured data source (by default Odoo,
+    falling back to the CSV snapshots). Tables are loaded lazily on first access.
+
+    Args:
+        keys (iterable, optional): Subset of `FILES` keys to expose. Defaults to all files.
+
+    Returns:
+        DataSource: Read-only mapping of table name to DataFrame, or None on failure.
     """
+    from data_preprocessing.data_sources import get_data_source
+
     global cached_data
     try:
-        logger.info("Attempting to query Odoo for data.")
-        cached_data = query_odoo_data()
-        logger.info("Data successfully loaded from Odoo.")
+        cached_data = get_data_source(tables=keys)
+        if not cached_data:
+            raise ValueError("No tables requested from the data source.")
+        logger.info(f"Data source ready: {cached_data.name} ({', '.join(cached_data)}).")
     except Exception as e:
-        logger.error(f"Failed to load data from Odoo: {e}")
-        logger.info("Falling back to CSV data.")
-        try:
-            cached_data = load_csv_data()
-            if not cached_data:
-                raise ValueError("No data loaded from CSV files.")
-            logger.info("Data successfully loaded from CSV.")
-        except Exception as e:
-            logger.error(f"Failed to load data from CSV: {e}")
-            cached_data = None  # Explicitly set to None
+        logger.error(f"Failed to set up the data source: {e}")
+        cached_data = None  # Explicitly set to None
 
     return cached_data
 
 
 # CSV HELPER
+def read_csv_file(key, file_path, engine=None):
+    """
+    Read and clean one CSV file. Files with a declared schema are parsed straight
+    into their typed columns; other files go through `preprocess_frame`.
+
+    Args:
+        key (str): Dataset key from `FILES`.
+        file_path (str): Path to the CSV file.
+        engine (str, optional): pandas CSV parser engine.
+
+    Returns:
+        pd.DataFrame: The cleaned DataFrame.
+    """
+    schema = SCHEMAS.get(key)
+    if schema is None:
+        return preprocess_frame(key, pd.read_csv(file_path, engine=engine))
+
+    try:
+        df = pd.read_csv(file_path, engine=engine, **read_csv_args(key, file_path, engine=engine))
+    except (ValueError, TypeError) as e:
+        # Malformed numbers: read them as text and let apply_schema coerce them
+        logger.warning(f"Typed read of {key} failed ({e}), coercing numeric columns.")
+        read_args = read_csv_args(key, file_path, engine=engine, coerce_numbers=True)
+        df = pd.read_csv(file_path, engine=engine, **read_args)
+
+    return apply_schema(key, df)
+
+
+def iter_csv_chunks(key, chunksize=INGEST_CHUNK_SIZE):
+    """
+    Read a CSV file in fixed-size chunks and clean each chunk with its schema,
+    so only one chunk is held in memory at a time.
+
+    Numeric columns are read as text and coerced per chunk, since a malformed
+    value cannot trigger a typed re-read halfway through the file.
+
+    Args:
+        key (str): Dataset key from `FILES` with a declared schema.
+        chunksize (int): Number of rows per chunk.
+
+    Yields:
+        pd.DataFrame: The next typed chunk.
+    """
+    file_path = os.path.join(DATA_FOLDER, FILES[key])
+    read_args = read_csv_args(key, file_path, coerce_numbers=True)
+    with pd.read_csv(file_path, chunksize=chunksize, **read_args) as reader:
+        for chunk in reader:
+            yield apply_schema(key, chunk)
+
+
+def read_csv_args(key, file_path, engine=None, coerce_numbers=False):
+    """
+    Build the `usecols`, `dtype` and `parse_dates` arguments of `pd.read_csv`
+    from a dataset's schema and column manifest.
+
+    Args:
+        key (str): Dataset key from `SCHEMAS`.
+        file_path (str): Path to the CSV file; its header is read to match column names.
+        engine (str, optional): pandas CSV parser engine.
+        coerce_numbers (bool): Read numeric columns as text for `apply_schema` to coerce.
+
+    Returns:
+        dict: Keyword arguments for `pd.read_csv`.
+    """
+    # Headers may carry stray spaces, so map declared names onto the raw ones
+    header = pd.read_csv(file_path, nrows=0).columns
+    raw_names = {col.strip(): col for col in header}
+
+    projection = projected_columns(key)
+    usecols = [raw for col, raw in raw_names.items() if projection is None or col in projection]
+
+    dtype, parse_dates = {}, []
+    for col, col_type in SCHEMAS[key].items():
+        raw = raw_names.get(col)
+        if raw is None or raw not in usecols:
+            continue
+        if col_type == DATETIME:
+            # The pyarrow engine infers timestamps itself and mangles nulls when asked to parse them
+            if engine != "pyarrow":
+                parse_dates.append(raw)
+        elif col_type == CATEGORY:
+            dtype[raw] = TEXT  # Categorised after the values are stripped
+        elif coerce_numbers and col_type in (INTEGER, MONEY):
+            dtype[raw] = TEXT
+        else:
+            dtype[raw] = col_type
+
+    return {"usecols": usecols, "dtype": dtype, "parse_dates": parse_dates}
+
+
+def projected_columns(key):
+    """
+    Return the columns of a dataset read by at least one consumer in `COLUMN_MANIFEST`.
+
+    Args:
+        key (str): Dataset key from `FILES`.
+
+    Returns:
+        set or None: Column names to load, or None to load every column.
+    """
+    consumers = COLUMN_MANIFEST.get(key)
+    if consumers is None:
+        return None
+    return set().union(*consumers.values())
+
+
+def apply_schema(key, df):
+    """
+    Finish typing a DataFrame read with its declared schema:
+    - Strip column names and text values.
+    - Turn categorical columns into categories.
+    - Coerce any datetime or numeric column the parser could not type.
+
+    Args:
+        key (str): Dataset key from `SCHEMAS`.
+        df (pd.DataFrame): DataFrame read by `read_csv_file`.
+
+    Returns:
+        pd.DataFrame: The typed DataFrame.
+    """
+    schema = SCHEMAS[key]
+    df.columns = df.columns.str.strip()
+
+    for col in df.columns:
+        col_type = schema.get(col, TEXT)
+        series = df[col]
+        if col_type in (TEXT, CATEGORY):
+            series = series.astype(TEXT).str.strip()
+            series = series.astype(CATEGORY) if col_type == CATEGORY else series
+        elif col_type == DATETIME:
+            if series.dtype != DATETIME:
+                series = pd.to_datetime(series, errors="coerce").astype(DATETIME)
+        elif series.dtype != col_type:
+            series = pd.to_numeric(series, errors="coerce")
+            series = series.astype(col_type) if col_type != INTEGER else series.round().astype(col_type)
+        df[col] = series
+
+    logger.info(f"Applied schema to DataFrame: {key}")
+    return df
+
+
 def preprocess_csv(dataframes):
     """
     Preprocess all loaded CSV DataFrames:
@@ -87,30 +375,282 @@ def preprocess_csv(dataframes):
         dict: Preprocessed DataFrames.
     """
     for key, df in dataframes.items():
-        logger.info(f"Preprocessing DataFrame: {key}")
-        
-        # Clean column names (strip spaces)
-        df.columns = df.columns.str.strip()
-
-        # Fill blanks with NaN
-        df.fillna(value=pd.NA, inplace=True)
-
-        # Process every column
-        for col in df.columns:
-            # If the column is of type string, strip spaces
-            if df[col].dtype == "object":
-                df[col] = df[col].astype(str).str.strip()
-            # If the column is numeric, convert to numeric (coerce invalid to NaN)
-            else:
-                df[col] = pd.to_numeric(df[col], errors="coerce")
-
-        # Log after processing
-        logger.info(f"Preprocessed DataFrame: {key}")
-        dataframes[key] = df
+        dataframes[key] = preprocess_frame(key, df)
 
     return dataframes
 
 
+def preprocess_frame(key, df):
+    """
+    Preprocess a single loaded CSV DataFrame (see `preprocess_csv`).
+
+    Args:
+        key (str): Dataset key from `FILES`, used for logging.
+        df (pd.DataFrame): The raw DataFrame.
+
+    Returns:
+        pd.DataFrame: The preprocessed DataFrame.
+    """
+    logger.info(f"Preprocessing DataFrame: {key}")
+
+    # Clean column names (strip spaces)
+    df.columns = df.columns.str.strip()
+
+    # Fill blanks with NaN
+    df.fillna(value=pd.NA, inplace=True)
+
+    # Process every column
+    for col in df.columns:
+        # If the column is of type string, strip spaces
+        if df[col].dtype == "object":
+            df[col] = df[col].astype(str).str.strip()
+        # If the column is numeric, convert to numeric (coerce invalid to NaN)
+        else:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+
+    # Log after processing
+    logger.info(f"Preprocessed DataFrame: {key}")
+    return df
+
+
+# SNAPSHOT HELPERS
+def hash_file(file_path, chunk_size=1024 * 1024):
+    """
+    Compute the SHA-256 digest of a file, reading it in chunks.
+
+    Args:
+        file_path (str): Path to the file.
+        chunk_size (int): Number of bytes read per chunk.
+
+    Returns:
+        str: Hex digest of the file contents.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def snapshot_paths(key):
+    """
+    Return the Parquet and manifest paths of the snapshot for a dataset.
+
+    Args:
+        key (str): Dataset key from `FILES`.
+
+    Returns:
+        tuple: (parquet_path, manifest_path)
+    """
+    return (
+        os.path.join(SNAPSHOT_FOLDER, f"{key}.parquet"),
+        os.path.join(SNAPSHOT_FOLDER, f"{key}.json"),
+    )
+
+
+def snapshot_fresh(key, file_path):
+    """
+    Check whether the Parquet snapshot of a dataset still matches its source CSV.
+
+    The size and mtime of the source are checked first. If only the mtime moved,
+    the content hash decides, so a touched-but-unchanged file keeps its snapshot.
+
+    Args:
+        key (str): Dataset key from `FILES`.
+        file_path (str): Path to the source CSV file.
+
+    Returns:
+        bool: True if the snapshot can be used in place of the CSV file.
+    """
+    parquet_path, manifest_path = snapshot_paths(key)
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        stat = os.stat(file_path)
+
+        if manifest.get("version") != SNAPSHOT_VERSION or manifest.get("size") != stat.st_size:
+            return False
+        if manifest.get("columns") != _snapshot_columns(key) or not os.path.exists(parquet_path):
+            return False
+
+        if manifest.get("mtime_ns") != stat.st_mtime_ns:
+            if manifest.get("sha256") != hash_file(file_path):
+                return False
+            # Same content, newer mtime: refresh the manifest to skip hashing next time
+            manifest["mtime_ns"] = stat.st_mtime_ns
+            _write_json_atomic(manifest_path, manifest)
+        return True
+    except FileNotFoundError:
+        return False
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable snapshot for {key}: {e}")
+        return False
+
+
+def load_snapshot(key, file_path):
+    """
+    Load the Parquet snapshot of a dataset if it still matches its source CSV
+    (see `snapshot_fresh`).
+
+    Args:
+        key (str): Dataset key from `FILES`.
+        file_path (str): Path to the source CSV file.
+
+    Returns:
+        pd.DataFrame or None: The snapshot, or None when it is missing or stale.
+    """
+    if not snapshot_fresh(key, file_path):
+        return None
+
+    parquet_path, _ = snapshot_paths(key)
+    try:
+        df = pd.read_parquet(parquet_path)
+        # A snapshot written chunk by chunk unifies the row group dictionaries in order
+        # of appearance; restore the sorted categories of a full read
+        for col in df.select_dtypes(CATEGORY):
+            df[col] = df[col].cat.reorder_categories(sorted(df[col].cat.categories))
+        logger.debug(f"Loaded snapshot for {key} ({len(df)} rows).")
+        return df
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable snapshot for {key}: {e}")
+        return None
+
+
+def iter_snapshot_chunks(key, chunksize=INGEST_CHUNK_SIZE):
+    """
+    Read the Parquet snapshot of a dataset in fixed-size record batches. The caller
+    checks `snapshot_fresh` first.
+
+    Args:
+        key (str): Dataset key from `FILES`.
+        chunksize (int): Number of rows per chunk.
+
+    Yields:
+        pd.DataFrame: The next typed chunk.
+    """
+    parquet_path, _ = snapshot_paths(key)
+    parquet_file = pq.ParquetFile(parquet_path)
+    try:
+        for batch in parquet_file.iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    finally:
+        parquet_file.close()
+
+
+def write_snapshot(key, file_path, df):
+    """
+    Write a typed Parquet snapshot of a preprocessed dataset next to its manifest.
+    Failures are logged and never interrupt loading.
+
+    Args:
+        key (str): Dataset key from `FILES`.
+        file_path (str): Path to the source CSV file.
+        df (pd.DataFrame): The preprocessed DataFrame.
+    """
+    parquet_path, manifest_path = snapshot_paths(key)
+    try:
+        os.makedirs(SNAPSHOT_FOLDER, exist_ok=True)
+        manifest = _snapshot_manifest(key, file_path, os.stat(file_path))
+
+        # Write to temporary files first so readers never see a partial snapshot
+        tmp_path = f"{parquet_path}.tmp"
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, parquet_path)
+        _write_json_atomic(manifest_path, manifest)
+        logger.info(f"Wrote snapshot for {key} to {parquet_path}.")
+    except Exception as e:
+        logger.warning(f"Failed to write snapshot for {key}: {e}")
+
+
+def snapshot_chunks(key, file_path, chunks):
+    """
+    Pass typed chunks through while writing them to a fresh snapshot, one row group
+    per chunk. The snapshot is only published once every chunk was read and the
+    source file did not change meanwhile. Failures are logged and never interrupt
+    loading.
+
+    Args:
+        key (str): Dataset key from `FILES`.
+        file_path (str): Path to the source CSV file.
+        chunks (iterable): Typed chunks of the whole file, e.g. from `iter_csv_chunks`.
+
+    Yields:
+        pd.DataFrame: The chunks, unchanged.
+    """
+    parquet_path, manifest_path = snapshot_paths(key)
+    tmp_path = f"{parquet_path}.tmp"
+    stat = os.stat(file_path)
+    writer = None
+    failed = False
+    try:
+        for chunk in chunks:
+            if not failed:
+                try:
+                    if writer is None:
+                        os.makedirs(SNAPSHOT_FOLDER, exist_ok=True)
+                        schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+                        # Each chunk has its own categories; fix the dictionary index width
+                        schema = pa.schema(
+                            [
+                                pa.field(field.name, pa.dictionary(pa.int32(), pa.string()))
+                                if pa.types.is_dictionary(field.type) else field
+                                for field in schema
+                            ],
+                            metadata=schema.metadata,
+                        )
+                        writer = pq.ParquetWriter(tmp_path, schema)
+                    writer.write_table(pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False))
+                except Exception as e:
+                    logger.warning(f"Failed to write snapshot for {key}: {e}")
+                    failed = True
+            yield chunk
+
+        if writer is not None and not failed:
+            try:
+                writer.close()
+                writer = None
+                if os.stat(file_path).st_mtime_ns != stat.st_mtime_ns:
+                    logger.warning(f"{file_path} changed while it was read; not writing its snapshot.")
+                else:
+                    manifest = _snapshot_manifest(key, file_path, stat)
+                    os.replace(tmp_path, parquet_path)
+                    _write_json_atomic(manifest_path, manifest)
+                    logger.info(f"Wrote snapshot for {key} to {parquet_path}.")
+            except Exception as e:
+                logger.warning(f"Failed to write snapshot for {key}: {e}")
+    finally:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _snapshot_manifest(key, file_path, stat):
+    return {
+        "version": SNAPSHOT_VERSION,
+        "source": os.path.basename(file_path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": hash_file(file_path),
+        "columns": _snapshot_columns(key),
+    }
+
+
+def _snapshot_columns(key):
+    # A snapshot only serves the column projection it was written with
+    projection = projected_columns(key)
+    return sorted(projection) if projection is not None else None
+
+
+def _write_json_atomic(path, payload):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(payload, f)
+    os.replace(tmp_path, path)
+
+
 
 
 
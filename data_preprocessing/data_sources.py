@@ -0,0 +1,335 @@
+# data_sources.py
+
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from data_preprocessing import data_loader
+from database.db_connection import query_frame
+from database.db_schema import LABEL_VIEWS
+from odoo_api.odoo_integration import query_odoo_data
+
+logger = logging.getLogger(__name__)
+
+# Backends tried in order, comma separated (e.g. "sqlite" or "odoo,parquet")
+DATA_SOURCE = os.environ.get("DATA_SOURCE", "odoo,parquet")
+
+
+class DataSource(Mapping, ABC):
+    """
+    Lazy, per-table access to the ingested datasets.
+
+    A source behaves like a read-only dictionary of DataFrames keyed by the dataset
+    keys of `data_loader.FILES`. A table is only loaded the first time it is accessed
+    and is memoized afterwards, so consumers only pay for the tables they read.
+    Each table has its own lock, so loads of different tables do not wait on each other.
+
+    Large tables can also be streamed in chunks with `open_table` without being memoized,
+    and `prefetch` loads tables concurrently in the background (see `PARALLEL_INGEST`).
+    """
+
+    name = "base"
+
+    def __init__(self, tables=None):
+        self.tables = list(tables) if tables is not None else list(data_loader.FILES)
+        self._frames = {}
+        self._locks = {key: threading.Lock() for key in self.tables}
+
+    @abstractmethod
+    def load_table(self, key):
+        """
+        Load one table from the backend.
+
+        Args:
+            key (str): Dataset key.
+
+        Returns:
+            pd.DataFrame: The table.
+        """
+
+    def available(self, key):
+        """
+        Check whether the backend can serve a table, loading it if that is the only way to know.
+
+        Args:
+            key (str): Dataset key.
+
+        Returns:
+            bool: True if the table can be loaded.
+        """
+        try:
+            self[key]
+            return True
+        except Exception as e:
+            logger.debug(f"{key} is not available from {self.name} source: {e}")
+            return False
+
+    def source_file(self, key):
+        """
+        Return the file a table is read from, for change detection.
+
+        Args:
+            key (str): Dataset key.
+
+        Returns:
+            str: Path of the source file, or None when the backend has no file (e.g. Odoo).
+        """
+        return None
+
+    def open_table(self, key, chunksize=data_loader.INGEST_CHUNK_SIZE):
+        """
+        Open a table for a chunked load. Backends without a chunked reader load the
+        whole table as a single chunk.
+
+        Args:
+            key (str): Dataset key.
+            chunksize (int): Number of rows per chunk, for backends that stream.
+
+        Returns:
+            tuple: (iterator of typed DataFrames, `source_file(key)`).
+        """
+        return iter([self[key]]), self.source_file(key)
+
+    def __getitem__(self, key):
+        if key not in self.tables:
+            raise KeyError(key)
+        with self._locks[key]:
+            if key not in self._frames:
+                self._frames[key] = self.load_table(key)
+                logger.info(f"Loaded {key} from {self.name} source.")
+            return self._frames[key]
+
+    def __contains__(self, key):
+        # Membership must not load the table, as Mapping.__contains__ would
+        return key in self.tables
+
+    def __iter__(self):
+        return iter(self.tables)
+
+    def __len__(self):
+        return len(self.tables)
+
+    def prefetch(self, keys=None):
+        """
+        Start loading tables concurrently in background threads and return immediately.
+
+        Accessing a table that is still loading waits on its lock, so a prefetch never
+        loads a table twice. A failed load is not memoized: the error is raised again by
+        the first access to the table.
+
+        Args:
+            keys (iterable, optional): Tables to load. Defaults to every table.
+        """
+        keys = [key for key in (self.tables if keys is None else keys) if key in self.tables]
+        if not data_loader.PARALLEL_INGEST or not keys:
+            return
+
+        executor = ThreadPoolExecutor(
+            max_workers=min(len(keys), data_loader.INGEST_WORKERS), thread_name_prefix="ingest"
+        )
+        for key in keys:
+            executor.submit(self._prefetch_table, key)
+        executor.shutdown(wait=False)
+
+    def _prefetch_table(self, key):
+        try:
+            self[key]
+        except Exception as e:
+            logger.debug(f"Prefetch of {key} from {self.name} source failed: {e}")
+
+    def load_all(self):
+        """
+        Eagerly load every declared table, concurrently when `PARALLEL_INGEST` is set.
+
+        Returns:
+            dict: Dictionary of DataFrames for each table.
+        """
+        self.prefetch()
+        return {key: self[key] for key in self.tables}
+
+    def invalidate(self, key=None):
+        """
+        Drop memoized tables so the next access reloads them.
+
+        Args:
+            key (str, optional): Table to drop. Defaults to every table.
+        """
+        for table in self.tables if key is None else [key]:
+            with self._locks[table]:
+                self._frames.pop(table, None)
+
+
+class CSVSource(DataSource):
+    """Reads and cleans the source CSV files on every load."""
+
+    name = "csv"
+
+    # Loads run in prefetch threads, so they use the multithreaded reader
+    engine = data_loader.PARALLEL_CSV_ENGINE if data_loader.PARALLEL_INGEST else None
+
+    def load_table(self, key):
+        return data_loader.read_csv_file(key, self.source_file(key), engine=self.engine)
+
+    def available(self, key):
+        return os.path.exists(self.source_file(key))
+
+    def source_file(self, key):
+        return os.path.join(data_loader.DATA_FOLDER, data_loader.FILES[key])
+
+    def open_table(self, key, chunksize=data_loader.INGEST_CHUNK_SIZE):
+        file_path = self.source_file(key)
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"Source file '{file_path}' does not exist.")
+        return data_loader.iter_csv_chunks(key, chunksize=chunksize), file_path
+
+
+class ParquetSnapshotSource(CSVSource):
+    """
+    Reads the Parquet snapshots, rebuilding a snapshot from its CSV when stale.
+    Chunked loads stream the snapshot in record batches while it is fresh; a stale
+    snapshot is rewritten from the CSV chunks as they stream.
+    """
+
+    name = "parquet"
+
+    def load_table(self, key):
+        return data_loader.load_csv_file(key, data_loader.FILES[key], engine=self.engine)
+
+    def open_table(self, key, chunksize=data_loader.INGEST_CHUNK_SIZE):
+        chunks, file_path = super().open_table(key, chunksize)
+        if not data_loader.USE_SNAPSHOTS:
+            return chunks, file_path
+        if data_loader.snapshot_fresh(key, file_path):
+            return data_loader.iter_snapshot_chunks(key, chunksize), file_path
+        return data_loader.snapshot_chunks(key, file_path, chunks), file_path
+
+
+class SQLiteSource(DataSource):
+    """Reads tables back from the app database, restoring source column names and types."""
+
+    name = "sqlite"
+
+    def __init__(self, tables=None, db_file=None):
+        from database.db_insert import DB_FILE, TABLE_COLUMNS
+        super().__init__(tables)
+        self.db_file = db_file or DB_FILE
+        self.table_columns = TABLE_COLUMNS
+
+    def load_table(self, key):
+        if key not in self.table_columns:
+            raise KeyError(f"Table '{key}' is not stored in the database.")
+
+        projection = data_loader.projected_columns(key)
+        columns = {
+            sql_col: col for col, sql_col in self.table_columns[key].items()
+            if projection is None or col in projection
+        }
+        # Normalized tables are read through their labelled view
+        query = f"SELECT {', '.join(columns)} FROM {LABEL_VIEWS.get(key, key)};"
+
+        df = query_frame(query, db_file=self.db_file).rename(columns=columns)
+        return data_loader.apply_schema(key, df)
+
+
+class OdooSource(DataSource):
+    """Queries Odoo once and serves each table from the result."""
+
+    name = "odoo"
+
+    def __init__(self, tables=None):
+        super().__init__(tables)
+        self._result = None
+        self._error = None
+        self._query_lock = threading.Lock()
+
+    def load_table(self, key):
+        with self._query_lock:
+            # A failed query is not retried by every table
+            if self._result is None and self._error is None:
+                try:
+                    self._result = query_odoo_data()
+                except Exception as e:
+                    self._error = e
+            if self._error is not None:
+                raise self._error
+        return self._result[key]
+
+
+class FallbackSource(DataSource):
+    """Tries each source in order per table, falling back to the next one on failure."""
+
+    def __init__(self, sources, tables=None):
+        super().__init__(tables)
+        self.sources = sources
+        self.name = ",".join(source.name for source in sources)
+
+    def load_table(self, key):
+        errors = []
+        for source in self.sources:
+            try:
+                return source[key]
+            except Exception as e:
+                logger.error(f"Failed to load {key} from {source.name} source: {e}")
+                errors.append(f"{source.name}: {e}")
+        raise RuntimeError(f"Could not load {key} from any source ({'; '.join(errors)}).")
+
+    def source_for(self, key):
+        """
+        Return the first source able to serve a table.
+
+        Args:
+            key (str): Dataset key.
+
+        Returns:
+            DataSource: The source.
+
+        Raises:
+            RuntimeError: If no source can serve the table.
+        """
+        for source in self.sources:
+            if source.available(key):
+                return source
+        raise RuntimeError(f"{key} is not available from any source.")
+
+    def available(self, key):
+        return any(source.available(key) for source in self.sources)
+
+    def source_file(self, key):
+        return self.source_for(key).source_file(key)
+
+    def open_table(self, key, chunksize=data_loader.INGEST_CHUNK_SIZE):
+        return self.source_for(key).open_table(key, chunksize)
+
+
+# Available backends by name
+DATA_SOURCES = {
+    "csv": CSVSource,
+    "parquet": ParquetSnapshotSource,
+    "sqlite": SQLiteSource,
+    "odoo": OdooSource,
+}
+
+
+def get_data_source(name=None, tables=None):
+    """
+    Build the data source configured for this environment.
+
+    Args:
+        name (str, optional): Comma-separated backend names. Defaults to `DATA_SOURCE`.
+        tables (iterable, optional): Tables the source exposes. Defaults to every file.
+
+    Returns:
+        DataSource: A lazy source; tables load on first access.
+    """
+    names = [n.strip() for n in (name or DATA_SOURCE).split(",") if n.strip()]
+    unknown = [n for n in names if n not in DATA_SOURCES]
+    if unknown or not names:
+        raise ValueError(f"Unknown data source(s) {unknown}; expected one of {list(DATA_SOURCES)}.")
+
+    sources = [DATA_SOURCES[n](tables=tables) for n in names]
+    return sources[0] if len(sources) == 1 else FallbackSource(sources, tables=tables)
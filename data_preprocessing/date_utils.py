@@ -0,0 +1,174 @@
+import numpy as np
+import pandas as pd
+
+# Weekday numbers of the supported week anchors (Monday = 0, as in pandas)
+WEEK_ANCHORS = {"monday": 0, "sunday": 6}
+
+# Weeks start on Monday, matching pandas' "W" periods
+DEFAULT_WEEK_ANCHOR = "monday"
+
+# First month of the fiscal year; 1 is the calendar year
+FISCAL_YEAR_START_MONTH = 1
+
+# Period granularities understood by `period_start` and `sql_period_start`
+GRANULARITIES = ("day", "week", "month", "quarter", "year")
+
+# 1970-01-01, the datetime64 epoch, was a Thursday
+_EPOCH_WEEKDAY = 3
+
+
+def week_start(dates, anchor=DEFAULT_WEEK_ANCHOR):
+    """
+    Return the first day of the week of each date.
+
+    Args:
+        dates (pd.Series or array-like): Datetimes, NaT allowed.
+        anchor (str): First day of the week, a key of `WEEK_ANCHORS`.
+
+    Returns:
+        pd.Series or np.ndarray: datetime64[ns] week starts, shaped like `dates`.
+    """
+    days = _as_days(dates)
+    day_numbers = days.view("int64")
+    offset = (day_numbers + _EPOCH_WEEKDAY - WEEK_ANCHORS[anchor]) % 7
+    return _like(dates, days - offset.astype("timedelta64[D]"), days)
+
+
+def month_start(dates):
+    """
+    Return the first day of the month of each date.
+
+    Args:
+        dates (pd.Series or array-like): Datetimes, NaT allowed.
+
+    Returns:
+        pd.Series or np.ndarray: datetime64[ns] month starts, shaped like `dates`.
+    """
+    days = _as_days(dates)
+    return _like(dates, days.astype("datetime64[M]"), days)
+
+
+def quarter_start(dates, fiscal_start_month=FISCAL_YEAR_START_MONTH):
+    """
+    Return the first day of the (fiscal) quarter of each date.
+
+    Args:
+        dates (pd.Series or array-like): Datetimes, NaT allowed.
+        fiscal_start_month (int): First month of the fiscal year (1-12).
+
+    Returns:
+        pd.Series or np.ndarray: datetime64[ns] quarter starts, shaped like `dates`.
+    """
+    return _month_bucket(dates, 3, fiscal_start_month)
+
+
+def year_start(dates, fiscal_start_month=FISCAL_YEAR_START_MONTH):
+    """
+    Return the first day of the (fiscal) year of each date.
+
+    Args:
+        dates (pd.Series or array-like): Datetimes, NaT allowed.
+        fiscal_start_month (int): First month of the fiscal year (1-12).
+
+    Returns:
+        pd.Series or np.ndarray: datetime64[ns] year starts, shaped like `dates`.
+    """
+    return _month_bucket(dates, 12, fiscal_start_month)
+
+
+def fiscal_year(dates, fiscal_start_month=FISCAL_YEAR_START_MONTH):
+    """
+    Return the fiscal year of each date, named after the calendar year it ends in.
+
+    Args:
+        dates (pd.Series or array-like): Datetimes, NaT allowed.
+        fiscal_start_month (int): First month of the fiscal year (1-12).
+
+    Returns:
+        pd.Series: Nullable integer fiscal years, indexed like `dates` when it is a Series.
+    """
+    starts = pd.Series(year_start(dates, fiscal_start_month))
+    years = starts.dt.year + (fiscal_start_month != 1)
+    if isinstance(dates, pd.Series):
+        years.index = dates.index
+    return years.astype("Int32")
+
+
+def period_start(dates, granularity, week_anchor=DEFAULT_WEEK_ANCHOR,
+                 fiscal_start_month=FISCAL_YEAR_START_MONTH):
+    """
+    Return the first day of the period of each date.
+
+    Args:
+        dates (pd.Series or array-like): Datetimes, NaT allowed.
+        granularity (str): One of `GRANULARITIES`.
+        week_anchor (str): First day of the week, for weekly periods.
+        fiscal_start_month (int): First month of the fiscal year, for quarters and years.
+
+    Returns:
+        pd.Series or np.ndarray: datetime64[ns] period starts, shaped like `dates`.
+    """
+    if granularity == "day":
+        days = _as_days(dates)
+        return _like(dates, days, days)
+    if granularity == "week":
+        return week_start(dates, week_anchor)
+    if granularity == "month":
+        return month_start(dates)
+    if granularity == "quarter":
+        return quarter_start(dates, fiscal_start_month)
+    if granularity == "year":
+        return year_start(dates, fiscal_start_month)
+    raise ValueError(f"Unknown granularity '{granularity}', expected one of {', '.join(GRANULARITIES)}.")
+
+
+def sql_period_start(column, granularity, week_anchor=DEFAULT_WEEK_ANCHOR,
+                     fiscal_start_month=FISCAL_YEAR_START_MONTH):
+    """
+    Build the SQLite expression for the first day ('YYYY-MM-DD') of the period of
+    a date column, matching `period_start`.
+
+    Args:
+        column (str): SQL expression of a 'YYYY-MM-DD' date.
+        granularity (str): One of `GRANULARITIES`.
+        week_anchor (str): First day of the week, for weekly periods.
+        fiscal_start_month (int): First month of the fiscal year, for quarters and years.
+
+    Returns:
+        str: The SQL expression.
+    """
+    if granularity == "day":
+        return f"date({column})"
+    if granularity == "week":
+        # 'weekday N' moves to the next day N (Sunday = 0), the last day of the week
+        last_day = WEEK_ANCHORS[week_anchor] % 7
+        return f"date({column}, 'weekday {last_day}', '-6 days')"
+    if granularity == "month":
+        return f"date({column}, 'start of month')"
+    if granularity in ("quarter", "year"):
+        months = 3 if granularity == "quarter" else 12
+        back = f"(CAST(strftime('%m', {column}) AS INTEGER) + {12 - fiscal_start_month}) % {months}"
+        return f"date({column}, 'start of month', printf('-%d months', {back}))"
+    raise ValueError(f"Unknown granularity '{granularity}', expected one of {', '.join(GRANULARITIES)}.")
+
+
+def _as_days(dates):
+    """Convert datetimes to a datetime64[D] array."""
+    return np.asarray(dates, dtype="datetime64[ns]").astype("datetime64[D]")
+
+
+def _like(dates, values, days):
+    """Return bucketed values as datetime64[ns], NaT where the input was NaT,
+    wrapped in a Series indexed like `dates` when it is one."""
+    values = np.where(np.isnat(days), np.datetime64("NaT"), values).astype("datetime64[ns]")
+    if isinstance(dates, pd.Series):
+        return pd.Series(values, index=dates.index, name=dates.name)
+    return values
+
+
+def _month_bucket(dates, months, fiscal_start_month):
+    """Round dates down to blocks of `months` months aligned on `fiscal_start_month`."""
+    days = _as_days(dates)
+    month_numbers = days.astype("datetime64[M]").view("int64") - (fiscal_start_month - 1)
+    starts = (month_numbers - month_numbers % months + (fiscal_start_month - 1)).astype("datetime64[M]")
+    return _like(dates, starts, days)
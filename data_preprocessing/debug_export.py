@@ -0,0 +1,100 @@
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from database.db_connection import query_frame
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Debug exports are opt-in: set DEBUG_EXPORT=1 to write the inspection files
+DEBUG_EXPORT = os.environ.get("DEBUG_EXPORT", "").strip().lower() in {"1", "true", "yes", "on"}
+
+# Inspection files are written as Parquet next to the source data
+EXPORT_FOLDER = "./data"
+EXPORT_FORMAT = "parquet"
+
+# A single background worker keeps the writes off the boot and refresh path and in order
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="debug-export")
+
+
+def export_path(name):
+    """
+    Return the path of an inspection export.
+
+    Args:
+        name (str): Export name, e.g. "merged_data_inspection".
+
+    Returns:
+        str: Path of the export file.
+    """
+    return os.path.join(EXPORT_FOLDER, f"{name}.{EXPORT_FORMAT}")
+
+
+def export_frame(name, df):
+    """
+    Queue a DataFrame to be written as an inspection export, if debug exports are enabled.
+
+    The frame is copied so later changes by the caller do not leak into the export.
+
+    Args:
+        name (str): Export name.
+        df (pd.DataFrame): Data to export.
+
+    Returns:
+        concurrent.futures.Future: The pending write, or None when exports are disabled.
+    """
+    if not DEBUG_EXPORT or df is None:
+        return None
+    return _executor.submit(_write, name, df.copy())
+
+
+def export_table(table_name, name=None):
+    """
+    Queue an SQL table to be read and written as an inspection export, if debug
+    exports are enabled. The table is read by the worker, not the caller.
+
+    Args:
+        table_name (str): Name of the SQL table to export.
+        name (str): Export name, defaults to "sql_<table_name>".
+
+    Returns:
+        concurrent.futures.Future: The pending write, or None when exports are disabled.
+    """
+    if not DEBUG_EXPORT:
+        return None
+
+    return _executor.submit(_write, name or f"sql_{table_name}", lambda: query_frame(f"SELECT * FROM {table_name};"))
+
+
+def read_export(name):
+    """
+    Read an inspection export back, e.g. for the testing modes.
+
+    Args:
+        name (str): Export name.
+
+    Returns:
+        pd.DataFrame: The exported data.
+    """
+    path = export_path(name)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"The {os.path.basename(path)} export is missing. Run with DEBUG_EXPORT=1 to create it.")
+    return pd.read_parquet(path)
+
+
+def _write(name, data):
+    """Write one export atomically, logging instead of raising on failure.
+    `data` is a DataFrame or a callable returning one."""
+    path = export_path(name)
+    start = time.perf_counter()
+    try:
+        df = data() if callable(data) else data
+        os.makedirs(EXPORT_FOLDER, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+        logger.info(f"Exported {name} ({len(df)} rows) in {time.perf_counter() - start:.2f}s.")
+    except Exception as e:
+        logger.error(f"Error exporting {name}: {e}")
@@ -1,5 +1,8 @@
 import pandas as pd
 from flask import current_app
+from data_preprocessing import debug_export
+from data_preprocessing.lazy_datasets import LazyDatasets, derive
+from database import db_queries
 
 # Function to filter eCommerce-specific sales
 def filter_ecom_data(merged_data):
@@ -57,6 +60,38 @@ def compute_statistics(filtered_data):
         "top_selling_product": top_selling_product,
     }
 
+# Function to compute statistics from the SQLite summary tables
+def compute_summary_statistics():
+    """
+    Compute the same statistics as `compute_statistics` from the SQLite summary
+    tables, without scanning the eCommerce order lines.
+
+    Returns:
+        dict: Dictionary of computed statistics.
+    """
+    return summarize_kpis(db_queries.fetch_kpis(team="Shopify"))
+
+
+def summarize_kpis(kpis):
+    """
+    Select the eCommerce statistics from headline KPIs.
+
+    Args:
+        kpis (dict): eCommerce KPIs from `db_queries.fetch_kpis` or `SalesCube.kpis`.
+
+    Returns:
+        dict: Dictionary of computed statistics, as `compute_statistics` returns.
+    """
+    if not kpis["lines"]:
+        return compute_statistics(pd.DataFrame())
+
+    return {
+        "total_orders": kpis["total_orders"],
+        "total_revenue": kpis["total_revenue"],
+        "avg_order_value": kpis["avg_order_value_all"],
+        "top_selling_product": kpis["top_selling_product"],
+    }
+
 # group Collection data
 def process_collection_data(ecom_data):
     """
@@ -104,42 +139,32 @@ def process_collection_data(ecom_data):
 
 def process_ecom_data():
     """
-    Process eCommerce-specific data, compute statistics, and return DataFrames and stats.
+    Declare the eCommerce datasets: statistics, filtered lines and collection data.
+    Each is computed on first access and memoized for the current data version
+    (see `LazyDatasets`).
     """
     # Access root data from Flask's config
     root_data = current_app.config['root_data']
     if not root_data:
         raise ValueError("Root data not available in Flask config.")
 
-    # Access the merged data
-    merged_data = root_data['merged_data']
-
-    # Filter for eCommerce-specific sales
-    ecom_data = filter_ecom_data(merged_data)
-
-    # Compute statistics
-    stats = compute_statistics(ecom_data)
-
-    # Process collection data for analysis
-    ec_collection_data = process_collection_data(ecom_data)
-
-    # Save the filtered eCommerce data to a CSV file for inspection
-    try:
-        ecom_data.to_csv("./data/ecom_data_inspection.csv", index=False)
-        print("E-commerce data saved to ecom_data_inspection.csv for inspection.")
-    except Exception as e:
-        print(f"Error saving e-commerce data to CSV: {e}")
-
-    
-
-    # Return structured data
-    return {
-        "stats": stats,
-        "merged_data": ecom_data,  # Filtered eCommerce data
-        "ec_collection_data": ec_collection_data,  # Aggregated data by collection
-        "filtered_sale_order_line": ecom_data,
-    }
-
+    def load_ecom_lines():
+        # Filter for eCommerce-specific sales
+        ecom_data = filter_ecom_data(root_data['merged_data'])
+
+        # Export the filtered eCommerce data for inspection (opt-in, in the background)
+        debug_export.export_frame("ecom_data_inspection", ecom_data)
+        return ecom_data
+
+    ecom = LazyDatasets("ecom", {
+        # Statistics come from the summary tables
+        "stats": compute_summary_statistics,
+        "merged_data": load_ecom_lines,  # Filtered eCommerce data
+        # Aggregated data by collection; None when there are no eCommerce lines
+        "ec_collection_data": derive(lambda: ecom["merged_data"], process_collection_data, "eCommerce collection data"),
+        "filtered_sale_order_line": lambda: ecom["merged_data"],
+    })
+    return ecom
 
 
 if __name__ == "__main__":
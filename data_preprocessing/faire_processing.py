@@ -1,10 +1,15 @@
 import pandas as pd
 from flask import current_app
+from data_preprocessing.lazy_datasets import LazyDatasets
+
+# Sales days of the Winter Faire market
+WINTER_START_DATE = "2025-01-21"
+WINTER_END_DATE = "2025-01-24"
 
 # Function to filter Faire-specific sales
-def filter_faire_data(merged_data, faire_orders):
+def filter_faire_data(merged_data):
     """
-    Filter the merged data for Faire-specific sales (Sales Team = 'Faire').
+    Filter the merged data for Faire-specific sales (Channel = 'Faire').
 
     Args:
         merged_data (pd.DataFrame): The merged DataFrame containing all sales data.
@@ -12,15 +17,11 @@ def filter_faire_data(merged_data, faire_orders):
     Returns:
         pd.DataFrame: Filtered DataFrame for Faire sales.
     """
-    if merged_data.empty or faire_orders.empty:
+    if merged_data.empty:
         return pd.DataFrame()
 
-    # Ensure the column names alignn
-    faire_orders = faire_orders.rename(columns=lambda x: x.strip())  # Strip whitespace from columns
-    faire_order_references = faire_orders["Order Reference"].unique()  # List of relevant order references
-
-    # Filter merged_data for these orders
-    filtered = merged_data[merged_data["Order Reference"].isin(faire_order_references)]
+    # The channel is attached at merge time from the Faire order list
+    filtered = merged_data[merged_data["Channel"] == "Faire"]
 
     return filtered
 
@@ -38,16 +39,11 @@ def filter_winter_data(faire_data):
     if "Sales Date" not in faire_data.columns:
         raise KeyError("'Sales Date' column is missing from the Faire data.")
 
-    # Ensure we work on a copy of the data to avoid the SettingWithCopyWarning
-    faire_data = faire_data.copy()
-
-    # Ensure that 'Sales Date' is in datetime format
-    faire_data["Sales Date"] = pd.to_datetime(faire_data["Sales Date"], errors="coerce")
-    
+    # 'Sales Date' is parsed to datetime at ingest
     # Filter for the specified date range
     winter_data = faire_data[
-        (faire_data["Sales Date"] >= "2025-01-21") &
-        (faire_data["Sales Date"] < "2025-01-25")
+        (faire_data["Sales Date"] >= WINTER_START_DATE) &
+        (faire_data["Sales Date"] < pd.Timestamp(WINTER_END_DATE) + pd.Timedelta(days=1))
     ]
     return winter_data
 
@@ -90,38 +86,45 @@ def compute_statistics(filtered_data):
         "top_selling_product": top_selling_product,
     }
 
+def summarize_kpis(kpis):
+    """
+    Select the Faire statistics from headline KPIs.
+
+    Args:
+        kpis (dict): Faire KPIs from `SalesCube.kpis`.
+
+    Returns:
+        dict: Dictionary of computed statistics, as `compute_statistics` returns.
+    """
+    if not kpis["lines"]:
+        return compute_statistics(pd.DataFrame())
+
+    return {
+        "total_orders": kpis["total_orders"],
+        "total_revenue": kpis["total_revenue"],
+        "avg_order_value": kpis["avg_order_value_all"],
+        "top_selling_product": kpis["top_selling_product"],
+    }
+
 # Main processing function
 def process_faire_data():
     """
-    Process Faire-specific data, compute statistics, and return DataFrames and stats.
+    Declare the Faire datasets: Faire and Winter Faire lines and their statistics.
+    Each is computed on first access and memoized for the current data version
+    (see `LazyDatasets`).
     """
     # Access root data from Flask's config
     root_data = current_app.config['root_data']
     if not root_data:
         raise ValueError("Root data not available in Flask config.")
-    
-    faire_orders = pd.read_csv('./data/f-sales-orders.csv')
-
-    # Access the merged data
-    merged_data = root_data['merged_data']
-
-    # Filter for Faire-specific sales
-    faire_data = filter_faire_data(merged_data, faire_orders)
 
-    # Filter for Winter Faire data
-    winter_data = filter_winter_data(faire_data)
-
-    # Compute statistics
-    stats = compute_statistics(faire_data)
-    winter_stats = compute_statistics(winter_data)
-
-    # Return structured data
-    return {
-        "stats": stats,
-        "faire_data": faire_data,  # Filtered Faire data
-        "winter_data": winter_data,  # Filtered winter data
-        "winter_stats": winter_stats,
-    }
+    faire = LazyDatasets("faire", {
+        "stats": lambda: compute_statistics(faire["faire_data"]),
+        "faire_data": lambda: filter_faire_data(root_data['merged_data']),  # Filtered Faire data
+        "winter_data": lambda: filter_winter_data(faire["faire_data"]),  # Filtered winter data
+        "winter_stats": lambda: compute_statistics(faire["winter_data"]),
+    })
+    return faire
 
 
 if __name__ == "__main__":
@@ -0,0 +1,96 @@
+import logging
+import threading
+import time
+from collections.abc import Mapping
+from data_preprocessing import debug_export
+from database.db_connection import DB_FILE, data_version
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class LazyDatasets(Mapping):
+    """
+    Read-only mapping of derived datasets, each computed by a function on first
+    access and memoized until the data version of the database changes.
+
+    The functions take no arguments. A dataset derived from other datasets reads
+    them from their mapping when it is computed, so it follows the same data
+    version. Concurrent requests for a dataset being computed wait for it
+    instead of computing it again.
+
+    `nodes` maps each dataset name to its function; `name` labels the group in logs.
+    """
+
+    def __init__(self, name, nodes, db_file=DB_FILE):
+        self.name = name
+        self.db_file = db_file
+        self._nodes = dict(nodes)
+        self._memos = {}
+        self._locks = {key: threading.Lock() for key in self._nodes}
+
+    def __getitem__(self, key):
+        compute = self._nodes[key]
+        version = data_version(self.db_file)
+        with self._locks[key]:
+            memo = self._memos.get(key)
+            if memo is not None and memo[0] == version:
+                return memo[1]
+
+            start = time.perf_counter()
+            try:
+                value = compute()
+            except Exception as e:
+                logger.error(f"Error computing {self.name} dataset '{key}': {e}")
+                raise
+            self._memos[key] = (version, value)
+
+        logger.info(
+            f"Computed {self.name} dataset '{key}' for data version {version} "
+            f"in {time.perf_counter() - start:.2f}s."
+        )
+        return value
+
+    def __iter__(self):
+        return iter(self._nodes)
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def computed(self):
+        """
+        Return the names of the datasets memoized for the current data version.
+
+        Returns:
+            list: Dataset names.
+        """
+        version = data_version(self.db_file)
+        return [key for key, memo in list(self._memos.items()) if memo[0] == version]
+
+
+def derive(read_input, compute, description, export_name=None):
+    """
+    Build the function of a dataset computed from another dataset, for datasets the
+    pages can do without: a failing computation is logged and yields None, which the
+    pages handle, instead of failing the page render.
+
+    Args:
+        read_input (callable): Returns the input dataset, e.g. `lambda: ecom["merged_data"]`.
+        compute (callable): Computes the dataset from its input.
+        description (str): Dataset description for the logs.
+        export_name (str, optional): Name of the debug export of the result
+            (see `debug_export.export_frame`).
+
+    Returns:
+        callable: The dataset function.
+    """
+    def node():
+        try:
+            result = compute(read_input())
+        except Exception as e:
+            logger.error(f"Error computing {description}: {e}")
+            return None
+        if export_name:
+            debug_export.export_frame(export_name, result)
+        return result
+    return node
@@ -0,0 +1,56 @@
+import numpy as np
+
+# Leaderboards rank by revenue and report revenue and quantity by default
+TOP_N_METRIC = "Subtotal"
+TOP_N_MEASURES = ("Subtotal", "Quantity")
+
+
+def top_n(df, dimensions, partitions=(), n=10, metric=TOP_N_METRIC, measures=TOP_N_MEASURES):
+    """
+    Compute the top `n` values of one or more dimensions within every partition.
+
+    Each dimension is summed with a single groupby over (partitions, dimension);
+    the groups are then ranked by `metric` within their partition and cut to the
+    first `n`, so every partition's leaderboard comes out of the same pass.
+    Ties are broken by the dimension value.
+
+    Args:
+        df (pd.DataFrame): Order lines.
+        dimensions (iterable): Columns to rank, e.g. ["SKU (Parent)", "Collection"].
+        partitions (iterable): Columns splitting the rankings, e.g. ["Category Group"].
+            A single ranking over all rows if empty.
+        n (int): Number of rows kept per partition.
+        metric (str): Measure to rank by, highest first.
+        measures (iterable): Columns summed for each value.
+
+    Returns:
+        dict: One DataFrame per dimension with columns partitions + [dimension] + measures,
+            ordered by partition, then rank.
+    """
+    partitions, measures = list(partitions), list(measures)
+    boards = {}
+    for dimension in dimensions:
+        grouped = df.groupby(partitions + [dimension], observed=True)[measures].sum().reset_index()
+        grouped = grouped.sort_values(
+            partitions + [metric], ascending=[True] * len(partitions) + [False], kind="stable"
+        )
+        top = grouped.groupby(partitions, observed=True).head(n) if partitions else grouped.head(n)
+        boards[dimension] = top.reset_index(drop=True)
+    return boards
+
+
+def partition_rows(board, values):
+    """
+    Return the leaderboard of one partition from a `top_n` table.
+
+    Args:
+        board (pd.DataFrame): A table returned by `top_n`.
+        values (dict): Partition column -> value, e.g. {"Category Group": "CLOTHING"}.
+
+    Returns:
+        pd.DataFrame: The partition's rows in rank order, without the partition columns.
+    """
+    mask = np.ones(len(board), dtype=bool)
+    for col, value in values.items():
+        mask &= (board[col] == value).to_numpy()
+    return board[mask].drop(columns=list(values)).reset_index(drop=True)
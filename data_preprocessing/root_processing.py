@@ -1,32 +1,44 @@
-import sqlite3
 import pandas as pd
 import logging
+from data_preprocessing import date_utils, debug_export
+from data_preprocessing.lazy_datasets import LazyDatasets
+from data_preprocessing.sales_cube import SalesCube
+from database import db_partitions, db_queries
+from database.db_connection import read_connection
+from database.db_schema import SQL_DATETIME_FORMAT
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 DB_FILE = "data_app.db"  # Path to your SQLite database
 
+# Statistics shown on the overview pages
+ROOT_STATS = ["total_orders", "total_revenue_sold", "total_revenue_quotation", "avg_order_value", "top_selling_product"]
+
+# Date columns parsed once, right after the merge (see `add_date_columns`)
+DATE_COLUMNS = ["Sales Date", "Delivery Date"]
+
+# First day of the "Sales Week" periods
+SALES_WEEK_ANCHOR = date_utils.DEFAULT_WEEK_ANCHOR
+
 def query_db(query, params=None):
     """
-    Execute a query on the database and return the results as a list of dictionaries.
+    Execute a query on a pooled read-only connection.
     
     Args:
         query (str): The SQL query to be executed.
         params (tuple): Optional parameters to bind to the query.
         
     Returns:
-        list: A list of rows from the database, each row as a dictionary.
+        tuple: The result rows as plain tuples and the list of column names.
     """
     try:
-        conn = sqlite3.connect(DB_FILE)
-        conn.row_factory = sqlite3.Row  # Return rows as dictionaries
-        cursor = conn.cursor()
-        cursor.execute(query, params or [])
-        results = cursor.fetchall()
-        # Extract column names from the cursor description
-        columns = [col[0] for col in cursor.description]
-        conn.close()
+        with read_connection(DB_FILE) as conn:
+            cursor = conn.execute(query, params or [])
+            results = cursor.fetchall()
+            # Extract column names from the cursor description
+            columns = [col[0] for col in cursor.description]
+            cursor.close()
         
         # Return results with correct column names
         return results, columns
@@ -35,29 +47,34 @@ def query_db(query, params=None):
         raise
 
 # Home page Content
-def merge_master_sku():
+def merge_master_sku(start_date=None, end_date=None):
     """
     Merge `sale_order_line` with `master_sku` using an SQL LEFT JOIN.
     Fetches sale order data and related master SKU details like SPSU25 Status, Category Group, and SKU Parent.
+    Order lines are fetched with their integer dimension keys and the labels are
+    rehydrated afterwards (see `db_queries.rehydrate_labels`). Each line carries its
+    channel (Faire, or its sales team) as a category and whether it is a Surf Expo order.
+
+    Order lines are read from the month-partitioned dataset of the live data version;
+    a date range only opens the months it overlaps (see `db_partitions.read_order_lines`).
+
+    Args:
+        start_date (str, optional): First sales day (YYYY-MM-DD).
+        end_date (str, optional): Last sales day (YYYY-MM-DD).
 
     Returns:
         pd.DataFrame: A DataFrame with merged data from sale_order_line and master_sku.
     """
-    query = """
-    SELECT 
-        sale_order_line.*, 
-        master_sku.spsu25_status, 
-        master_sku.category_group, 
-        master_sku.sku_parent,
-        master_sku.category
-    FROM sale_order_line
-    LEFT JOIN master_sku 
-        ON sale_order_line.sku = master_sku.sku;
-    """
-    merged_data, columns = query_db(query)
-    merged_data_df = pd.DataFrame(merged_data, columns=columns)
-
-    return merged_data_df
+    try:
+        order_lines = db_partitions.read_order_lines(start_date, end_date, db_file=DB_FILE)
+        merged_data = db_queries.rehydrate_labels(order_lines, db_file=DB_FILE)
+        # Channel filters downstream compare category codes instead of strings
+        merged_data["channel"] = merged_data["channel"].astype("category")
+        merged_data["surf_expo"] = merged_data["surf_expo"].astype(bool)
+        return merged_data
+    except Exception as e:
+        logger.error(f"Failed to execute query: {e}")
+        raise
 
 
 def rename_columns(merged_data_df):
@@ -99,121 +116,87 @@ def rename_columns(merged_data_df):
         "category": "Category",
         "sku_parent": "SKU (Parent)",
         "sales_date": "Sales Date",
+        "channel": "Channel",
+        "surf_expo": "Surf Expo",
     }, inplace=True)
 
     return merged_data_df
 
 
-def compute_statistics(merged_data):
+def add_date_columns(merged_data, date_format=SQL_DATETIME_FORMAT):
     """
-    Compute key statistics from the merged DataFrame.
+    Parse the date columns once with the explicit SQLite format and derive the period
+    columns the processing modules group by, so no module re-parses dates.
+
+    Adds:
+        - "Sales Week": start of the week of the sale (see `SALES_WEEK_ANCHOR`).
+        - "Delivery Month": first day of the month of the delivery date.
+
+    Periods are bucketed with datetime64 arithmetic (see `date_utils`).
 
     Args:
-        merged_data (pd.DataFrame): The merged data to compute statistics from.
+        merged_data (pd.DataFrame): The merged data with renamed columns.
+        date_format (str): Format of the date strings, defaults to the SQLite storage format.
 
     Returns:
-        dict: A dictionary with computed statistics.
+        pd.DataFrame: The DataFrame with typed date and period columns.
     """
-    stats = {}
+    for col in DATE_COLUMNS:
+        if col in merged_data.columns and not pd.api.types.is_datetime64_any_dtype(merged_data[col]):
+            merged_data[col] = pd.to_datetime(merged_data[col], format=date_format, errors="coerce")
+
+    merged_data["Sales Week"] = date_utils.week_start(merged_data["Sales Date"], SALES_WEEK_ANCHOR)
+    merged_data["Delivery Month"] = date_utils.month_start(merged_data["Delivery Date"])
 
-    # 1. Total orders: Count of unique "Order Reference"
-    stats["total_orders"] = merged_data["Order Reference"].nunique()
+    return merged_data
+
+
+def compute_statistics():
+    """
+    Compute key statistics over all order lines from the SQLite summary tables.
 
-    # 2. Total revenue for 'sale' orders
-    stats["total_revenue_sold"] = merged_data[merged_data["Order Status"] == "sale"]["Subtotal"].sum()
+    Returns:
+        dict: total_orders, total_revenue_sold, total_revenue_quotation,
+            avg_order_value and top_selling_product.
+    """
+    return summarize_kpis(db_queries.fetch_kpis(db_file=DB_FILE))
 
-    # 3. Total revenue for 'draft' orders (quotations)
-    stats["total_revenue_quotation"] = merged_data[merged_data["Order Status"] == "draft"]["Subtotal"].sum()
 
-    # 4. Average order value (for 'sale' orders)
-    avg_order_value = merged_data[merged_data["Order Status"] == "sale"].groupby("Order Reference")["Subtotal"].sum().mean()
-    stats["avg_order_value"] = avg_order_value
+def summarize_kpis(kpis):
+    """
+    Select the overview statistics from headline KPIs.
 
-    # 5. Top-selling product (by quantity)
-    top_selling_product = merged_data.groupby("SKU")["Quantity"].sum().idxmax()
-    stats["top_selling_product"] = top_selling_product
+    Args:
+        kpis (dict): KPIs from `db_queries.fetch_kpis` or `SalesCube.kpis`.
 
-    return stats
+    Returns:
+        dict: The `ROOT_STATS` keys.
+    """
+    return {key: kpis[key] for key in ROOT_STATS}
 
 
-def compute_sales_team_revenue_by_week(merged_data):
+def compute_sales_team_revenue_by_week():
     """
     Returns a DataFrame of *weekly* total revenue (Subtotal) by Sales Team,
-    excluding draft/quotation logic, ensuring Faire & Wholesale orders don't overlap.
-    
-    Columns returned: ["Sales Week", "Sales Team", "Subtotal"].
-      - "Sales Week" is the start-of-week date (Sunday-based by default).
+    excluding draft/quotation logic. Each order counts towards a single channel,
+    so Faire orders are not also counted under their sales team.
+    Website orders are left out. Other granularities are available from
+    `db_queries.fetch_revenue_by_channel`.
+
+    Returns:
+        pd.DataFrame: Columns ["Sales Week", "Sales Team", "Subtotal"].
+            "Sales Week" is the Monday starting the week.
     """
-    # --- 1) Load Faire references, identify overlap ---
-    faire_orders = pd.read_csv("./data/f-sales-orders.csv")
-    faire_orders = faire_orders.rename(columns=lambda x: x.strip())
-    faire_refs = set(faire_orders["Order Reference"].unique())
-
-    # --- 2) Separate out Faire (sale only) ---
-    faire_data = merged_data[
-        (merged_data["Order Reference"].isin(faire_refs)) &
-        (merged_data["Order Status"] == "sale")
-    ]
-    faire_grouped = faire_data.groupby("Sales Date", as_index=False)["Subtotal"].sum()
-    faire_grouped["Sales Team"] = "Faire"
-
-    # --- 3) Wholesale (exclude Faire overlap) ---
-    wholesale_data = merged_data[
-        (merged_data["Sales Team"] == "Wholesale") &
-        (~merged_data["Order Reference"].isin(faire_refs)) &
-        (merged_data["Order Status"] == "sale")
-    ]
-    wholesale_grouped = wholesale_data.groupby("Sales Date", as_index=False)["Subtotal"].sum()
-    wholesale_grouped["Sales Team"] = "Wholesale"
-
-    # --- 4) All other teams (excluding Website, Wholesale, Faire) ---
-    all_teams = merged_data["Sales Team"].dropna().unique()
-    other_teams = [t for t in all_teams if t not in ["Website", "Wholesale", "Faire"]]
-
-    df_list = [faire_grouped, wholesale_grouped]
-
-    for team in other_teams:
-        team_data = merged_data[
-            (merged_data["Sales Team"] == team) &
-            (merged_data["Order Status"] == "sale")
-        ]
-        grouped = team_data.groupby("Sales Date", as_index=False)["Subtotal"].sum()
-        grouped["Sales Team"] = team
-        df_list.append(grouped)
-
-    # Combine all channels into a single DataFrame
-    channel_stats_dates = pd.concat(df_list, ignore_index=True)
-
-    # Convert Sales Date to proper datetime
-    channel_stats_dates["Sales Date"] = pd.to_datetime(channel_stats_dates["Sales Date"], errors="coerce")
-
-    # --- 5) Filter out future dates (past "today") ---
-    today = pd.to_datetime("today").normalize()
-    channel_stats_dates = channel_stats_dates[channel_stats_dates["Sales Date"] <= today]
-
-    # --- 6) Convert daily dates to weekly buckets ---
-    #    (Sunday-based by default, but you can customize with "W-MON" if needed)
-    channel_stats_dates["Sales Week"] = channel_stats_dates["Sales Date"].dt.to_period("W")
-    channel_stats_dates["Sales Week"] = channel_stats_dates["Sales Week"].apply(lambda r: r.start_time)
-
-    # --- 7) Group by (Sales Week, Sales Team), summing Subtotal ---
-    weekly_revenue = (
-        channel_stats_dates
-        .groupby(["Sales Week", "Sales Team"], as_index=False)["Subtotal"]
-        .sum()
-    )
-
-    return weekly_revenue
+    return db_queries.fetch_weekly_revenue_by_team(db_file=DB_FILE)
 
 
 
 ### - Overview pages
-def channel_comparison(merged_data):
+def channel_comparison():
     """
     Create DataFrames for the top 10 parent SKUs and top 10 collections for eCommerce, Wholesale, and Faire channels.
-
-    Args:
-        merged_data (pd.DataFrame): The merged data containing all sales data.
+    The aggregation runs in SQL, one query per dimension for all channels; only the
+    top rows are fetched.
 
     Returns:
         dict: A dictionary containing six DataFrames:
@@ -224,118 +207,71 @@ def channel_comparison(merged_data):
             - 'wholesale_top_collections': Top 10 collections for Wholesale
             - 'faire_top_collections': Top 10 collections for Faire
     """
-    
+    channels = ["ecom", "wholesale", "faire"]
+    # Top 10 parent SKUs and top 10 collections of every channel
+    top_parents = db_queries.fetch_top_n(channels, "sku_parent", n=10, db_file=DB_FILE)
+    top_collections = db_queries.fetch_top_n(channels, "collection", n=10, db_file=DB_FILE)
 
-    # Filter data by Sales Team
-    ecom_data = merged_data[merged_data["Sales Team"] == "Shopify"]
-    wholesale_data = merged_data[merged_data["Sales Team"] == "Wholesale"]
+    comparison = {}
+    for channel in channels:
+        comparison[f"{channel}_top_10"] = top_parents[channel]
+        comparison[f"{channel}_top_collections"] = top_collections[channel]
+    return comparison
 
-    # Faire is herry- Rigged a bit
-    faire_orders = pd.read_csv('./data/f-sales-orders.csv')
-    faire_orders = faire_orders.rename(columns=lambda x: x.strip())  # Strip whitespace from columns
-    faire_order_references = faire_orders["Order Reference"].unique()  # List of relevant order references
-    faire_data = merged_data[merged_data["Order Reference"].isin(faire_order_references)]
-    
 
-    # Top 10 parent SKUs for each channel
-    ecom_top_10 = (
-        ecom_data.groupby("SKU (Parent)")
-        .agg({"Quantity": "sum", "Subtotal": "sum"})
-        .sort_values(by="Subtotal", ascending=False)
-        .head(10)
-        .reset_index()
-    )
-
-    wholesale_top_10 = (
-        wholesale_data.groupby("SKU (Parent)")
-        .agg({"Quantity": "sum", "Subtotal": "sum"})
-        .sort_values(by="Subtotal", ascending=False)
-        .head(10)
-        .reset_index()
-    )
-
-    faire_top_10 = (
-        faire_data.groupby("SKU (Parent)")
-        .agg({"Quantity": "sum", "Subtotal": "sum"})
-        .sort_values(by="Subtotal", ascending=False)
-        .head(10)
-        .reset_index()
-    )
-
-    # Top 10 collections for each channel
-    ecom_top_collections = (
-        ecom_data.groupby("Collection")
-        .agg({"Quantity": "sum", "Subtotal": "sum"})
-        .sort_values(by="Subtotal", ascending=False)
-        .head(10)
-        .reset_index()
-    )
-
-    wholesale_top_collections = (
-        wholesale_data.groupby("Collection")
-        .agg({"Quantity": "sum", "Subtotal": "sum"})
-        .sort_values(by="Subtotal", ascending=False)
-        .head(10)
-        .reset_index()
-    )
-
-    faire_top_collections = (
-        faire_data.groupby("Collection")
-        .agg({"Quantity": "sum", "Subtotal": "sum"})
-        .sort_values(by="Subtotal", ascending=False)
-        .head(10)
-        .reset_index()
-    )
-
-    return {
-        # Top 10 parent SKUs
-        "ecom_top_10": ecom_top_10,
-        "wholesale_top_10": wholesale_top_10,
-        "faire_top_10": faire_top_10,
-        # Top 10 collections
-        "ecom_top_collections": ecom_top_collections,
-        "wholesale_top_collections": wholesale_top_collections,
-        "faire_top_collections": faire_top_collections,
-    }
 
+def load_merged_data(start_date=None, end_date=None):
+    """
+    Merge the order lines with master_sku and prepare them for every module.
 
+    Args:
+        start_date (str, optional): First sales day (YYYY-MM-DD) of the merged data.
+        end_date (str, optional): Last sales day (YYYY-MM-DD) of the merged data.
 
-# - Main processing loop
-def process_root_data():
-    """
-    Load, process, and compute statistics. This function merges data and calculates the required statistics.
-    
     Returns:
-        dict: A dictionary containing the computed statistics, merged data, and channel comparisons.
+        pd.DataFrame: Merged order lines with app column names and parsed dates.
     """
     try:
         # 1. Merge sale_order_line with master_sku
-        merged_data = merge_master_sku()
+        merged_data = merge_master_sku(start_date, end_date)
 
         # 2. Rename columns for consistency
         merged_data = rename_columns(merged_data)
 
-        merged_data.to_csv("./data/merged_data_inspection.csv", index=False)
-        print("Loaded wholesale data from CSV for testing.")
+        # 3. Parse dates and derive period columns once for every module
+        merged_data = add_date_columns(merged_data)
 
-        # 3. Compute statistics based on the merged data
-        stats = compute_statistics(merged_data)
-
-        # 4. Generate channel comparison DataFrames
-        channel_comparison_data = channel_comparison(merged_data)
-
-        channel_stats_weeks = compute_sales_team_revenue_by_week(merged_data)
-
-        # 5. Return a dictionary containing the statistics, merged data, and channel comparison data
-        return {
-            "stats": stats,
-            "merged_data": merged_data,
-            "channel_comparison": channel_comparison_data,
-            "channel_stats_weeks": channel_stats_weeks,
-        }
+        debug_export.export_frame("merged_data_inspection", merged_data)
+        return merged_data
 
     except Exception as e:
         logger.error(f"Error processing data: {e}")
         raise
 
 
+# - Main processing loop
+def process_root_data(start_date=None, end_date=None):
+    """
+    Declare the root datasets: statistics, merged data, sales cube, channel
+    comparisons and weekly revenue. Each is computed on first access and memoized
+    for the current data version (see `LazyDatasets`).
+
+    Args:
+        start_date (str, optional): First sales day (YYYY-MM-DD) of the merged data.
+        end_date (str, optional): Last sales day (YYYY-MM-DD) of the merged data.
+    
+    Returns:
+        LazyDatasets: The statistics, merged data, sales cube, and channel comparisons.
+    """
+    root_data = LazyDatasets("root", {
+        # Statistics, channel comparisons and weekly revenue come from SQL
+        "stats": compute_statistics,
+        "merged_data": lambda: load_merged_data(start_date, end_date),
+        # Daily-grain aggregate the pages roll up instead of scanning the order lines
+        "cube": lambda: SalesCube.build(root_data["merged_data"]),
+        "channel_comparison": channel_comparison,
+        "channel_stats_weeks": compute_sales_team_revenue_by_week,
+    })
+    return root_data
+
+
@@ -0,0 +1,257 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from data_preprocessing import date_utils
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Daily-grain aggregates (cuboids) materialized from the merged order lines and
+# the dimensions each one keeps. Splitting product and customer dimensions keeps
+# both sparse: their cross product would have almost one cell per order line.
+# The order cuboid has one cell per order and day, like the order_totals table,
+# for exact order counts and average order values.
+CUBOIDS = {
+    "product": [
+        "Sales Day", "Channel", "Sales Team", "Order Status",
+        "SKU", "SKU (Parent)", "Collection", "Category Group", "SPSU25 Status", "Fabric SKU",
+    ],
+    "customer": [
+        "Sales Day", "Channel", "Sales Team", "Order Status",
+        "Salesperson", "Customer", "State",
+    ],
+    "order": [
+        "Sales Day", "Channel", "Sales Team", "Order Status", "Order Reference",
+    ],
+}
+
+# Additive measures of every cell, and the merged column each one sums
+# ("Lines" counts order lines)
+MEASURES = {
+    "Quantity": "Quantity",
+    "Subtotal": "Subtotal",
+    "Total Cost": "Total Cost",
+    "Lines": None,
+}
+
+# Dimensions of the product mix shown on the home pages
+PRODUCT_MIX = ["Category Group", "SKU (Parent)", "SKU", "Fabric SKU", "SPSU25 Status"]
+PRODUCT_MIX_MEASURES = ["Quantity", "Subtotal", "Lines"]
+
+# Date-sliced views kept per cube for the most recently requested ranges
+DATE_VIEW_CACHE_SIZE = 32
+
+
+class SalesCube:
+    """
+    Sparse daily-grain aggregate of the merged order lines with a small roll-up
+    and slice API, so pages aggregate cube cells instead of order lines.
+
+    A cube holds one DataFrame per cuboid of `CUBOIDS`, with the cuboid's
+    dimensions as columns followed by the `MEASURES`. Missing dimension values
+    are kept as NaN.
+    Cells are sorted by sales day, undated cells last, so a range of days is a
+    contiguous block of rows found by binary search.
+    """
+
+    def __init__(self, cuboids):
+        self.cuboids = cuboids
+        self._date_views = OrderedDict()
+        self._date_views_lock = threading.Lock()
+
+    @classmethod
+    def build(cls, merged_data):
+        """
+        Materialize the cube from the merged order lines.
+
+        Args:
+            merged_data (pd.DataFrame): Merged order lines with app column names and parsed dates.
+
+        Returns:
+            SalesCube: The cube.
+        """
+        start = time.perf_counter()
+        lines = merged_data.assign(**{"Sales Day": date_utils.period_start(merged_data["Sales Date"], "day")})
+
+        aggregations = {
+            measure: (column, "sum") if column else ("Sales Day", "size")
+            for measure, column in MEASURES.items()
+        }
+        cuboids = {}
+        for name, dimensions in CUBOIDS.items():
+            cuboids[name] = (
+                lines.groupby(dimensions, observed=True, dropna=False, sort=False)
+                .agg(**aggregations)
+                .reset_index()
+                .sort_values("Sales Day", kind="stable", na_position="last", ignore_index=True)
+            )
+
+        sizes = ", ".join(f"{name} {len(cells)}" for name, cells in cuboids.items())
+        logger.info(
+            f"Built sales cube from {len(merged_data)} order lines ({sizes} cells) "
+            f"in {time.perf_counter() - start:.2f}s."
+        )
+        return cls(cuboids)
+
+    def between(self, start_date=None, end_date=None):
+        """
+        Restrict the cube to a range of sales days.
+
+        The bounds of each cuboid are found with `searchsorted` on its sorted
+        sales days, and the views of recent ranges are cached on the cube.
+
+        Args:
+            start_date (str): First sales day (YYYY-MM-DD), unbounded if None.
+            end_date (str): Last sales day (YYYY-MM-DD), unbounded if None.
+
+        Returns:
+            SalesCube: A cube with the cells of the range; undated cells are left
+                out unless both bounds are None.
+        """
+        if not start_date and not end_date:
+            return self
+
+        key = (start_date, end_date)
+        with self._date_views_lock:
+            if key in self._date_views:
+                self._date_views.move_to_end(key)
+                return self._date_views[key]
+
+        cuboids = {}
+        for name, cells in self.cuboids.items():
+            days = cells["Sales Day"].to_numpy()
+            first = np.searchsorted(days, np.datetime64(pd.Timestamp(start_date)), side="left") if start_date else 0
+            # Undated cells sort last, after every bound
+            stop = np.searchsorted(
+                days, np.datetime64(pd.Timestamp(end_date)) if end_date else np.datetime64("NaT"),
+                side="right" if end_date else "left",
+            )
+            cuboids[name] = cells.iloc[first:stop]
+        view = SalesCube(cuboids)
+
+        with self._date_views_lock:
+            self._date_views[key] = view
+            if len(self._date_views) > DATE_VIEW_CACHE_SIZE:
+                self._date_views.popitem(last=False)
+        return view
+
+    def slice(self, where=None, start_date=None, end_date=None):
+        """
+        Restrict the cube to dimension values and a range of sales days.
+
+        Args:
+            where (dict): Dimension -> value, or list of values, to keep.
+            start_date (str): First sales day (YYYY-MM-DD), unbounded if None.
+            end_date (str): Last sales day (YYYY-MM-DD), unbounded if None.
+
+        Returns:
+            SalesCube: A cube with the cuboids that have every filtered dimension.
+        """
+        cube = self.between(start_date, end_date)
+        if not where:
+            return cube
+
+        cuboids = {}
+        for name, cells in cube.cuboids.items():
+            if not set(where) <= set(cells.columns):
+                continue
+            mask = pd.Series(True, index=cells.index)
+            for dimension, values in where.items():
+                if isinstance(values, (list, tuple, set)):
+                    mask &= cells[dimension].isin(values)
+                else:
+                    mask &= cells[dimension] == values
+            cuboids[name] = cells[mask]
+        return SalesCube(cuboids)
+
+    def rollup(self, by, measures=("Quantity", "Subtotal"), where=None, start_date=None, end_date=None,
+               dropna=True):
+        """
+        Aggregate the cube along some dimensions, from the smallest cuboid that has them.
+
+        Args:
+            by (list): Dimensions to keep; an empty list rolls everything up into one row.
+            measures (iterable): Measures to return, from `MEASURES`.
+            where (dict): Filters applied first, see `slice`.
+            start_date (str): First sales day (YYYY-MM-DD), unbounded if None.
+            end_date (str): Last sales day (YYYY-MM-DD), unbounded if None.
+            dropna (bool): Drop groups with a missing dimension value, as `groupby` does.
+
+        Returns:
+            pd.DataFrame: Columns `by` followed by `measures`.
+
+        Raises:
+            ValueError: If no cuboid has all the dimensions and measures.
+        """
+        by, measures = list(by), list(measures)
+        cube = self.slice(where, start_date, end_date) if where or start_date or end_date else self
+        candidates = [
+            cells for cells in cube.cuboids.values()
+            if set(by + measures) <= set(cells.columns)
+        ]
+        if not candidates:
+            raise ValueError(f"No cuboid has dimensions {by} and measures {measures}.")
+        cells = min(candidates, key=len)
+
+        if not by:
+            return cells[measures].sum().to_frame().T
+        return cells.groupby(by, observed=True, dropna=dropna)[measures].sum().reset_index()
+
+    def distribution(self, dimension, measure="Lines", where=None, start_date=None, end_date=None):
+        """
+        Return the share of a measure taken by each value of a dimension, like
+        `value_counts(normalize=True)` over the order lines for "Lines".
+
+        Args:
+            dimension (str): Dimension to split by; missing values are left out.
+            measure (str): Measure to share out.
+            where (dict): Filters applied first, see `slice`.
+            start_date (str): First sales day (YYYY-MM-DD), unbounded if None.
+            end_date (str): Last sales day (YYYY-MM-DD), unbounded if None.
+
+        Returns:
+            pd.DataFrame: Columns [dimension, "proportion"], largest share first.
+        """
+        totals = self.rollup([dimension], [measure], where, start_date, end_date).set_index(dimension)[measure]
+        totals = totals.sort_values(ascending=False, kind="stable")
+        return (totals / totals.sum()).rename("proportion").reset_index()
+
+    def kpis(self, where=None, start_date=None, end_date=None):
+        """
+        Compute the headline KPIs of `db_queries.fetch_kpis` from the cube.
+
+        Args:
+            where (dict): Filters applied first, see `slice`.
+            start_date (str): First sales day (YYYY-MM-DD), unbounded if None.
+            end_date (str): Last sales day (YYYY-MM-DD), unbounded if None.
+
+        Returns:
+            dict: The keys of `db_queries.fetch_kpis`. Averages are NaN without
+                matching orders.
+        """
+        cube = self.slice(where, start_date, end_date)
+        orders = cube.rollup(["Order Reference", "Order Status"], ["Subtotal", "Lines"], dropna=False)
+        orders = orders[orders["Order Reference"].notna()]
+        sold = orders[orders["Order Status"] == "sale"]
+        quotation = orders[orders["Order Status"] == "draft"]
+        skus = cube.rollup(["SKU"], ["Quantity"])
+
+        return {
+            "total_orders": orders["Order Reference"].nunique(),
+            "total_orders_sold": sold["Order Reference"].nunique(),
+            "total_orders_quotation": quotation["Order Reference"].nunique(),
+            "total_revenue": float(orders["Subtotal"].sum()),
+            "total_revenue_sold": float(sold["Subtotal"].sum()),
+            "total_revenue_quotation": float(quotation["Subtotal"].sum()),
+            "avg_order_value": sold.groupby("Order Reference")["Subtotal"].sum().mean(),
+            "avg_order_value_all": orders.groupby("Order Reference")["Subtotal"].sum().mean(),
+            # Ties go to the first SKU, as in SQL
+            "top_selling_product": skus.loc[skus["Quantity"].idxmax(), "SKU"] if not skus.empty else None,
+            "lines": int(orders["Lines"].sum()),
+        }
+
+    def __len__(self):
+        return sum(len(cells) for cells in self.cuboids.values())
@@ -3,26 +3,21 @@ from flask import current_app
 
 
 # Function to filter wholesale-specific sales
-def filter_se_data(merged_data, expo_orders):
+def filter_se_data(merged_data):
     """
     Filter sale_order_line data for Surf Expo orders.
 
     Args:
         merged_data (pd.DataFrame): The complete wholesale sale_order_line data.
-        expo_orders (pd.DataFrame): The list of Surf Expo order references.
 
     Returns:
         pd.DataFrame: Filtered sale_order_line data specific to Surf Expo.
     """
-    if merged_data.empty or expo_orders.empty:
+    if merged_data.empty:
         return pd.DataFrame()
 
-    # Ensure the column names align
-    expo_orders = expo_orders.rename(columns=lambda x: x.strip())  # Strip whitespace from columns
-    expo_order_references = expo_orders["Order Reference"].unique()  # List of relevant order references
-
-    # Filter merged_data for these orders
-    filtered = merged_data[merged_data["Order Reference"].isin(expo_order_references)]
+    # Surf Expo orders are flagged at merge time from the Surf Expo order list
+    filtered = merged_data[merged_data["Surf Expo"]]
 
     return filtered
 
@@ -351,11 +346,11 @@ def process_surf_recap():
     """
     Process and summarize Surf Expo sales recap data.
     """
-    # Retrieve wholesale data and Surf Expo order list
-    wholesale_data = current_app.config.get('wholesale_merged_data')
-    expo_orders = pd.read_csv('./data/se-sales-orders.csv')
+    # Retrieve wholesale data
+    wholesale = current_app.config.get('wholesale_data')
+    wholesale_data = wholesale['merged_data'] if wholesale else None
 
-    if wholesale_data is None or expo_orders.empty:
+    if wholesale_data is None:
         return {
             "stats": {},
             "top_items": pd.DataFrame(),
@@ -367,7 +362,7 @@ def process_surf_recap():
         }
 
     # Filter wholesale data for Surf Expo
-    filtered_so_line = filter_se_data(wholesale_data, expo_orders)
+    filtered_so_line = filter_se_data(wholesale_data)
 
     # Compute statistics
     stats = compute_statistics(filtered_so_line)
@@ -1,5 +1,9 @@
 import pandas as pd
 from flask import current_app
+from data_preprocessing.root_processing import add_date_columns
+from data_preprocessing import debug_export
+from data_preprocessing.lazy_datasets import LazyDatasets, derive
+from database import db_queries
 
 # Function to filter wholesale-specific sales
 def filter_wholesale_data(merged_data):
@@ -82,6 +86,38 @@ def compute_statistics(filtered_sale_order_line):
     }
 
 
+# Function to compute statistics from the SQLite summary tables
+def compute_summary_statistics():
+    """
+    Compute the same statistics as `compute_statistics` from the SQLite summary
+    tables, without scanning the wholesale order lines.
+
+    Returns:
+        dict: Dictionary of computed statistics.
+    """
+    return summarize_kpis(db_queries.fetch_kpis(team="Wholesale"))
+
+
+def summarize_kpis(kpis):
+    """
+    Select the wholesale statistics from headline KPIs.
+
+    Args:
+        kpis (dict): Wholesale KPIs from `db_queries.fetch_kpis` or `SalesCube.kpis`.
+
+    Returns:
+        dict: Dictionary of computed statistics, as `compute_statistics` returns.
+    """
+    if not kpis["lines"]:
+        return compute_statistics(pd.DataFrame())
+
+    keys = [
+        "total_orders_sold", "total_orders_quotation", "total_revenue_sold",
+        "total_revenue_quotation", "avg_order_value", "top_selling_product",
+    ]
+    return {key: kpis[key] for key in keys}
+
+
 def compute_delivery_quantity_distribution(filtered_data):
     """
     Compute the distribution of delivery quantities (date-only) from the filtered DataFrame,
@@ -99,15 +135,10 @@ def compute_delivery_quantity_distribution(filtered_data):
         if col not in filtered_data.columns:
             raise KeyError(f"'{col}' column is missing from the filtered data.")
     
-    # Parse the Delivery Date column to datetime, forcing errors to NaT
-    filtered_data = filtered_data.copy()
-    filtered_data["Delivery Date"] = pd.to_datetime(filtered_data["Delivery Date"], errors="coerce")
-
-    # Drop rows with invalid delivery dates
-    filtered_data = filtered_data.dropna(subset=["Delivery Date"])
-
-    # Remove the time part, keeping only the date
-    filtered_data["Delivery Date"] = filtered_data["Delivery Date"].dt.date
+    # Delivery dates are parsed at ingest; drop rows without one and keep only the date
+    filtered_data = filtered_data.dropna(subset=["Delivery Date"]).assign(
+        **{"Delivery Date": lambda df: df["Delivery Date"].dt.normalize()}
+    )
 
     # Map order statuses to Quotation vs. Sales
     filtered_data["Order Type"] = filtered_data["Order Status"].apply(
@@ -137,16 +168,13 @@ def compute_monthly_demand(filtered_data):
     Returns:
         dict: Two DataFrames: one for Clothing and one for Jewelry.
     """
-    required_columns = ["Delivery Date", "Quantity", "SKU (Parent)", "Category Group"]
+    required_columns = ["Delivery Date", "Delivery Month", "Quantity", "SKU (Parent)", "Category Group"]
     for col in required_columns:
         if col not in filtered_data.columns:
             raise KeyError(f"'{col}' column is missing from the filtered data.")
     
-    # Parse the Delivery Date column to datetime and extract the month
-    filtered_data = filtered_data.copy()
-    filtered_data["Delivery Date"] = pd.to_datetime(filtered_data["Delivery Date"], errors="coerce")
-    filtered_data = filtered_data.dropna(subset=["Delivery Date"])
-    filtered_data["Month"] = filtered_data["Delivery Date"].dt.to_period("M").astype(str)
+    # Delivery dates and months are derived at ingest; drop rows without a delivery date
+    filtered_data = filtered_data.dropna(subset=["Delivery Date"]).rename(columns={"Delivery Month": "Month"})
 
     # Group by Month, Parent SKU, and Category Group
     grouped_data = (
@@ -154,6 +182,7 @@ def compute_monthly_demand(filtered_data):
         .sum()
         .reset_index()
     )
+    grouped_data["Month"] = grouped_data["Month"].dt.strftime("%Y-%m")
 
     # Separate the data into Clothing and Jewelry
     clothing_data = grouped_data[grouped_data["Category Group"] == "CLOTHING"]
@@ -196,11 +225,8 @@ def compute_rep_monthly_summary(filtered_data):
             raise KeyError(f"'{col}' column is missing from the filtered data.")
     """
     
-    # Parse the Delivery Date column to datetime and extract the month
-    filtered_data = filtered_data.copy()
-    filtered_data["Delivery Date"] = pd.to_datetime(filtered_data["Delivery Date"], errors="coerce")
-    filtered_data = filtered_data.dropna(subset=["Delivery Date"])
-    filtered_data["Month"] = filtered_data["Delivery Date"].dt.to_period("M").astype(str)
+    # Delivery dates and months are derived at ingest; drop rows without a delivery date
+    filtered_data = filtered_data.dropna(subset=["Delivery Date"]).rename(columns={"Delivery Month": "Month"})
 
     # Separate data into quotations and sales
     filtered_data["Type"] = filtered_data["Order Status"].apply(
@@ -213,6 +239,7 @@ def compute_rep_monthly_summary(filtered_data):
         .sum()
         .reset_index()
     )
+    grouped_data["Month"] = grouped_data["Month"].dt.strftime("%Y-%m")
 
     # Pivot the data to create separate columns for Quotation and Revenue
     pivot_table = grouped_data.pivot_table(
@@ -362,118 +389,84 @@ def compute_geospatial_data(filtered_data):
     return geospatial_data
 
 
-# Updated main function to process wholesale data with testing mode
-def process_wholesale_data(testing=False):
+# Compute customer segments with the ML script
+def compute_customer_segmentation_data(wholesale_data):
     """
-    Process wholesale-specific data, compute statistics, and return DataFrames and stats.
-    Supports testing mode to load data directly from CSV.
+    Compute customer segments from the wholesale data.
 
     Args:
-        testing (bool): If True, loads data from `wholesale_data_inspection.csv`.
+        wholesale_data (pd.DataFrame): The filtered wholesale data.
 
     Returns:
-        dict: Dictionary containing statistics, processed DataFrames, and additional processed data.
+        pd.DataFrame: Customer segmentation data.
     """
-    if testing:
-        try:
-            # Load wholesale data from CSV
-            wholesale_data = pd.read_csv("./data/wholesale_data_inspection.csv")
-            print("Loaded wholesale data from CSV for testing.")
-        except FileNotFoundError:
-            raise FileNotFoundError("The wholesale_data_inspection.csv file is missing. Ensure it exists for testing.")
-    else:
-        # Access root data from Flask's config
-        root_data = current_app.config['root_data']
-        if not root_data:
-            raise ValueError("Root data not available in Flask config.")
-        
-        # Access the merged data
-        merged_data = root_data['merged_data']
-
-        # Filter for wholesale-specific sales
-        wholesale_data = filter_wholesale_data(merged_data)
+    from ml_scripts.customer_segmentation import compute_customer_segmentation
 
-        # Save the filtered wholesale data to a CSV file for inspection
-        try:
-            wholesale_data.to_csv("./data/wholesale_data_inspection.csv", index=False)
-            print("Wholesale data saved to wholesale_data_inspection.csv for inspection.")
-        except Exception as e:
-            print(f"Error saving wholesale data to CSV: {e}")
+    # Pass wholesale_data only when not in testing mode
+    return compute_customer_segmentation(wholesale_data=wholesale_data, testing=False)  # testing=False for production
 
-    # Compute statistics
-    stats = compute_statistics(wholesale_data)
 
-    # Compute delivery date distribution
-    try:
-        delivery_distribution = compute_delivery_quantity_distribution(wholesale_data)
-        delivery_distribution.to_csv("./data/delivery_date_distribution.csv", index=False)
-        print("Delivery date distribution saved to delivery_date_distribution.csv.")
-    except Exception as e:
-        print(f"Error computing delivery date distribution: {e}")
-        delivery_distribution = None
-
-    # Compute rep monthly summary
-    try:
-        rep_summary = compute_rep_monthly_summary(wholesale_data)
-        rep_summary.to_csv("./data/rep_monthly_summary.csv", index=False)
-        print("Rep monthly summary saved to rep_monthly_summary.csv.")
-    except Exception as e:
-        print(f"Error computing rep monthly summary: {e}")
-        rep_summary = None
+# Datasets derived from the wholesale lines: key -> (function, description, debug export name).
+# A failing computation yields None, which the pages handle.
+WHOLESALE_DATASETS = {
+    "delivery_distribution": (
+        compute_delivery_quantity_distribution, "delivery date distribution", "delivery_date_distribution"
+    ),
+    "rep_summary": (compute_rep_monthly_summary, "rep monthly summary", "rep_monthly_summary"),
+    "product_profit_analysis": (compute_product_profit_analysis, "product profit analysis", "product_profit_analysis"),
+    "customer_scatter_data": (compute_customer_scatter_data, "customer scatter data", "customer_scatter_data"),
+    "geospatial_data": (compute_geospatial_data, "geospatial data", "geospatial_data"),
+    "customer_segmentation_data": (
+        compute_customer_segmentation_data, "customer segmentation data", "customer_segmentation"
+    ),
+}
 
-    # Compute product profit analysis
-    try:
-        product_profit_analysis = compute_product_profit_analysis(wholesale_data)
-        product_profit_analysis.to_csv("./data/product_profit_analysis.csv", index=False)
-        print("Product profit analysis saved to product_profit_analysis.csv.")
-    except Exception as e:
-        print(f"Error computing product profit analysis: {e}")
-        product_profit_analysis = None
 
-    # Compute customer scatter plot data
-    try:
-        customer_scatter_data = compute_customer_scatter_data(wholesale_data)
-        customer_scatter_data.to_csv("./data/customer_scatter_data.csv", index=False)
-        print("Customer scatter data saved to customer_scatter_data.csv.")
-    except Exception as e:
-        print(f"Error computing customer scatter data: {e}")
-        customer_scatter_data = None
-
-    # Compute geospatial data
-    try:
-        geospatial_data = compute_geospatial_data(wholesale_data)
-        geospatial_data.to_csv("./data/geospatial_data.csv", index=False)
-        print("Geospatial data saved to geospatial_data.csv.")
-    except Exception as e:
-        print(f"Error computing geospatial data: {e}")
-        geospatial_data = None
-
-    try:
-        from ml_scripts.customer_segmentation import compute_customer_segmentation
-        
-        # Pass wholesale_data only when not in testing mode
-        customer_segmentation_data = compute_customer_segmentation(wholesale_data=wholesale_data, testing=False)  # testing=False for production
-        customer_segmentation_data.to_csv("./data/customer_segmentation.csv", index=False)
-        print("Customer segmentation data saved to customer_segmentation.csv.")
-    except Exception as e:
-        print(f"Error computing customer segmentation data: {e}")
-        customer_segmentation_data = None
+# Updated main function to process wholesale data with testing mode
+def process_wholesale_data(testing=False):
+    """
+    Declare the wholesale datasets: statistics, filtered lines, and the data of every
+    wholesale page. Each is computed on first access and memoized for the current
+    data version (see `LazyDatasets`).
+    Supports testing mode to load data directly from the inspection export.
 
+    Args:
+        testing (bool): If True, loads data from the `wholesale_data_inspection` export.
 
-    
+    Returns:
+        LazyDatasets: Statistics, processed DataFrames, and additional processed data.
+    """
+    if not testing:
+        # Access root data from Flask's config
+        root_data = current_app.config['root_data']
+        if not root_data:
+            raise ValueError("Root data not available in Flask config.")
 
-    return {
-        "stats": stats,
-        "merged_data": wholesale_data,
-        "filtered_sale_order_line": wholesale_data,
-        "delivery_distribution": delivery_distribution,
-        "rep_summary": rep_summary,
-        "product_profit_analysis": product_profit_analysis,
-        "customer_scatter_data": customer_scatter_data,
-        "geospatial_data": geospatial_data,
-        "customer_segmentation_data": customer_segmentation_data,
-    }
+    def load_wholesale_lines():
+        if testing:
+            try:
+                # Load wholesale data from the inspection export
+                wholesale_data = add_date_columns(debug_export.read_export("wholesale_data_inspection"))
+                print("Loaded wholesale data from the inspection export for testing.")
+                return wholesale_data
+            except FileNotFoundError:
+                raise FileNotFoundError("The wholesale_data_inspection export is missing. Ensure it exists for testing.")
 
+        # Filter for wholesale-specific sales
+        wholesale_data = filter_wholesale_data(root_data['merged_data'])
+
+        # Export the filtered wholesale data for inspection (opt-in, in the background)
+        debug_export.export_frame("wholesale_data_inspection", wholesale_data)
+        return wholesale_data
+
+    wholesale = LazyDatasets("wholesale", {
+        # Statistics come from the summary tables unless testing from the export
+        "stats": (lambda: compute_statistics(wholesale["merged_data"])) if testing else compute_summary_statistics,
+        "merged_data": load_wholesale_lines,
+        "filtered_sale_order_line": lambda: wholesale["merged_data"],
+        **{key: derive(lambda: wholesale["merged_data"], *spec) for key, spec in WHOLESALE_DATASETS.items()},
+    })
+    return wholesale
 
 
 if __name__ == "__main__":
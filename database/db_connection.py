@@ -0,0 +1,213 @@
+import sqlite3
+import logging
+import os
+import queue
+import threading
+from contextlib import contextmanager
+import pandas as pd
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Define the database file
+DB_FILE = "data_app.db"
+
+# PRAGMAs applied to every pooled read connection
+READ_PRAGMAS = {
+    "mmap_size": 268_435_456,   # Map up to 256 MB of the file instead of copying pages
+    "cache_size": -65_536,      # 64 MB page cache (negative values are KiB)
+    "temp_store": "MEMORY",
+    "query_only": "ON",
+}
+
+# Rows pulled per fetchmany round trip in `query_frame`
+FETCH_SIZE = 50_000
+
+# Most read connections kept open per database file, however many threads serve
+# requests; a query beyond that waits for a connection to be checked back in
+READ_POOL_SIZE = 8
+
+# Seconds a query waits for a free read connection before failing
+READ_POOL_TIMEOUT = 30
+
+# The read pool of each database file, for the file currently at that path
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class _ReadPool:
+    """
+    Bounded pool of read-only connections to one database file, identified by
+    its inode, mtime and size. Connections are opened on demand up to
+    `READ_POOL_SIZE` and reused by whichever thread checks them out next.
+    """
+
+    def __init__(self, db_file, identity, size=READ_POOL_SIZE):
+        self.db_file = db_file
+        self.identity = identity
+        self.size = size
+        self.retired = False
+        self._idle = queue.Queue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def checkout(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_open = self._opened < self.size
+            if can_open:
+                self._opened += 1
+        if can_open:
+            try:
+                return self._open()
+            except Exception:
+                with self._lock:
+                    self._opened -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=READ_POOL_TIMEOUT)
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                f"No read connection to '{self.db_file}' freed up within {READ_POOL_TIMEOUT}s."
+            ) from None
+
+    def checkin(self, conn):
+        if self.retired:
+            conn.close()
+        else:
+            self._idle.put(conn)
+
+    def retire(self):
+        """Close the idle connections; the checked-out ones are closed on check-in."""
+        self.retired = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def _open(self):
+        # The live file is only ever replaced by rename, so it can be opened as immutable.
+        # check_same_thread=False because connections move between request threads.
+        conn = sqlite3.connect(
+            f"file:{self.db_file}?mode=ro&immutable=1", uri=True, check_same_thread=False
+        )
+        for pragma, value in READ_PRAGMAS.items():
+            conn.execute(f"PRAGMA {pragma} = {value};")
+        logger.debug(f"Opened read connection {self._opened}/{self.size} to '{self.db_file}'.")
+        return conn
+
+
+@contextmanager
+def read_connection(db_file=DB_FILE):
+    """
+    Check a read-only connection to the database out of the pool for the duration
+    of a `with` block, opening and tuning it with `READ_PRAGMAS` if needed.
+
+    The live file is only ever replaced by rename, never written in place (see
+    `db_setup.rebuild_database`). Connections are opened as immutable, and the pool
+    is replaced as soon as the file at `db_file` is a different one.
+
+    Args:
+        db_file (str): Path to the SQLite database.
+
+    Yields:
+        sqlite3.Connection: The pooled connection; results must be consumed inside the block.
+    """
+    pool = _current_pool(db_file)
+    conn = pool.checkout()
+    try:
+        yield conn
+    finally:
+        pool.checkin(conn)
+
+
+def close_read_connections():
+    """
+    Close every pooled read connection. Queries transparently reopen on their next run.
+    """
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.retire()
+        _pools.clear()
+
+
+def data_version(db_file=DB_FILE):
+    """
+    Return the data version of the live database, bumped on every rebuild.
+
+    Args:
+        db_file (str): Path to the SQLite database.
+
+    Returns:
+        int: The data version.
+    """
+    with read_connection(db_file) as conn:
+        return conn.execute("PRAGMA user_version;").fetchone()[0]
+
+
+def _current_pool(db_file):
+    """Return the pool of the file currently at `db_file`, retiring the pool of a swapped-out file."""
+    identity = _file_identity(db_file)
+    with _pools_lock:
+        pool = _pools.get(db_file)
+        if pool is None or pool.identity != identity:
+            if pool is not None:
+                pool.retire()
+            pool = _pools[db_file] = _ReadPool(db_file, identity)
+        return pool
+
+
+def _file_identity(db_file):
+    """Identify the file currently at `db_file`; a swap changes the inode."""
+    stat = os.stat(db_file)
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def query_frame(query, params=None, db_file=DB_FILE):
+    """
+    Run a read query and build a DataFrame column by column.
+
+    Rows are fetched as plain tuples in `FETCH_SIZE` blocks and transposed into
+    one list per column, so no per-row Row or dict objects are created.
+
+    Args:
+        query (str): The SQL query to be executed.
+        params (tuple): Optional parameters to bind to the query.
+        db_file (str): Path to the SQLite database.
+
+    Returns:
+        pd.DataFrame: The query result.
+    """
+    with read_connection(db_file) as conn:
+        return frame_from_cursor(conn.execute(query, params or []))
+
+
+def frame_from_cursor(cursor):
+    """
+    Drain an executed cursor into a DataFrame and close it (see `query_frame`).
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor of an executed query.
+
+    Returns:
+        pd.DataFrame: The query result.
+    """
+    try:
+        columns = [col[0] for col in cursor.description]
+        values = [[] for _ in columns]
+        while True:
+            rows = cursor.fetchmany(FETCH_SIZE)
+            if not rows:
+                break
+            for column, block in zip(values, zip(*rows)):
+                column.extend(block)
+    finally:
+        cursor.close()
+
+    return pd.DataFrame(dict(zip(columns, values)), columns=columns)
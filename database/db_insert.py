@@ -1,6 +1,15 @@
 import sqlite3
 import logging
+import os
 import pandas as pd
+from data_preprocessing.data_loader import INGEST_CHUNK_SIZE, hash_file
+from database.db_schema import (
+    DIMENSIONS, FACT_COLUMNS, REBUILD_SEARCH_INDEX, SQL_DATETIME_FORMAT, SUMMARY_TABLES,
+    dimension_fill_sql, dimension_joins, fact_select, summary_rebuild_sql,
+)
+from database.db_partitions import mark_changed_months
+from database.db_queries import ORDER_LINE_SKU_COLUMNS
+from database.db_setup import create_indexes, drop_indexes
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -8,117 +17,176 @@ logger = logging.getLogger(__name__)
 # Database file
 DB_FILE = "data_app.db"
 
-def insert_data_into_db(data):
+
+# Rows per executemany batch when bulk loading
+BULK_BATCH_SIZE = 50_000
+
+# Connection PRAGMAs used while bulk loading: keep the rollback journal in memory,
+# skip fsyncs and keep temporary b-trees in RAM. Loads normally write into a
+# private build file that is validated before it goes live (see
+# `db_setup.rebuild_database`), so a crash only loses that file.
+FAST_LOAD_PRAGMAS = {
+    "journal_mode": "MEMORY",
+    "synchronous": "OFF",
+    "temp_store": "MEMORY",
+}
+
+# Scratch table the order lines are staged in before being upserted
+STAGING_TABLE = "sale_order_line_staging"
+
+# Temp table holding the summary keys touched by a load
+CHANGED_LINES_TABLE = "changed_lines"
+
+# Natural key columns of an order line, NOT NULL in sale_order_line. A blank key in
+# the source is stored as MISSING_KEY so the line still loads and keeps its identity.
+ORDER_LINE_KEY_COLUMNS = ["Order Reference", "SKU"]
+MISSING_KEY = ""
+
+# sale_order_line source columns and the SQL columns they load into
+SALE_ORDER_LINE_COLUMNS = {
+    "Created on": "created_on",
+    "Sales Date": "sales_date",
+    "Delivery Date": "delivery_date",
+    "Order Reference": "order_reference",
+    "Sales Team": "sales_team",
+    "Salesperson": "salesperson",
+    "Customer": "customer",
+    "State": "state",
+    "SKU": "sku",
+    "Product": "product",
+    "Collection": "collection",
+    "Product Template": "product_template",
+    "Product Category": "product_category",
+    "Fabric SKU": "fabric_sku",
+    "Fabric Type": "fabric_type",
+    "Quantity": "quantity",
+    "Subtotal": "subtotal",
+    "Total Cost": "total_cost",
+    "Unit Cost": "unit_cost",
+    "Unit Price": "unit_price",
+    "Order Status": "order_status",
+    "Invoice Status": "invoice_status",
+    "Delivery Status": "delivery_status",
+    "Total Tax": "total_tax",
+}
+
+# master_sku source columns and the SQL columns they load into
+MASTER_SKU_COLUMNS = {
+    "WS Ship Date": "ws_ship_date",
+    "Release Month": "release_month",
+    "Category Group": "category_group",
+    "Category": "category",
+    "Sub-Category": "sub_category",
+    "Collection": "collection",
+    "Fabric Code": "fabric_code",
+    "SKU (Parent)": "sku_parent",
+    "SKU": "sku",
+    "Name": "name",
+    "Season": "season",
+    "SPSU25 Status": "spsu25_status",
+    "Sold by Info": "sold_by_info",
+    "Carded / Non-Carded": "carded_non_carded",
+    "CARD PROPERTIES": "card_properties",
+    "Properties": "properties",
+    "Stones": "stones",
+    "Color": "color",
+    "CORD/PRINT/PATTERN": "cord_print_pattern",
+    "Material": "material",
+    "Length": "length",
+    "Size": "size",
+    "Size Abbreviation": "size_abbreviation",
+    "Unit Cost": "unit_cost",
+    "WS ($)": "ws_price",
+    "EC ($)": "ec_price",
+    "WEIGHT (LBS)": "weight_lbs",
+    "UPC": "upc",
+    "WS SKU?": "ws_sku",
+    "EC SKU?": "ec_sku",
+    "Amazon SKU": "amazon_sku",
+    "Vendor": "vendor",
+    "Yards Per Unit": "yards_per_unit",
+    "Labor Cost": "labor_cost",
+    "Prefix": "prefix",
+    "Prepack SKU": "prepack_sku",
+    "Available Sizes": "available_sizes",
+}
+
+# Datasets holding order references and the order_list they are loaded into
+ORDER_LISTS = {
+    "faire_orders": "faire",
+    "se_orders": "surf_expo",
+}
+
+# Source-to-SQL column mapping of each table loaded from the datasets
+TABLE_COLUMNS = {
+    "sale_order_line": SALE_ORDER_LINE_COLUMNS,
+    "master_sku": MASTER_SKU_COLUMNS,
+}
+
+
+def prepare_for_sql(df):
     """
-    Insert processed data into the database.
+    Convert a typed DataFrame into plain Python values sqlite3 can bind:
+    datetimes become text, and missing values of any dtype become None.
 
     Args:
-        data (dict): Dictionary of DataFrames to be inserted into the database.
+        df (pd.DataFrame): The typed DataFrame.
+
+    Returns:
+        pd.DataFrame: An object-dtype copy of the DataFrame.
+    """
+    df = df.copy()
+    for col in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = df[col].dt.strftime(SQL_DATETIME_FORMAT)
+    return df.astype(object).where(df.notna(), None)
+
+def insert_data_into_db(data, db_file=DB_FILE):
+    """
+    Insert processed data into the database with the bulk loader, in a single transaction.
+
+    `data` is either a dictionary of DataFrames or a `DataSource`. From a source,
+    sale_order_line is streamed in chunks (see `load_sale_order_line`) while the other
+    tables are prefetched, and each table read from a file records the file state so
+    unchanged files can be skipped.
+
+    Args:
+        data (Mapping): DataFrames to be inserted into the database, by dataset key.
+        db_file (str): Path to the SQLite database.
     """
     try:
-        conn = sqlite3.connect(DB_FILE)
+        if hasattr(data, "prefetch"):
+            # Read the smaller tables concurrently while sale_order_line streams
+            data.prefetch(["master_sku", *ORDER_LISTS])
+
+        conn = connect_for_bulk_load(db_file)
         cursor = conn.cursor()
 
-       # Clean column names to avoid any leading/trailing spaces
         if 'sale_order_line' in data:
-            sale_order_line = data['sale_order_line']
-            sale_order_line.columns = sale_order_line.columns.str.strip()  # Remove any spaces
-
-            for _, row in sale_order_line.iterrows():
-                cursor.execute(
-                    """
-                    INSERT INTO sale_order_line (created_on, sales_date, delivery_date, order_reference, sales_team, salesperson, customer, state, sku, 
-                                                product, collection, product_template, product_category, fabric_sku, fabric_type, quantity, 
-                                                subtotal, total_cost, unit_cost, unit_price, order_status, invoice_status, delivery_status, total_tax)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """,
-                    (
-                        row.get("Created on"),          # Corresponds to "created_on"
-                        row.get("Sales Date"),          # Corresponds to "sales_date"
-                        row.get("Delivery Date"),       # Corresponds to "delivery_date"
-                        row.get("Order Reference"),     # Corresponds to "order_reference"
-                        row.get("Sales Team"),          # Corresponds to "sales_team"
-                        row.get("Salesperson"),         # Corresponds to "salesperson"
-                        row.get("Customer"),            # Corresponds to "customer"
-                        row.get("State"),               # Corresponds to "state"
-                        row.get("SKU"),                 # Corresponds to "sku"
-                        row.get("Product"),             # Corresponds to "product"
-                        row.get("Collection"),          # Corresponds to "collection"
-                        row.get("Product Template"),    # Corresponds to "product_template"
-                        row.get("Product Category"),    # Corresponds to "product_category"
-                        row.get("Fabric SKU"),          # Corresponds to "fabric_sku"
-                        row.get("Fabric Type"),         # Corresponds to "fabric_type"
-                        row.get("Quantity"),            # Corresponds to "quantity"
-                        row.get("Subtotal"),            # Corresponds to "subtotal"
-                        row.get("Total Cost"),          # Corresponds to "total_cost"
-                        row.get("Unit Cost"),           # Corresponds to "unit_cost"
-                        row.get("Unit Price"),          # Corresponds to "unit_price"
-                        row.get("Order Status"),       # Corresponds to "order_status"
-                        row.get("Invoice Status"),     # Corresponds to "invoice_status"
-                        row.get("Delivery Status"),    # Corresponds to "delivery_status"
-                        row.get("Total Tax"),           # Corresponds to "total_tax"
-                    ),
-                )
+            load_sale_order_line(cursor, data)
         else:
-            logger.error("Missing or empty sale_order_line DataFrame.")
-
+            logger.info("No sale_order_line provided; the table is kept as is.")
 
         if 'master_sku' in data:
-            master_sku = data['master_sku']
-            master_sku.columns = master_sku.columns.str.strip()  # Remove any spaces in the column names
-            for _, row in master_sku.iterrows():
-                cursor.execute(
-                    """
-                    INSERT OR REPLACE INTO master_sku (ws_ship_date, release_month, category_group, category, sub_category, collection, fabric_code, sku_parent, sku, name, season, spsu25_status, 
-                                                       sold_by_info, carded_non_carded, card_properties, properties, stones, color, 
-                                                       cord_print_pattern, material, length, size, size_abbreviation, unit_cost, ws_price, 
-                                                       ec_price, weight_lbs, upc, ws_sku, ec_sku, amazon_sku, vendor, 
-                                                       yards_per_unit, labor_cost, prefix, prepack_sku, available_sizes)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """,
-                    (
-                        row.get("WS Ship Date"),
-                        row.get("Release Month"),
-                        row.get("Category Group"),
-                        row.get("Category"),
-                        row.get("Sub-Category"),
-                        row.get("Collection"),
-                        row.get("Fabric Code"),
-                        row.get("SKU (Parent)"),
-                        row.get("SKU"),
-                        row.get("Name"),
-                        row.get("Season"),
-                        row.get("SPSU25 Status"),
-                        row.get("Sold by Info"),
-                        row.get("Carded / Non-Carded"),
-                        row.get("CARD PROPERTIES"),
-                        row.get("Properties"),
-                        row.get("Stones"),
-                        row.get("Color"),
-                        row.get("CORD/PRINT/PATTERN"),
-                        row.get("Material"),
-                        row.get("Length"),
-                        row.get("Size"),
-                        row.get("Size Abbreviation"),
-                        row.get("Unit Cost"),
-                        row.get("WS ($)"),
-                        row.get("EC ($)"),
-                        row.get("WEIGHT (LBS)"),
-                        row.get("UPC"),
-                        row.get("WS SKU?"),
-                        row.get("EC SKU?"),
-                        row.get("Amazon SKU"),
-                        row.get("Vendor"),
-                        row.get("Yards Per Unit"),
-                        row.get("Labor Cost"),
-                        row.get("Prefix"),
-                        row.get("Prepack SKU"),
-                        row.get("Available Sizes"),
-                    ),
-                )
+            # Clean column names to avoid any leading/trailing spaces
+            master_sku = data['master_sku'].rename(columns=str.strip)
+            load_master_sku(cursor, master_sku)
+            record_source_state(cursor, "master_sku", source_file(data, "master_sku"))
         else:
             logger.error("Missing or empty master_sku DataFrame.")
 
+        for key, list_name in ORDER_LISTS.items():
+            try:
+                orders = data[key]
+            except Exception as e:
+                # The lists only tag order lines, so a missing file must not fail the load
+                logger.error(f"No {key} DataFrame available ({e}); the {list_name} order list is kept as is.")
+                continue
+            load_order_list(cursor, list_name, orders)
+            record_source_state(cursor, key, source_file(data, key))
+
+        refresh_search_index(cursor)
+
         conn.commit()
         conn.close()
         logger.info("Data successfully inserted into the database.")
@@ -126,6 +194,485 @@ def insert_data_into_db(data):
         logger.error(f"Failed to insert data into the database: {e}")
         raise
 
+
+def connect_for_bulk_load(db_file=DB_FILE):
+    """
+    Open a connection tuned for bulk loading with `FAST_LOAD_PRAGMAS`.
+    The PRAGMAs only last for this connection.
+
+    Args:
+        db_file (str): Path to the SQLite database.
+
+    Returns:
+        sqlite3.Connection: The tuned connection.
+    """
+    conn = sqlite3.connect(db_file)
+    for pragma, value in FAST_LOAD_PRAGMAS.items():
+        conn.execute(f"PRAGMA {pragma} = {value};")
+    return conn
+
+
+def bulk_insert(cursor, table, df, column_map, verb="INSERT", batch_size=BULK_BATCH_SIZE):
+    """
+    Bulk insert a DataFrame into a table with `executemany` batches.
+    Row values are built column-wise from the DataFrame rather than row by row;
+    source columns missing from the DataFrame load as NULL.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor of the open load transaction.
+        table (str): Target table.
+        df (pd.DataFrame): Typed rows with source column names.
+        column_map (dict): Source column to SQL column mapping.
+        verb (str): Insert statement verb, e.g. "INSERT OR REPLACE".
+        batch_size (int): Number of rows per `executemany` call.
+
+    Returns:
+        int: Number of rows inserted.
+    """
+    frame = prepare_for_sql(df.reindex(columns=list(column_map)))
+    columns = ", ".join(column_map.values())
+    placeholders = ", ".join("?" * len(column_map))
+    statement = f"{verb} INTO {table} ({columns}) VALUES ({placeholders})"
+
+    for start in range(0, len(frame), batch_size):
+        batch = frame.iloc[start:start + batch_size]
+        cursor.executemany(statement, batch.to_numpy(dtype=object).tolist())
+
+    logger.debug(f"Bulk inserted {len(frame)} rows into {table}.")
+    return len(frame)
+
+
+def upsert_sale_order_line(cursor, chunks):
+    """
+    Merge a full snapshot of the order lines into sale_order_line.
+
+    The chunks are bulk loaded into a staging table, each line gets its natural key
+    (order reference, SKU, occurrence of the SKU within the order), and the staged
+    lines are upserted: new lines are inserted, lines whose row hash changed are
+    updated, unchanged lines are left alone, and lines missing from the snapshot
+    are deleted. Text labels are stored as keys of the dimension tables.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor of the open load transaction.
+        chunks (iterable): Typed sale_order_line DataFrames forming the full snapshot.
+
+    Returns:
+        dict: Number of staged, upserted and deleted lines.
+    """
+    columns = list(SALE_ORDER_LINE_COLUMNS.values())
+    staging_map = {**SALE_ORDER_LINE_COLUMNS, "_src_row": "src_row", "_row_hash": "row_hash"}
+
+    cursor.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE};")
+    cursor.execute(
+        f"CREATE TABLE {STAGING_TABLE} (src_row INTEGER PRIMARY KEY, row_hash INTEGER, "
+        f"line_seq INTEGER, {', '.join(columns)});"
+    )
+
+    staged = 0
+    for chunk in chunks:
+        chunk = chunk.reindex(columns=list(SALE_ORDER_LINE_COLUMNS))
+        for col in ORDER_LINE_KEY_COLUMNS:
+            chunk[col] = chunk[col].fillna(MISSING_KEY)
+        chunk["_src_row"] = range(staged, staged + len(chunk))
+        # Content hash of each source row; unchanged lines are skipped by the upsert
+        chunk["_row_hash"] = pd.util.hash_pandas_object(
+            chunk[list(SALE_ORDER_LINE_COLUMNS)], index=False
+        ).to_numpy().view("int64")
+        staged += bulk_insert(cursor, STAGING_TABLE, chunk, staging_map)
+
+    # Number repeated SKUs within an order in source order
+    cursor.execute(f"CREATE INDEX {STAGING_TABLE}_src ON {STAGING_TABLE} (order_reference, sku, src_row);")
+    cursor.execute(f"""
+        UPDATE {STAGING_TABLE} SET line_seq = numbered.seq
+        FROM (
+            SELECT src_row, ROW_NUMBER() OVER (PARTITION BY order_reference, sku ORDER BY src_row) - 1 AS seq
+            FROM {STAGING_TABLE}
+        ) AS numbered
+        WHERE {STAGING_TABLE}.src_row = numbered.src_row;
+    """)
+    cursor.execute(f"CREATE UNIQUE INDEX {STAGING_TABLE}_key ON {STAGING_TABLE} (order_reference, sku, line_seq);")
+
+    # Into an empty table it is cheaper to build the indexes once afterwards
+    initial_load = cursor.execute("SELECT NOT EXISTS (SELECT 1 FROM sale_order_line);").fetchone()[0]
+    if initial_load:
+        drop_indexes(cursor, "sale_order_line")
+        mark_changed_months(cursor, f"SELECT sales_date FROM {STAGING_TABLE}")
+    else:
+        capture_changed_lines(cursor)
+        mark_changed_months(cursor, f"SELECT sales_day AS sales_date FROM temp.{CHANGED_LINES_TABLE}")
+
+    # Register new labels, then store the staged lines with their dimension keys
+    for dimension in DIMENSIONS:
+        cursor.execute(dimension_fill_sql(dimension, STAGING_TABLE))
+
+    conn = cursor.connection
+    changes = conn.total_changes
+    updates = ", ".join(f"{col} = excluded.{col}" for col in FACT_COLUMNS + ["row_hash"])
+    cursor.execute(f"""
+        INSERT INTO sale_order_line ({', '.join(FACT_COLUMNS)}, line_seq, row_hash)
+        SELECT {fact_select('s')}, s.line_seq, s.row_hash
+        FROM {STAGING_TABLE} AS s {dimension_joins('s')}
+        WHERE true
+        ON CONFLICT (order_reference, sku, line_seq) DO UPDATE SET {updates}
+        WHERE sale_order_line.row_hash IS NOT excluded.row_hash;
+    """)
+    upserted = conn.total_changes - changes
+
+    changes = conn.total_changes
+    cursor.execute(f"""
+        DELETE FROM sale_order_line WHERE NOT EXISTS (
+            SELECT 1 FROM {STAGING_TABLE} AS s
+            WHERE s.order_reference IS sale_order_line.order_reference
+              AND s.sku IS sale_order_line.sku
+              AND s.line_seq IS sale_order_line.line_seq
+        );
+    """)
+    deleted = conn.total_changes - changes
+
+    cursor.execute(f"DROP TABLE {STAGING_TABLE};")
+    create_indexes(cursor, "sale_order_line")
+    refresh_summaries(cursor, full=initial_load)
+    logger.info(f"Merged {staged} sale_order_line rows: {upserted} inserted or updated, {deleted} deleted.")
+    return {"staged": staged, "upserted": upserted, "deleted": deleted}
+
+
+def capture_changed_lines(cursor):
+    """
+    Record the summary keys of every order line the pending upsert will insert,
+    update or delete, in the temp table `CHANGED_LINES_TABLE`. Changed lines are
+    recorded with both their old and new keys.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor of the open load transaction.
+    """
+    keys = summary_key_columns()
+    match = "t.order_reference IS s.order_reference AND t.sku IS s.sku AND t.line_seq IS s.line_seq"
+
+    cursor.execute(f"DROP TABLE IF EXISTS temp.{CHANGED_LINES_TABLE};")
+    cursor.execute(f"""
+        CREATE TEMP TABLE {CHANGED_LINES_TABLE} AS
+        SELECT {', '.join(f"{expr.format(line='s')} AS {key}" for key, expr in keys.items())}
+        FROM {STAGING_TABLE} AS s LEFT JOIN sale_order_line AS t ON {match}
+        WHERE t.row_hash IS NOT s.row_hash
+        UNION ALL
+        SELECT {', '.join(expr.format(line='t') for expr in keys.values())}
+        FROM sale_order_line AS t LEFT JOIN {STAGING_TABLE} AS s ON {match}
+        WHERE s.row_hash IS NOT t.row_hash;
+    """)
+
+
+def refresh_summaries(cursor, full=False):
+    """
+    Bring the summary tables in line with sale_order_line.
+
+    Incrementally, only the summary rows whose keys appear in `CHANGED_LINES_TABLE`
+    are deleted and recomputed from their order lines, so the cost follows the
+    number of changed lines rather than the history size.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor of the open load transaction.
+        full (bool): Rebuild the tables from scratch instead.
+    """
+    for table, spec in SUMMARY_TABLES.items():
+        keys = list(spec["keys"])
+        if full:
+            cursor.execute(f"DELETE FROM {table};")
+            cursor.execute(summary_rebuild_sql(table))
+            continue
+
+        dirty = f"(SELECT DISTINCT {', '.join(keys)} FROM temp.{CHANGED_LINES_TABLE})"
+        cursor.execute(f"""
+            DELETE FROM {table} WHERE EXISTS (
+                SELECT 1 FROM {dirty} AS d
+                WHERE {' AND '.join(f"d.{key} IS {table}.{key}" for key in keys)}
+            );
+        """)
+        measures = [expr.format(line="l") for expr in spec["measures"].values()]
+        cursor.execute(f"""
+            INSERT INTO {table} ({', '.join(keys + list(spec["measures"]))})
+            SELECT {', '.join(f"d.{key}" for key in keys)}, {', '.join(measures)}
+            FROM {dirty} AS d
+            JOIN sale_order_line AS l
+              ON {' AND '.join(f"{expr.format(line='l')} IS d.{key}" for key, expr in spec["keys"].items())}
+            GROUP BY {', '.join(f"d.{key}" for key in keys)};
+        """)
+
+    cursor.execute(f"DROP TABLE IF EXISTS temp.{CHANGED_LINES_TABLE};")
+    for table in SUMMARY_TABLES:
+        cursor.execute(f"ANALYZE {table};")
+
+
+def summary_key_columns():
+    """
+    Return every key column of the summary tables with its sale_order_line expression.
+
+    Returns:
+        dict: Key column to expression, "{line}" standing for the line alias.
+    """
+    keys = {}
+    for spec in SUMMARY_TABLES.values():
+        keys.update(spec["keys"])
+    return keys
+
+
+def load_sale_order_line(cursor, data, chunksize=INGEST_CHUNK_SIZE, force=False):
+    """
+    Load sale_order_line from a `DataSource` or a dictionary of DataFrames.
+
+    A source streams the table chunk by chunk (see `DataSource.open_table`): each
+    chunk is read, cleaned and staged before the next one is read, so peak memory
+    stays bounded by the chunk size rather than the history size. The staged lines
+    are then upserted (see `upsert_sale_order_line`).
+
+    The load is skipped entirely when the table comes from a file that is unchanged
+    since the last load.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor of the open load transaction.
+        data (Mapping): Source of the sale_order_line table.
+        chunksize (int): Number of rows per chunk.
+        force (bool): Reload even if the file is unchanged.
+
+    Returns:
+        int: Number of rows staged (0 when skipped).
+    """
+    if hasattr(data, "open_table"):
+        chunks, file_path = data.open_table("sale_order_line", chunksize=chunksize)
+    else:
+        chunks, file_path = [data["sale_order_line"].rename(columns=str.strip)], None
+
+    if not force and file_path and source_unchanged(cursor, "sale_order_line", file_path):
+        logger.info(f"{os.path.basename(file_path)} is unchanged since the last load; skipping.")
+        return 0
+
+    result = upsert_sale_order_line(cursor, chunks)
+    record_source_state(cursor, "sale_order_line", file_path)
+    return result["staged"]
+
+
+def stream_sale_order_line_into_db(source=None, chunksize=INGEST_CHUNK_SIZE, force=False, db_file=DB_FILE):
+    """
+    Stream sale_order_line from a data source into the database on its own
+    transaction (see `load_sale_order_line`).
+
+    Args:
+        source (DataSource, optional): Source to read from. Defaults to the configured source.
+        chunksize (int): Number of rows per chunk.
+        force (bool): Reload even if the file is unchanged.
+        db_file (str): Path to the SQLite database.
+
+    Returns:
+        int: Number of rows streamed (0 when skipped).
+    """
+    if source is None:
+        from data_preprocessing.data_sources import get_data_source
+        source = get_data_source(tables=["sale_order_line"])
+
+    conn = connect_for_bulk_load(db_file)
+    try:
+        cursor = conn.cursor()
+        staged = load_sale_order_line(cursor, source, chunksize=chunksize, force=force)
+        if not staged:
+            return 0
+
+        refresh_search_index(cursor)
+        conn.commit()
+        logger.info(f"Streamed {staged} sale_order_line rows into the database.")
+        return staged
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"Failed to stream sale_order_line into the database: {e}")
+        raise
+    finally:
+        conn.close()
+
+
+def load_master_sku(cursor, master_sku):
+    """
+    Replace the master SKU rows with the given ones; rows without a SKU are skipped.
+    The sales months of the order lines whose SKU attributes (`ORDER_LINE_SKU_COLUMNS`)
+    changed are recorded as changed.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor of the open load transaction.
+        master_sku (pd.DataFrame): Typed master_sku rows with source column names.
+    """
+    # Rows without a SKU cannot be joined onto order lines
+    missing = master_sku["SKU"].isna() | (master_sku["SKU"].astype(str).str.strip() == "")
+    if missing.any():
+        logger.warning(f"Skipping {missing.sum()} master_sku rows without a SKU.")
+        master_sku = master_sku[~missing]
+
+    attributes = ", ".join(["sku", *ORDER_LINE_SKU_COLUMNS])
+    cursor.execute("DROP TABLE IF EXISTS temp.master_sku_before;")
+    cursor.execute(f"CREATE TEMP TABLE master_sku_before AS SELECT {attributes} FROM master_sku;")
+
+    # The file is the full list: SKUs removed from it must stop joining onto order lines
+    cursor.execute("DELETE FROM master_sku;")
+    bulk_insert(cursor, "master_sku", master_sku, MASTER_SKU_COLUMNS, verb="INSERT OR REPLACE")
+    create_indexes(cursor, "master_sku")
+
+    changed = f"""
+        SELECT sku FROM (SELECT {attributes} FROM master_sku EXCEPT SELECT * FROM temp.master_sku_before)
+        UNION
+        SELECT sku FROM (SELECT * FROM temp.master_sku_before EXCEPT SELECT {attributes} FROM master_sku)
+    """
+    mark_changed_months(cursor, f"SELECT sales_date FROM sale_order_line WHERE sku IN ({changed})")
+    cursor.execute("DROP TABLE temp.master_sku_before;")
+
+
+def load_order_list(cursor, list_name, orders):
+    """
+    Replace the order references of one order list. The sales months of the order
+    lines added to or removed from the list are recorded as changed.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor of the open load transaction.
+        list_name (str): Name of the list in order_list, e.g. "faire".
+        orders (pd.DataFrame): Orders with an "Order Reference" column.
+    """
+    references = orders.rename(columns=str.strip)["Order Reference"].dropna().astype(str).str.strip()
+    cursor.execute("DROP TABLE IF EXISTS temp.order_list_before;")
+    cursor.execute(
+        "CREATE TEMP TABLE order_list_before AS SELECT order_reference FROM order_list WHERE list = ?;",
+        (list_name,),
+    )
+
+    cursor.execute("DELETE FROM order_list WHERE list = ?;", (list_name,))
+    cursor.executemany(
+        "INSERT OR IGNORE INTO order_list (list, order_reference) VALUES (?, ?);",
+        ((list_name, reference) for reference in references.unique() if reference),
+    )
+    logger.info(f"Loaded {cursor.rowcount} order references into the {list_name} order list.")
+
+    current = "SELECT order_reference FROM order_list WHERE list = :list"
+    changed = f"""
+        SELECT * FROM ({current} EXCEPT SELECT * FROM temp.order_list_before)
+        UNION
+        SELECT * FROM (SELECT * FROM temp.order_list_before EXCEPT {current})
+    """
+    mark_changed_months(
+        cursor,
+        f"SELECT sales_date FROM sale_order_line WHERE order_reference IN ({changed})",
+        {"list": list_name},
+    )
+    cursor.execute("DROP TABLE temp.order_list_before;")
+
+
+def refresh_search_index(cursor):
+    """
+    Rebuild the full-text search index from master_sku and the customers with
+    order lines. Both sets are small, so a rebuild takes milliseconds.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor of the open load transaction.
+    """
+    for statement in REBUILD_SEARCH_INDEX:
+        cursor.execute(statement)
+
+
+def source_file(data, key):
+    """
+    Return the file a table of `data` is read from.
+
+    Args:
+        data (Mapping): A `DataSource` or a dictionary of DataFrames.
+        key (str): Dataset key.
+
+    Returns:
+        str: Path of the source file, or None for in-memory frames and non-file backends.
+    """
+    return data.source_file(key) if hasattr(data, "source_file") else None
+
+
+def sources_unchanged(data, db_file=DB_FILE):
+    """
+    Check whether every table of `data` comes from a file that is unchanged since it
+    was loaded into the database, in which case a reload would change nothing.
+    Order lists no source can serve are ignored, as the load keeps them as is.
+
+    Args:
+        data (Mapping): A `DataSource` or a dictionary of DataFrames.
+        db_file (str): Path to the SQLite database.
+
+    Returns:
+        bool: True if no table needs reloading.
+    """
+    if not os.path.exists(db_file):
+        return False
+
+    conn = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True)
+    try:
+        cursor = conn.cursor()
+        for key in data:
+            if key in ORDER_LISTS and hasattr(data, "available") and not data.available(key):
+                continue
+            file_path = source_file(data, key)
+            if file_path is None or not source_unchanged(cursor, key, file_path):
+                logger.info(f"{key} changed since the last load.")
+                return False
+        return True
+    except (sqlite3.Error, OSError, RuntimeError) as e:
+        logger.info(f"Could not compare the sources with '{db_file}' ({e}); reloading.")
+        return False
+    finally:
+        conn.close()
+
+
+def source_unchanged(cursor, source, file_path):
+    """
+    Check whether a source file matches the state recorded at its last load.
+    The content hash is only computed when the size matches but the mtime moved.
+
+    Args:
+        cursor (sqlite3.Cursor): Open database cursor.
+        source (str): Dataset key.
+        file_path (str): Path to the source file.
+
+    Returns:
+        bool: True if the file is unchanged.
+    """
+    row = cursor.execute(
+        "SELECT size, mtime_ns, sha256 FROM source_state WHERE source = ?;", (source,)
+    ).fetchone()
+    if row is None:
+        return False
+
+    size, mtime_ns, sha256 = row
+    stat = os.stat(file_path)
+    if stat.st_size != size:
+        return False
+    return stat.st_mtime_ns == mtime_ns or hash_file(file_path) == sha256
+
+
+def record_source_state(cursor, source, file_path):
+    """
+    Record the size, mtime and content hash of a source file after loading it.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor of the open load transaction.
+        source (str): Dataset key.
+        file_path (str): Path to the source file, or None when the table was not
+            read from a file; the table then no longer mirrors a file and its
+            state is cleared so the next load does not skip it.
+    """
+    if file_path is None:
+        cursor.execute("DELETE FROM source_state WHERE source = ?;", (source,))
+        return
+
+    stat = os.stat(file_path)
+    cursor.execute(
+        """
+        INSERT INTO source_state (source, size, mtime_ns, sha256, loaded_on)
+        VALUES (?, ?, ?, ?, datetime('now'))
+        ON CONFLICT (source) DO UPDATE SET
+            size = excluded.size, mtime_ns = excluded.mtime_ns,
+            sha256 = excluded.sha256, loaded_on = excluded.loaded_on;
+        """,
+        (source, stat.st_size, stat.st_mtime_ns, hash_file(file_path)),
+    )
+
+
 # CHECKER
 def save_sql_table_to_csv(table_name, csv_file_path):
     """
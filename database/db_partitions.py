@@ -0,0 +1,312 @@
+import sqlite3
+import logging
+import os
+import shutil
+import time
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from database.db_connection import DB_FILE, data_version, frame_from_cursor
+from database.db_queries import ORDER_LINES_QUERY, fetch_order_lines, sales_date_bounds
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Root of the partitioned datasets, next to the source data
+PARTITION_ROOT = "./data/partitions"
+
+# Order lines are written as a Hive-style Parquet dataset, one directory per
+# sales month: <root>/order_lines/v<data version>/sales_month=YYYY-MM/*.parquet
+ORDER_LINES_DATASET = "order_lines"
+PARTITION_COLUMN = "sales_month"
+
+# Directory name pyarrow gives the partition of rows without a sales date
+HIVE_DEFAULT_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+# Sales month of an order line as stored in `CHANGED_MONTHS_TABLE`
+SQL_SALES_MONTH = "COALESCE(substr(sales_date, 1, 7), '')"
+
+# Months changed by the load of the current build (see `mark_changed_months`)
+CHANGED_MONTHS_TABLE = "changed_months"
+
+# Parquet types of the columns `ORDER_LINES_QUERY` computes rather than reads from a table
+COMPUTED_COLUMN_TYPES = {
+    "channel": pa.string(),
+    "surf_expo": pa.int64(),
+}
+
+# Dataset versions kept on disk: the live one and the one before it, which
+# readers still on the previous database file may be reading
+KEEP_VERSIONS = 2
+
+
+def dataset_path(version, dataset=ORDER_LINES_DATASET):
+    """
+    Return the directory of one version of a partitioned dataset.
+
+    Args:
+        version (int): Data version of the database the dataset was written from.
+        dataset (str): Dataset name.
+
+    Returns:
+        str: Path of the dataset directory.
+    """
+    return os.path.join(PARTITION_ROOT, dataset, f"v{version}")
+
+
+def write_order_line_partitions(db_file, version, full=False):
+    """
+    Write the order lines of a database as a month-partitioned Parquet dataset.
+
+    Only the months recorded in `changed_months` by the load (see `mark_changed_months`)
+    are read and written, one month at a time with a range query, so memory stays
+    bounded by the largest month. The other months are hard-linked from the dataset
+    of the previous version. Every month is written when there is no previous
+    dataset, when its column types differ, or when `full` is set.
+
+    The dataset is written to a temporary directory and renamed into place, so
+    readers only ever see complete versions. Rows without a sales date land in
+    pyarrow's default partition and are only read by unbounded reads.
+
+    Args:
+        db_file (str): Path to the SQLite database, usually the build file.
+        version (int): Data version the dataset belongs to.
+        full (bool): Write every month regardless of the recorded changes.
+
+    Returns:
+        str: Path of the written dataset.
+    """
+    path = dataset_path(version)
+    previous = dataset_path(version - 1)
+    tmp_path = f"{path}.tmp"
+    start = time.perf_counter()
+
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    conn = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True)
+    try:
+        schema = order_line_schema(conn)
+        months = [row[0] for row in conn.execute(
+            f"SELECT DISTINCT {SQL_SALES_MONTH} FROM sale_order_line ORDER BY 1;"
+        )]
+        previous_schema = dataset_schema(previous) if os.path.isdir(previous) else None
+        if full or previous_schema is None or not schema.equals(previous_schema):
+            changed = set(months)
+        else:
+            changed = {row[0] for row in conn.execute(f"SELECT sales_month FROM {CHANGED_MONTHS_TABLE};")}
+
+        lines = 0
+        for month in months:
+            source = os.path.join(previous, partition_name(month))
+            target = os.path.join(tmp_path, partition_name(month))
+            if month in changed or not os.path.isdir(source):
+                lines += write_month(conn, month, schema, target)
+            else:
+                shutil.copytree(source, target, copy_function=_link_or_copy)
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, path)
+
+    written = len(changed.intersection(months))
+    linked = f", linked the others from v{version - 1}," if written < len(months) else ""
+    logger.info(
+        f"Wrote {lines} order lines in {written} of {len(months)} monthly partitions"
+        f"{linked} in {time.perf_counter() - start:.2f}s."
+    )
+    return path
+
+
+def write_month(conn, month, schema, target):
+    """
+    Write the order lines of one sales month as a single Parquet file.
+
+    Args:
+        conn (sqlite3.Connection): Open database connection.
+        month (str): Sales month (YYYY-MM), '' for lines without a sales date.
+        schema (pa.Schema): Column types of the dataset (see `order_line_schema`).
+        target (str): Partition directory to write.
+
+    Returns:
+        int: Number of order lines written.
+    """
+    if month:
+        year, number = map(int, month.split("-"))
+        bounds = {"start": f"{month}-01", "end": f"{year + number // 12:04d}-{number % 12 + 1:02d}-01"}
+        query = f"SELECT * FROM ({ORDER_LINES_QUERY});"
+    else:
+        bounds = {"start": None, "end": None}
+        query = f"SELECT * FROM ({ORDER_LINES_QUERY}) WHERE sales_date IS NULL;"
+
+    order_lines = frame_from_cursor(conn.execute(query, bounds))
+    os.makedirs(target)
+    table = pa.Table.from_pandas(order_lines, schema=schema, preserve_index=False)
+    pq.write_table(table, os.path.join(target, "part-0.parquet"))
+    return len(order_lines)
+
+
+def order_line_schema(conn):
+    """
+    Return the Parquet column types of the order lines, from the declared types of
+    the sale_order_line and master_sku columns (see `arrow_type`) and of the
+    computed columns (`COMPUTED_COLUMN_TYPES`). Every month is written with these
+    types so they read back as one dataset. Integers are nullable in Parquet, so a
+    read comes back as int64, or as floats when it has missing values, like an SQL read.
+
+    Args:
+        conn (sqlite3.Connection): Open database connection.
+
+    Returns:
+        pa.Schema: The column types, without the partition column.
+    """
+    declared = {}
+    for table in ["master_sku", "sale_order_line"]:
+        declared.update({row[1]: row[2] for row in conn.execute(f"PRAGMA table_info({table});")})
+
+    params = {"start": None, "end": None}
+    columns = [col[0] for col in conn.execute(f"SELECT * FROM ({ORDER_LINES_QUERY}) LIMIT 0;", params).description]
+    return pa.schema([
+        pa.field(col, COMPUTED_COLUMN_TYPES[col] if col in COMPUTED_COLUMN_TYPES else arrow_type(declared[col]))
+        for col in columns
+    ])
+
+
+def arrow_type(declared_type):
+    """
+    Map a declared SQLite column type to a Parquet type by its type affinity.
+
+    Args:
+        declared_type (str): Column type from the table DDL, e.g. "INTEGER".
+
+    Returns:
+        pa.DataType: int64, float64 or string.
+    """
+    declared_type = declared_type.upper()
+    if "INT" in declared_type:
+        return pa.int64()
+    if any(name in declared_type for name in ("REAL", "FLOA", "DOUB")):
+        return pa.float64()
+    return pa.string()
+
+
+def dataset_schema(path):
+    """
+    Return the column types of a written dataset, without the partition column.
+
+    Args:
+        path (str): Dataset directory.
+
+    Returns:
+        pa.Schema: The column types, or None for an empty dataset.
+    """
+    for root, _, files in os.walk(path):
+        for name in files:
+            if name.endswith(".parquet"):
+                return pq.read_schema(os.path.join(root, name)).remove_metadata()
+    return None
+
+
+def partition_name(month):
+    """Return the Hive partition directory of a sales month ('' for undated lines)."""
+    return f"{PARTITION_COLUMN}={month or HIVE_DEFAULT_PARTITION}"
+
+
+def clear_changed_months(db_file):
+    """
+    Forget the changed months of the previous build, ahead of a new load.
+
+    Args:
+        db_file (str): Path to the SQLite database, usually the build file.
+    """
+    conn = sqlite3.connect(db_file)
+    try:
+        conn.execute(f"DELETE FROM {CHANGED_MONTHS_TABLE};")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def mark_changed_months(cursor, lines_query, params=()):
+    """
+    Record the sales months of the order lines returned by a query as changed, so
+    their partitions are rewritten by the next `write_order_line_partitions`.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor of the open load transaction.
+        lines_query (str): Query returning a `sales_date` column.
+        params (tuple): Optional parameters to bind to the query.
+    """
+    cursor.execute(
+        f"INSERT OR IGNORE INTO {CHANGED_MONTHS_TABLE} (sales_month) "
+        f"SELECT DISTINCT {SQL_SALES_MONTH} FROM ({lines_query});",
+        params,
+    )
+
+
+def _link_or_copy(source, target):
+    """Hard-link a file of an unchanged partition, copying it across file systems."""
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def remove_old_versions(current_version, dataset=ORDER_LINES_DATASET):
+    """
+    Delete dataset versions older than the last `KEEP_VERSIONS`, along with any
+    leftover temporary directories.
+
+    Args:
+        current_version (int): Data version of the live database.
+        dataset (str): Dataset name.
+    """
+    root = os.path.join(PARTITION_ROOT, dataset)
+    if not os.path.isdir(root):
+        return
+
+    for name in os.listdir(root):
+        version = name[1:].removesuffix(".tmp")
+        if not version.isdigit():
+            continue
+        if name.endswith(".tmp") or int(version) <= current_version - KEEP_VERSIONS:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+def read_order_lines(start_date=None, end_date=None, db_file=DB_FILE):
+    """
+    Read order lines for a range of sales days from the partitioned dataset of
+    the live database version.
+
+    Only the monthly partitions overlapping the range are opened; rows are then
+    filtered to the exact days. Falls back to an SQL range query on the database
+    when the dataset for the live version is missing.
+
+    Args:
+        start_date (str): First sales day (YYYY-MM-DD), unbounded if None.
+        end_date (str): Last sales day (YYYY-MM-DD), unbounded if None.
+        db_file (str): Path to the SQLite database.
+
+    Returns:
+        pd.DataFrame: Rows of `ORDER_LINES_QUERY`, still keyed by dimension keys.
+    """
+    path = dataset_path(data_version(db_file))
+    if not os.path.isdir(path):
+        logger.warning(f"Partitioned order lines missing at '{path}', reading from the database.")
+        return fetch_order_lines(start_date, end_date, db_file=db_file)
+
+    start, end = sales_date_bounds(start_date, end_date)
+    filters = []
+    if start:
+        filters += [(PARTITION_COLUMN, ">=", start[:7]), ("sales_date", ">=", start)]
+    if end:
+        filters += [(PARTITION_COLUMN, "<=", end[:7]), ("sales_date", "<", end)]
+
+    order_lines = pd.read_parquet(path, filters=filters or None)
+    # Columns without any value come back as None objects from an SQL read
+    for col in order_lines.columns[order_lines.isna().all()]:
+        if order_lines[col].dtype != object:
+            order_lines[col] = pd.Series([None] * len(order_lines), index=order_lines.index, dtype=object)
+    # Partitions come back in month order; restore the table order of the SQL read
+    return order_lines.drop(columns=PARTITION_COLUMN).sort_values("id", ignore_index=True)
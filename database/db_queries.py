@@ -0,0 +1,372 @@
+import logging
+import math
+import sqlite3
+import numpy as np
+import pandas as pd
+from data_preprocessing import date_utils
+from database.db_connection import DB_FILE, query_frame
+from database.db_schema import DIMENSIONS, LABEL_COLUMNS, dimension_key
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Order references of the Faire and Surf Expo order lists (see `db_insert.ORDER_LISTS`)
+FAIRE_ORDERS = "(SELECT order_reference FROM order_list WHERE list = 'faire')"
+SURF_EXPO_ORDERS = "(SELECT order_reference FROM order_list WHERE list = 'surf_expo')"
+
+# Order lines of each channel
+CHANNEL_FILTERS = {
+    "ecom": "sales_team = 'Shopify'",
+    "wholesale": "sales_team = 'Wholesale'",
+    "faire": f"order_reference IN {FAIRE_ORDERS}",
+}
+
+# Channel of an order line or order: Faire for orders on the Faire list, otherwise
+# the sales team. Lines of a "Faire" sales team missing from the list get no channel.
+SQL_CHANNEL = f"CASE WHEN order_reference IN {FAIRE_ORDERS} THEN 'Faire' ELSE NULLIF(sales_team, 'Faire') END"
+
+# Channels left out of the revenue by channel
+REVENUE_EXCLUDED_CHANNELS = ("Website",)
+
+# Headline KPIs from the summary tables, optionally for a single sales team
+KPI_QUERY = """
+    WITH orders AS (
+        SELECT * FROM order_totals WHERE :team IS NULL OR sales_team = :team
+    ),
+    sales AS (
+        SELECT * FROM daily_sales WHERE :team IS NULL OR sales_team = :team
+    )
+    SELECT
+        COUNT(DISTINCT order_reference) AS total_orders,
+        COUNT(DISTINCT CASE WHEN order_status = 'sale' THEN order_reference END) AS total_orders_sold,
+        COUNT(DISTINCT CASE WHEN order_status = 'draft' THEN order_reference END) AS total_orders_quotation,
+        TOTAL(subtotal) AS total_revenue,
+        TOTAL(CASE WHEN order_status = 'sale' THEN subtotal END) AS total_revenue_sold,
+        TOTAL(CASE WHEN order_status = 'draft' THEN subtotal END) AS total_revenue_quotation,
+        (
+            SELECT AVG(order_total) FROM (
+                SELECT TOTAL(subtotal) AS order_total FROM orders GROUP BY order_reference
+            )
+        ) AS avg_order_value_all,
+        (
+            SELECT AVG(order_total) FROM (
+                SELECT TOTAL(subtotal) AS order_total FROM orders
+                WHERE order_status = 'sale'
+                GROUP BY order_reference
+            )
+        ) AS avg_order_value,
+        (
+            SELECT sku FROM sales
+            GROUP BY sku
+            ORDER BY TOTAL(quantity) DESC, sku
+            LIMIT 1
+        ) AS top_selling_product,
+        TOTAL(lines) AS lines
+    FROM orders;
+"""
+
+# Top :n values of a dimension by revenue for several channels in one statement:
+# {grouped} is one `TOP_N_GROUPED` per channel, joined by UNION ALL
+TOP_N_QUERY = """
+    WITH grouped AS (
+        {grouped}
+    ),
+    ranked AS (
+        SELECT *, ROW_NUMBER() OVER (PARTITION BY channel ORDER BY subtotal DESC, key) AS rank
+        FROM grouped
+    )
+    SELECT channel, key, quantity, subtotal
+    FROM ranked
+    WHERE rank <= :n
+    ORDER BY channel, rank;
+"""
+
+TOP_N_GROUPED = """
+        SELECT '{channel}' AS channel, {label} AS key,
+               COALESCE(SUM(quantity), 0) AS quantity, TOTAL(subtotal) AS subtotal
+        FROM {source}
+        WHERE {channel_filter} AND {group} IS NOT NULL
+        GROUP BY {group}
+"""
+
+# Revenue of sold orders by period and channel in one pass over order_totals,
+# optionally within [:start, :end). {period} is a `date_utils.sql_period_start`.
+REVENUE_BY_CHANNEL_QUERY = f"""
+    WITH sold AS (
+        SELECT {{period}} AS period, {SQL_CHANNEL} AS channel, subtotal
+        FROM order_totals
+        WHERE order_status = 'sale'
+          AND (:start IS NULL OR sales_day >= :start)
+          AND (:end IS NULL OR sales_day < :end)
+    )
+    SELECT period, channel, TOTAL(subtotal) AS subtotal
+    FROM sold
+    WHERE channel IS NOT NULL
+      AND channel NOT IN ({", ".join(f"'{channel}'" for channel in REVENUE_EXCLUDED_CHANNELS)})
+    GROUP BY period, channel
+    ORDER BY period, channel;
+"""
+
+# Source, grouping key and label of each top-N dimension, and the app column name
+# it is returned under. Collections are grouped by their integer key.
+TOP_N_DIMENSIONS = {
+    "sku_parent": (
+        "sale_order_line LEFT JOIN master_sku USING (sku)",
+        "sku_parent",
+        "sku_parent",
+        "SKU (Parent)",
+    ),
+    "collection": (
+        "sale_order_line LEFT JOIN dim_collection USING (collection_id)",
+        "collection_id",
+        "collection",
+        "Collection",
+    ),
+}
+
+
+# master_sku attributes the app groups order lines by
+ORDER_LINE_SKU_COLUMNS = ["spsu25_status", "category_group", "sku_parent", "category"]
+
+# Order lines with the master SKU attributes the app groups by and their channel
+# (see `SQL_CHANNEL`), keyed by their dimension keys (see `rehydrate_labels`),
+# optionally within [:start, :end)
+ORDER_LINES_QUERY = f"""
+    SELECT
+        sale_order_line.*,
+        {", ".join(f"master_sku.{col}" for col in ORDER_LINE_SKU_COLUMNS)},
+        {SQL_CHANNEL} AS channel,
+        sale_order_line.order_reference IN {SURF_EXPO_ORDERS} AS surf_expo
+    FROM sale_order_line
+    LEFT JOIN master_sku
+        ON sale_order_line.sku = master_sku.sku
+    WHERE (:start IS NULL OR sale_order_line.sales_date >= :start)
+      AND (:end IS NULL OR sale_order_line.sales_date < :end)
+"""
+
+SEARCH_QUERY = """
+    SELECT kind, key, label, collection
+    FROM search_index
+    WHERE search_index MATCH :match AND (:kind IS NULL OR kind = :kind)
+    ORDER BY rank
+    LIMIT :limit;
+"""
+
+# Default and maximum number of search results
+SEARCH_LIMIT = 10
+SEARCH_MAX_LIMIT = 50
+
+
+def fetch_kpis(team=None, db_file=DB_FILE):
+    """
+    Compute the headline KPIs from the summary tables in one query.
+
+    Args:
+        team (str): Restrict to one sales team, all lines if None.
+        db_file (str): Path to the SQLite database.
+
+    Returns:
+        dict: total_orders, total_orders_sold, total_orders_quotation, total_revenue,
+            total_revenue_sold, total_revenue_quotation, avg_order_value (sold orders),
+            avg_order_value_all, top_selling_product and lines. Averages are NaN
+            without matching orders.
+    """
+    stats = query_frame(KPI_QUERY, {"team": team}, db_file=db_file).iloc[0].to_dict()
+    for key in ["avg_order_value", "avg_order_value_all"]:
+        if stats[key] is None or pd.isna(stats[key]):
+            stats[key] = math.nan
+    return stats
+
+
+def fetch_top_n(channels, dimension, n=10, db_file=DB_FILE):
+    """
+    Return the top `n` values of a dimension by revenue for each channel, ranked
+    for all channels by a single query.
+
+    Args:
+        channels (iterable): Keys of `CHANNEL_FILTERS`.
+        dimension (str): Key of `TOP_N_DIMENSIONS`.
+        n (int): Number of rows to return per channel.
+        db_file (str): Path to the SQLite database.
+
+    Returns:
+        dict: Channel -> DataFrame with columns [<dimension>, "Quantity", "Subtotal"],
+            highest revenue first.
+    """
+    source, group, label_expr, label = TOP_N_DIMENSIONS[dimension]
+    grouped = "UNION ALL".join(
+        TOP_N_GROUPED.format(
+            channel=channel, label=label_expr, group=group, source=source,
+            channel_filter=CHANNEL_FILTERS[channel],
+        )
+        for channel in channels
+    )
+    top = query_frame(TOP_N_QUERY.format(grouped=grouped), {"n": n}, db_file=db_file).rename(
+        columns={"key": label, "quantity": "Quantity", "subtotal": "Subtotal"}
+    )
+    return {
+        channel: top[top["channel"] == channel].drop(columns="channel").reset_index(drop=True)
+        for channel in channels
+    }
+
+
+def fetch_revenue_by_channel(granularity="week", start_date=None, end_date=None,
+                             week_anchor=date_utils.DEFAULT_WEEK_ANCHOR,
+                             fiscal_start_month=date_utils.FISCAL_YEAR_START_MONTH, db_file=DB_FILE):
+    """
+    Return the revenue of sold orders by period and channel, in a single grouped
+    pass over the order totals whatever the number of channels.
+
+    Args:
+        granularity (str): One of `date_utils.GRANULARITIES`.
+        start_date (str): First sales day (YYYY-MM-DD), unbounded if None.
+        end_date (str): Last sales day (YYYY-MM-DD), unbounded if None.
+        week_anchor (str): First day of the week, "monday" or "sunday".
+        fiscal_start_month (int): First month of the fiscal year, for quarters and years.
+        db_file (str): Path to the SQLite database.
+
+    Returns:
+        pd.DataFrame: Columns ["Period", "Channel", "Subtotal"]; "Period" is the first
+            day of the period.
+    """
+    period = date_utils.sql_period_start("sales_day", granularity, week_anchor, fiscal_start_month)
+    start, end = sales_date_bounds(start_date, end_date)
+    query = REVENUE_BY_CHANNEL_QUERY.format(period=period)
+    revenue = query_frame(query, {"start": start, "end": end}, db_file=db_file).rename(
+        columns={"period": "Period", "channel": "Channel", "subtotal": "Subtotal"}
+    )
+    revenue["Period"] = pd.to_datetime(revenue["Period"], format="%Y-%m-%d")
+    return revenue
+
+
+def fetch_weekly_revenue_by_team(today=None, db_file=DB_FILE):
+    """
+    Return weekly revenue of sold orders before today by channel (see `SQL_CHANNEL`).
+    Faire orders form their own team and are removed from their sales team.
+
+    Args:
+        today (pd.Timestamp): Only sales before this day are included, defaults to today.
+        db_file (str): Path to the SQLite database.
+
+    Returns:
+        pd.DataFrame: Columns ["Sales Week", "Sales Team", "Subtotal"].
+    """
+    today = pd.Timestamp("today").normalize() if today is None else pd.Timestamp(today)
+    weekly = fetch_revenue_by_channel("week", end_date=today - pd.Timedelta(days=1), db_file=db_file)
+    return weekly.rename(columns={"Period": "Sales Week", "Channel": "Sales Team"})
+
+
+def fetch_order_lines(start_date=None, end_date=None, db_file=DB_FILE):
+    """
+    Return order lines joined with their master SKU attributes, still keyed by
+    dimension keys, optionally for a range of sales dates.
+
+    Args:
+        start_date (str): First sales day (YYYY-MM-DD), unbounded if None.
+        end_date (str): Last sales day (YYYY-MM-DD), unbounded if None.
+        db_file (str): Path to the SQLite database.
+
+    Returns:
+        pd.DataFrame: Rows of `ORDER_LINES_QUERY`.
+    """
+    start, end = sales_date_bounds(start_date, end_date)
+    return query_frame(ORDER_LINES_QUERY, {"start": start, "end": end}, db_file=db_file)
+
+
+def sales_date_bounds(start_date=None, end_date=None):
+    """
+    Turn an inclusive range of sales days into half-open bounds on the stored
+    sales_date text, which carries a time of day.
+
+    Args:
+        start_date (str): First sales day (YYYY-MM-DD), unbounded if None.
+        end_date (str): Last sales day (YYYY-MM-DD), unbounded if None.
+
+    Returns:
+        tuple: (start, end) as "YYYY-MM-DD" strings or None; `end` is the day after `end_date`.
+    """
+    start = pd.Timestamp(start_date).strftime("%Y-%m-%d") if start_date else None
+    end = (pd.Timestamp(end_date) + pd.Timedelta(days=1)).strftime("%Y-%m-%d") if end_date else None
+    return start, end
+
+
+def search(term, kind=None, limit=SEARCH_LIMIT, db_file=DB_FILE):
+    """
+    Search products (name, SKU, collection) and customers by prefix.
+
+    Every word of `term` must match the start of a word in the entry; results
+    are ranked by relevance.
+
+    Args:
+        term (str): Text typed by the user.
+        kind (str): Restrict to "product" or "customer", both if None.
+        limit (int): Maximum number of results, clamped to 1..`SEARCH_MAX_LIMIT`.
+        db_file (str): Path to the SQLite database.
+
+    Returns:
+        list: Dicts with kind, key, label and collection, best match first;
+            empty while the database or its search index is not built yet, or
+            when FTS5 cannot parse the term.
+    """
+    match = " ".join(
+        '"' + word.replace('"', '""') + '"*' for word in term.split()
+    )
+    if not match:
+        return []
+
+    # A negative LIMIT means no limit in SQLite
+    limit = max(1, min(int(limit), SEARCH_MAX_LIMIT))
+    try:
+        results = query_frame(
+            SEARCH_QUERY, {"match": match, "kind": kind, "limit": limit}, db_file=db_file
+        )
+    except FileNotFoundError as e:
+        logger.warning(f"Search is unavailable until the database is built: {e}")
+        return []
+    except sqlite3.OperationalError as e:
+        message = str(e)
+        if message.startswith("no such table"):
+            logger.warning(f"Search is unavailable until the search index is built: {e}")
+            return []
+        if message.startswith("fts5:"):
+            # The MATCH expression is built from user input; a term FTS5 cannot parse matches nothing
+            logger.debug(f"Invalid search expression {match!r}: {e}")
+            return []
+        raise
+    return results.to_dict(orient="records")
+
+
+def rehydrate_labels(df, db_file=DB_FILE):
+    """
+    Replace the dimension keys of normalized order lines with their labels.
+
+    Each dimension table is read once and its labels are gathered by position,
+    so every row shares the same label objects instead of holding its own copy.
+    Columns are returned in the order of the labelled view (`LABEL_COLUMNS`),
+    followed by any others.
+
+    Args:
+        df (pd.DataFrame): Rows of sale_order_line with "<dimension>_id" columns.
+        db_file (str): Path to the SQLite database.
+
+    Returns:
+        pd.DataFrame: The rows with label columns instead of keys.
+    """
+    for dimension, columns in DIMENSIONS.items():
+        key = dimension_key(dimension)
+        if key not in df.columns:
+            continue
+
+        labels = query_frame(
+            f"SELECT {key}, {', '.join(columns)} FROM {dimension};", db_file=db_file
+        ).set_index(key)
+        positions = labels.index.get_indexer(df[key])
+        for col in columns:
+            # Position -1 (no key, or unknown key) picks the trailing None
+            values = np.append(labels[col].to_numpy(dtype=object), None)
+            df[col] = values.take(positions)
+        df = df.drop(columns=key)
+
+    ordered = [col for col in LABEL_COLUMNS if col in df.columns]
+    return df[ordered + [col for col in df.columns if col not in ordered]]
+
@@ -1,3 +1,9 @@
+# Text format of the datetime columns stored in SQLite. Writers format with it
+# and readers parse with it, so dates are parsed once with an explicit format.
+SQL_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Baseline schema, applied by migration 1. sale_order_line is normalized into
+# dimension tables by migration 4 (see `DIMENSIONS`).
 CREATE_TABLES = {
     "sale_order_line": """
         CREATE TABLE IF NOT EXISTS sale_order_line (
@@ -26,6 +32,9 @@ CREATE_TABLES = {
             invoice_status TEXT,             
             delivery_status TEXT,            
             total_tax REAL,                  
+            line_seq INTEGER NOT NULL DEFAULT 0, -- Occurrence of the SKU within the order
+            row_hash INTEGER,                -- Hash of the source row, used to skip unchanged lines
+            UNIQUE (order_reference, sku, line_seq), -- Natural key of an order line
             FOREIGN KEY (sku) REFERENCES master_sku (sku) -- Linking SKU to the master_sku table
         );
 
@@ -71,5 +80,391 @@ CREATE_TABLES = {
             prepack_sku TEXT,
             available_sizes TEXT
         );
+    """,
+    "source_state": """
+        CREATE TABLE IF NOT EXISTS source_state (
+            source TEXT PRIMARY KEY,         -- Dataset key, e.g. sale_order_line
+            size INTEGER,
+            mtime_ns INTEGER,
+            sha256 TEXT,
+            loaded_on TEXT
+        );
+    """,
+}
+
+# Managed secondary indexes. They are dropped before a bulk load into an empty
+# table and rebuilt afterwards, followed by ANALYZE.
+INDEXES = {
+    "sale_order_line": {
+        "idx_sol_sku": "CREATE INDEX IF NOT EXISTS idx_sol_sku ON sale_order_line (sku);",
+        "idx_sol_order_reference": "CREATE INDEX IF NOT EXISTS idx_sol_order_reference ON sale_order_line (order_reference);",
+        "idx_sol_sales_team": "CREATE INDEX IF NOT EXISTS idx_sol_sales_team ON sale_order_line (sales_team);",
+        "idx_sol_order_status": "CREATE INDEX IF NOT EXISTS idx_sol_order_status ON sale_order_line (order_status);",
+        "idx_sol_sales_date": "CREATE INDEX IF NOT EXISTS idx_sol_sales_date ON sale_order_line (sales_date);",
+        "idx_sol_delivery_date": "CREATE INDEX IF NOT EXISTS idx_sol_delivery_date ON sale_order_line (delivery_date);",
+        # Covering indexes for revenue by team and period, and by SKU
+        "idx_sol_team_date_revenue": """
+            CREATE INDEX IF NOT EXISTS idx_sol_team_date_revenue
+            ON sale_order_line (sales_team, sales_date, order_status, order_reference, subtotal);
+        """,
+        "idx_sol_sku_revenue": """
+            CREATE INDEX IF NOT EXISTS idx_sol_sku_revenue
+            ON sale_order_line (sku, order_status, quantity, subtotal);
+        """,
+    },
+    "master_sku": {
+        # Covers the attributes merge_master_sku joins onto each order line
+        "idx_master_sku_join": """
+            CREATE INDEX IF NOT EXISTS idx_master_sku_join
+            ON master_sku (sku, spsu25_status, category_group, sku_parent, category);
+        """,
+    },
+}
+
+# Summary tables kept current by `db_insert.refresh_summaries`. Each is grouped by
+# its key columns; "{line}" stands for the sale_order_line alias in expressions.
+SUMMARY_TABLES = {
+    # Daily sales by team, SKU and status. "orders" counts distinct orders per row
+    # and is not additive across SKUs; use order_totals for order counts.
+    "daily_sales": {
+        "keys": {
+            "sales_day": "date({line}.sales_date)",
+            "sales_team": "{line}.sales_team",
+            "sku": "{line}.sku",
+            "order_status": "{line}.order_status",
+        },
+        "measures": {
+            "quantity": "COALESCE(SUM({line}.quantity), 0)",
+            "subtotal": "TOTAL({line}.subtotal)",
+            "total_cost": "TOTAL({line}.total_cost)",
+            "lines": "COUNT(*)",
+            "orders": "COUNT(DISTINCT {line}.order_reference)",
+        },
+    },
+    # One row per order (and day/team/status), for exact order counts and AOV
+    "order_totals": {
+        "keys": {
+            "order_reference": "{line}.order_reference",
+            "sales_day": "date({line}.sales_date)",
+            "sales_team": "{line}.sales_team",
+            "order_status": "{line}.order_status",
+        },
+        "measures": {
+            "quantity": "COALESCE(SUM({line}.quantity), 0)",
+            "subtotal": "TOTAL({line}.subtotal)",
+            "lines": "COUNT(*)",
+        },
+    },
+}
+
+CREATE_SUMMARY_TABLES = {
+    "daily_sales": """
+        CREATE TABLE IF NOT EXISTS daily_sales (
+            sales_day TEXT,                  -- YYYY-MM-DD
+            sales_team TEXT,
+            sku TEXT NOT NULL,
+            order_status TEXT,
+            quantity INTEGER,
+            subtotal REAL,
+            total_cost REAL,
+            lines INTEGER,
+            orders INTEGER
+        );
+    """,
+    "order_totals": """
+        CREATE TABLE IF NOT EXISTS order_totals (
+            order_reference TEXT NOT NULL,
+            sales_day TEXT,
+            sales_team TEXT,
+            order_status TEXT,
+            quantity INTEGER,
+            subtotal REAL,
+            lines INTEGER
+        );
+    """,
+}
+
+SUMMARY_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_daily_sales_key ON daily_sales (sku, sales_day, sales_team, order_status);",
+    "CREATE INDEX IF NOT EXISTS idx_daily_sales_team ON daily_sales (sales_team, order_status, sales_day);",
+    "CREATE INDEX IF NOT EXISTS idx_order_totals_key ON order_totals (order_reference);",
+    "CREATE INDEX IF NOT EXISTS idx_order_totals_team ON order_totals (sales_team, order_status, sales_day);",
+]
+
+
+def summary_rebuild_sql(table):
+    """
+    Build the statement that fully rebuilds a summary table from sale_order_line.
+
+    Args:
+        table (str): Key of `SUMMARY_TABLES`.
+
+    Returns:
+        str: The INSERT ... SELECT statement.
     """
+    spec = SUMMARY_TABLES[table]
+    keys = [expr.format(line="l") for expr in spec["keys"].values()]
+    measures = [expr.format(line="l") for expr in spec["measures"].values()]
+    columns = list(spec["keys"]) + list(spec["measures"])
+    return (
+        f"INSERT INTO {table} ({', '.join(columns)}) "
+        f"SELECT {', '.join(keys + measures)} FROM sale_order_line AS l "
+        f"GROUP BY {', '.join(keys)};"
+    )
+
+
+# Dimension tables of sale_order_line and the label columns each holds. Every
+# dimension has an integer key "<name>_id" (dim_customer -> customer_id) that
+# the fact table stores in place of the labels.
+DIMENSIONS = {
+    "dim_customer": ["customer"],
+    "dim_salesperson": ["salesperson"],
+    "dim_state": ["state"],
+    "dim_collection": ["collection"],
+    "dim_product": ["product", "product_template", "product_category", "fabric_sku", "fabric_type"],
 }
+
+# Stands in for NULL labels in the dimension unique indexes; a blob never equals text
+NULL_LABEL = "X'00'"
+
+# Columns of the normalized sale_order_line fact table, apart from id, line_seq and row_hash
+FACT_COLUMNS = [
+    "created_on", "sales_date", "delivery_date", "order_reference", "sales_team",
+    "salesperson_id", "customer_id", "state_id", "sku", "product_id", "collection_id",
+    "quantity", "subtotal", "total_cost", "unit_cost", "unit_price",
+    "order_status", "invoice_status", "delivery_status", "total_tax",
+]
+
+# Order lines with their labels, in the column order of the baseline table
+LABEL_COLUMNS = [
+    "id", "created_on", "sales_date", "delivery_date", "order_reference", "sales_team",
+    "salesperson", "customer", "state", "sku", "product", "collection",
+    "product_template", "product_category", "fabric_sku", "fabric_type",
+    "quantity", "subtotal", "total_cost", "unit_cost", "unit_price",
+    "order_status", "invoice_status", "delivery_status", "total_tax", "line_seq", "row_hash",
+]
+
+# Views that present a normalized table with its labels
+LABEL_VIEWS = {"sale_order_line": "sale_order_line_view"}
+
+
+def dimension_key(dimension):
+    """
+    Return the integer key column of a dimension table.
+
+    Args:
+        dimension (str): Key of `DIMENSIONS`.
+
+    Returns:
+        str: The key column, e.g. "customer_id".
+    """
+    return f"{dimension[len('dim_'):]}_id"
+
+
+def dimension_ddl(dimension):
+    """
+    Build the statements creating a dimension table and its indexes. Labels are
+    unique as a tuple (NULLs included, via a sentinel no text equals) and indexed
+    for the `IS` lookups of `dimension_joins`.
+
+    Args:
+        dimension (str): Key of `DIMENSIONS`.
+
+    Returns:
+        list: CREATE statements.
+    """
+    columns = DIMENSIONS[dimension]
+    return [
+        f"CREATE TABLE IF NOT EXISTS {dimension} ({dimension_key(dimension)} INTEGER PRIMARY KEY, "
+        f"{', '.join(f'{col} TEXT' for col in columns)});",
+        f"CREATE UNIQUE INDEX IF NOT EXISTS {dimension}_unique ON {dimension} "
+        f"({', '.join(f'IFNULL({col}, {NULL_LABEL})' for col in columns)});",
+        f"CREATE INDEX IF NOT EXISTS {dimension}_lookup ON {dimension} ({', '.join(columns)});",
+    ]
+
+
+def dimension_fill_sql(dimension, source):
+    """
+    Build the statement adding the label tuples of `source` missing from a dimension.
+
+    Args:
+        dimension (str): Key of `DIMENSIONS`.
+        source (str): Table or view with the label columns.
+
+    Returns:
+        str: The INSERT OR IGNORE statement.
+    """
+    columns = ", ".join(DIMENSIONS[dimension])
+    not_empty = " OR ".join(f"{col} IS NOT NULL" for col in DIMENSIONS[dimension])
+    return f"INSERT OR IGNORE INTO {dimension} ({columns}) SELECT DISTINCT {columns} FROM {source} WHERE {not_empty};"
+
+
+def dimension_joins(alias):
+    """
+    Build the joins looking up the dimension keys of the labelled rows `alias`.
+
+    Args:
+        alias (str): Alias of the labelled source rows.
+
+    Returns:
+        str: LEFT JOIN clauses, one per dimension, aliased by dimension name.
+    """
+    return " ".join(
+        f"LEFT JOIN {dimension} ON "
+        + " AND ".join(f"{dimension}.{col} IS {alias}.{col}" for col in columns)
+        for dimension, columns in DIMENSIONS.items()
+    )
+
+
+def fact_select(alias):
+    """
+    Build the select list mapping labelled rows `alias` onto `FACT_COLUMNS`,
+    taking keys from `dimension_joins`.
+
+    Args:
+        alias (str): Alias of the labelled source rows.
+
+    Returns:
+        str: Comma-separated expressions.
+    """
+    keys = {dimension_key(dimension): dimension for dimension in DIMENSIONS}
+    return ", ".join(
+        f"{keys[col]}.{col}" if col in keys else f"{alias}.{col}"
+        for col in FACT_COLUMNS
+    )
+
+
+def label_view_ddl():
+    """
+    Build the view presenting sale_order_line with its labels (`LABEL_COLUMNS`).
+
+    Returns:
+        str: The CREATE VIEW statement.
+    """
+    labels = {col: dimension for dimension, columns in DIMENSIONS.items() for col in columns}
+    select = ", ".join(f"{labels[col]}.{col}" if col in labels else f"l.{col}" for col in LABEL_COLUMNS)
+    joins = " ".join(
+        f"LEFT JOIN {dimension} USING ({dimension_key(dimension)})" for dimension in DIMENSIONS
+    )
+    return f"CREATE VIEW IF NOT EXISTS {LABEL_VIEWS['sale_order_line']} AS SELECT {select} FROM sale_order_line AS l {joins};"
+
+
+CREATE_FACT_TABLE = """
+    CREATE TABLE sale_order_line_fact (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        created_on TEXT,
+        sales_date TEXT,
+        delivery_date TEXT,
+        order_reference TEXT NOT NULL,
+        sales_team TEXT,
+        salesperson_id INTEGER REFERENCES dim_salesperson (salesperson_id),
+        customer_id INTEGER REFERENCES dim_customer (customer_id),
+        state_id INTEGER REFERENCES dim_state (state_id),
+        sku TEXT NOT NULL,
+        product_id INTEGER REFERENCES dim_product (product_id),
+        collection_id INTEGER REFERENCES dim_collection (collection_id),
+        quantity INTEGER,
+        subtotal REAL,
+        total_cost REAL,
+        unit_cost REAL,
+        unit_price REAL,
+        order_status TEXT,
+        invoice_status TEXT,
+        delivery_status TEXT,
+        total_tax REAL,
+        line_seq INTEGER NOT NULL DEFAULT 0, -- Occurrence of the SKU within the order
+        row_hash INTEGER,                -- Hash of the source row, used to skip unchanged lines
+        UNIQUE (order_reference, sku, line_seq), -- Natural key of an order line
+        FOREIGN KEY (sku) REFERENCES master_sku (sku)
+    );
+"""
+
+# Rebuilds sale_order_line as a fact table of keys and measures, keeping ids
+NORMALIZE_SALE_ORDER_LINE = (
+    [ddl for dimension in DIMENSIONS for ddl in dimension_ddl(dimension)]
+    + [dimension_fill_sql(dimension, "sale_order_line") for dimension in DIMENSIONS]
+    + [
+        CREATE_FACT_TABLE,
+        f"INSERT INTO sale_order_line_fact (id, {', '.join(FACT_COLUMNS)}, line_seq, row_hash) "
+        f"SELECT s.id, {fact_select('s')}, s.line_seq, s.row_hash FROM sale_order_line AS s {dimension_joins('s')};",
+        "DROP TABLE sale_order_line;",
+        "ALTER TABLE sale_order_line_fact RENAME TO sale_order_line;",
+        label_view_ddl(),
+    ]
+    + list(INDEXES["sale_order_line"].values())
+    + ["ANALYZE;"]
+)
+
+
+# Full-text index over products and customers for the search endpoint. "kind" is
+# "product" or "customer"; "key" is the SKU or the customer name.
+CREATE_SEARCH_INDEX = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+        kind UNINDEXED,
+        key UNINDEXED,
+        label,
+        sku,
+        collection,
+        tokenize = "unicode61 remove_diacritics 2",
+        prefix = '2 3'
+    );
+"""
+
+# Statements that rebuild the search index from master_sku and the customers with order lines
+REBUILD_SEARCH_INDEX = [
+    "DELETE FROM search_index;",
+    """
+    INSERT INTO search_index (kind, key, label, sku, collection)
+    SELECT 'product', sku, COALESCE(name, sku), sku, collection FROM master_sku;
+    """,
+    """
+    INSERT INTO search_index (kind, key, label)
+    SELECT 'customer', customer, customer FROM dim_customer
+    WHERE customer IS NOT NULL
+      AND customer_id IN (SELECT customer_id FROM sale_order_line);
+    """,
+]
+
+
+# Order references of the order lists loaded next to the order lines, e.g. the
+# Faire orders ("faire") or the Surf Expo orders ("surf_expo")
+CREATE_ORDER_LIST = """
+    CREATE TABLE IF NOT EXISTS order_list (
+        list TEXT NOT NULL,
+        order_reference TEXT NOT NULL,
+        PRIMARY KEY (list, order_reference)
+    ) WITHOUT ROWID;
+"""
+
+
+# Sales months whose order lines changed since the last build, as YYYY-MM ('' for
+# lines without a sales date); only these partitions are rewritten (see `db_partitions`)
+CREATE_CHANGED_MONTHS = """
+    CREATE TABLE IF NOT EXISTS changed_months (
+        sales_month TEXT PRIMARY KEY
+    ) WITHOUT ROWID;
+"""
+
+
+# Version bookkeeping, created before any migration runs
+CREATE_SCHEMA_VERSION = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        applied_on TEXT NOT NULL
+    );
+"""
+
+# Statements that upgrade the database to each schema version, applied in order
+MIGRATIONS = {
+    1: list(CREATE_TABLES.values()),
+    2: [ddl for table in INDEXES.values() for ddl in table.values()] + ["ANALYZE;"],
+    3: list(CREATE_SUMMARY_TABLES.values())
+       + [summary_rebuild_sql(table) for table in SUMMARY_TABLES]
+       + SUMMARY_INDEXES,
+    4: NORMALIZE_SALE_ORDER_LINE,
+    5: [CREATE_SEARCH_INDEX] + REBUILD_SEARCH_INDEX,
+    6: [CREATE_ORDER_LIST],
+    7: [CREATE_CHANGED_MONTHS],
+}
+
+SCHEMA_VERSION = max(MIGRATIONS)
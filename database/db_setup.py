@@ -1,7 +1,10 @@
+import fcntl
 import sqlite3
 import logging
 import os
-from database.db_schema import CREATE_TABLES  # Import schema definitions
+import shutil
+from database import db_partitions
+from database.db_schema import CREATE_SCHEMA_VERSION, INDEXES, MIGRATIONS, SCHEMA_VERSION, SUMMARY_TABLES  # Import schema definitions
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -9,32 +12,301 @@ logger = logging.getLogger(__name__)
 # Define the database file
 DB_FILE = "data_app.db"
 
-def initialize_db():
-    """
-    Initialize the SQLite database by wiping the existing database and creating new tables.
-    """
-    try:
-        # If the database already exists, delete it
-        if os.path.exists(DB_FILE):
-            os.remove(DB_FILE)
-            logger.info(f"Existing database file '{DB_FILE}' has been deleted.")
-        
-        # Connect to the database (this will create a new file)
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        
-        # Execute each table creation statement from the schema
-        for table_name, table_sql in CREATE_TABLES.items():
-            cursor.execute(table_sql)
-        
-        # Commit and close the connection
-        conn.commit()
+def initialize_db(db_file=DB_FILE):
+    """
+    Open the persistent SQLite database and apply any pending schema migrations.
+
+    A database file without a schema_version table was built by the old
+    wipe-and-rebuild startup and only holds disposable data, so it is deleted
+    and rebuilt from scratch.
+
+    Args:
+        db_file (str): Path to the SQLite database.
+    """
+    try:
+        if os.path.exists(db_file) and not has_schema_version(db_file):
+            os.remove(db_file)
+            logger.info(f"Unversioned database file '{db_file}' has been deleted.")
+
+        # Manage transactions explicitly so each migration applies atomically
+        conn = sqlite3.connect(db_file, isolation_level=None)
+        # Rollback journal, not WAL: the live file is replaced by rename (see
+        # `rebuild_database`) and WAL side files would not follow the swap
+        conn.execute("PRAGMA journal_mode = DELETE;")
+        conn.execute(CREATE_SCHEMA_VERSION)
+
+        current_version = get_schema_version(conn)
+        for version in sorted(v for v in MIGRATIONS if v > current_version):
+            conn.execute("BEGIN")
+            try:
+                for statement in MIGRATIONS[version]:
+                    conn.execute(statement)
+                conn.execute(
+                    "INSERT INTO schema_version (version, applied_on) VALUES (?, datetime('now'));",
+                    (version,),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            logger.info(f"Applied database migration {version}.")
+
+        # Migrations that rebuild tables leave free pages behind in an existing database
+        if 0 < current_version < SCHEMA_VERSION:
+            conn.execute("VACUUM;")
+
         conn.close()
-        
-        logger.info("Database tables initialized successfully.")
+        logger.info(f"Database schema is at version {SCHEMA_VERSION}.")
     except Exception as e:
         logger.error(f"Error initializing database: {e}")
         raise
 
+
+def has_schema_version(db_file=DB_FILE):
+    """
+    Check whether a database file tracks its schema version.
+
+    Args:
+        db_file (str): Path to the SQLite database.
+
+    Returns:
+        bool: True if the schema_version table exists.
+    """
+    conn = sqlite3.connect(db_file)
+    try:
+        row = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_version';"
+        ).fetchone()
+        return row is not None
+    finally:
+        conn.close()
+
+
+def get_schema_version(conn):
+    """
+    Return the latest applied schema version.
+
+    Args:
+        conn (sqlite3.Connection): Open database connection.
+
+    Returns:
+        int: The schema version, 0 for a new database.
+    """
+    row = conn.execute("SELECT MAX(version) FROM schema_version;").fetchone()
+    return row[0] or 0
+
+
+def drop_indexes(cursor, table):
+    """
+    Drop the managed secondary indexes of a table ahead of a bulk load.
+
+    Args:
+        cursor (sqlite3.Cursor): Open database cursor.
+        table (str): Table name.
+    """
+    for name in INDEXES.get(table, {}):
+        cursor.execute(f"DROP INDEX IF EXISTS {name};")
+
+
+def create_indexes(cursor, table):
+    """
+    (Re)create the managed secondary indexes of a table and refresh its
+    planner statistics.
+
+    Args:
+        cursor (sqlite3.Cursor): Open database cursor.
+        table (str): Table name.
+    """
+    for ddl in INDEXES.get(table, {}).values():
+        cursor.execute(ddl)
+    cursor.execute(f"ANALYZE {table};")
+
+
+def rebuild_database(load, db_file=DB_FILE, unchanged=None):
+    """
+    Build the next version of the database in a private file and atomically swap it in.
+
+    The live database is copied into a build file next to it, migrated and loaded
+    there by `load`, validated and stamped with a new data version. The order lines
+    of that version are exported month by month (see `db_partitions`), rewriting only
+    the months the load changed, and the build file is renamed over the live file.
+    Readers never see a half-loaded database: open connections keep reading the
+    previous file and the read pool reopens on the new one (see
+    `db_connection.read_connection`).
+
+    The whole rebuild runs under an exclusive lock on `<db_file>.lock`, so concurrent
+    processes build one after the other instead of racing for the data version and its
+    partition directory. Nothing is copied when the live database is at the current
+    schema version and `unchanged` reports that its sources did not change.
+
+    Args:
+        load (callable): Called with the build file path to load data into it.
+        db_file (str): Path to the live SQLite database.
+        unchanged (callable, optional): Called with the live file path; returns True
+            when its sources are unchanged since it was built.
+
+    Returns:
+        int: The data version of the live database.
+    """
+    with open(f"{db_file}.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            if unchanged is not None and is_current(db_file) and unchanged(db_file):
+                version = get_data_version(db_file)
+                logger.info(f"Sources of '{db_file}' are unchanged; keeping data version {version}.")
+                if not os.path.exists(db_partitions.dataset_path(version)):
+                    db_partitions.write_order_line_partitions(db_file, version, full=True)
+                return version
+
+            return _build_and_swap(load, db_file)
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _build_and_swap(load, db_file):
+    """Build, validate and swap in the next version of the database (see `rebuild_database`)."""
+    build_file = f"{db_file}.{os.getpid()}.build"
+    try:
+        remove_db_files(build_file)
+        if os.path.exists(db_file):
+            copy_database(db_file, build_file)
+
+        initialize_db(build_file)
+        db_partitions.clear_changed_months(build_file)
+        load(build_file)
+        validate_db(build_file)
+        version = bump_data_version(build_file)
+        db_partitions.write_order_line_partitions(build_file, version)
+
+        os.replace(build_file, db_file)
+        logger.info(f"Database '{db_file}' swapped to data version {version}.")
+        db_partitions.remove_old_versions(version)
+        return version
+    except Exception as e:
+        logger.error(f"Error rebuilding database: {e}")
+        remove_db_files(build_file)
+        raise
+
+
+def is_current(db_file=DB_FILE):
+    """
+    Check whether a database file exists and is at the current schema version.
+
+    Args:
+        db_file (str): Path to the SQLite database.
+
+    Returns:
+        bool: True if no migration is pending.
+    """
+    if not os.path.exists(db_file) or not has_schema_version(db_file):
+        return False
+    conn = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True)
+    try:
+        return get_schema_version(conn) == SCHEMA_VERSION
+    finally:
+        conn.close()
+
+
+def get_data_version(db_file=DB_FILE):
+    """
+    Return the data version stored in the database header (`PRAGMA user_version`).
+
+    Args:
+        db_file (str): Path to the SQLite database.
+
+    Returns:
+        int: The data version.
+    """
+    conn = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True)
+    try:
+        return conn.execute("PRAGMA user_version;").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def copy_database(source_file, target_file):
+    """
+    Copy a consistent snapshot of a database with the SQLite backup API.
+    Unversioned legacy files are copied as-is and rebuilt by `initialize_db`.
+
+    Args:
+        source_file (str): Path to the database to copy.
+        target_file (str): Path of the copy.
+    """
+    if not has_schema_version(source_file):
+        shutil.copyfile(source_file, target_file)
+        return
+
+    source = sqlite3.connect(f"file:{source_file}?mode=ro", uri=True)
+    target = sqlite3.connect(target_file)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+def validate_db(db_file=DB_FILE):
+    """
+    Check a freshly built database before it goes live: file integrity, schema
+    version, and summary tables consistent with the order lines.
+
+    Args:
+        db_file (str): Path to the SQLite database.
+
+    Raises:
+        ValueError: If any check fails.
+    """
+    conn = sqlite3.connect(db_file)
+    try:
+        integrity = conn.execute("PRAGMA quick_check;").fetchone()[0]
+        if integrity != "ok":
+            raise ValueError(f"Integrity check failed: {integrity}")
+
+        version = get_schema_version(conn)
+        if version != SCHEMA_VERSION:
+            raise ValueError(f"Schema version {version} does not match {SCHEMA_VERSION}.")
+
+        lines = conn.execute("SELECT COUNT(*) FROM sale_order_line;").fetchone()[0]
+        for table in SUMMARY_TABLES:
+            summarized = conn.execute(f"SELECT TOTAL(lines) FROM {table};").fetchone()[0]
+            if summarized != lines:
+                raise ValueError(f"{table} covers {summarized:.0f} of {lines} order lines.")
+    finally:
+        conn.close()
+
+
+def bump_data_version(db_file=DB_FILE):
+    """
+    Increment the data version stored in the database header (`PRAGMA user_version`).
+
+    Args:
+        db_file (str): Path to the SQLite database.
+
+    Returns:
+        int: The new data version.
+    """
+    conn = sqlite3.connect(db_file)
+    try:
+        version = conn.execute("PRAGMA user_version;").fetchone()[0] + 1
+        conn.execute(f"PRAGMA user_version = {version};")
+        conn.commit()
+        return version
+    finally:
+        conn.close()
+
+
+def remove_db_files(db_file):
+    """
+    Delete a database file together with its journal and WAL side files.
+
+    Args:
+        db_file (str): Path to the SQLite database.
+    """
+    for path in [db_file, f"{db_file}-journal", f"{db_file}-wal", f"{db_file}-shm"]:
+        if os.path.exists(path):
+            os.remove(path)
+
+
 if __name__ == "__main__":
     initialize_db()
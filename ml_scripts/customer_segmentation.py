@@ -9,7 +9,7 @@ def load_data(data=None, filepath=None, testing=True):
 
     Args:
         data (pd.DataFrame): In-memory wholesale data (production mode).
-        filepath (str): Path to the CSV file (testing mode).
+        filepath (str): Path to a CSV or Parquet file (testing mode).
         testing (bool): Flag indicating the mode.
 
     Returns:
@@ -19,7 +19,7 @@ def load_data(data=None, filepath=None, testing=True):
         if filepath is None:
             raise ValueError("Filepath must be provided in testing mode.")
         print(f"Loading wholesale data from {filepath} for testing.")
-        data = pd.read_csv(filepath)
+        data = pd.read_parquet(filepath) if filepath.endswith(".parquet") else pd.read_csv(filepath)
     else:
         if data is None:
             raise ValueError("Data must be provided in production mode.")
@@ -119,7 +119,7 @@ def compute_customer_segmentation(wholesale_data=None, testing=False):
     Returns:
         pd.DataFrame: Customer features with cluster assignments.
     """
-    filepath = "./data/wholesale_data_inspection.csv"
+    filepath = "./data/wholesale_data_inspection.parquet"
     
     # Load and preprocess data
     data = load_data(data=wholesale_data, filepath=filepath, testing=testing)
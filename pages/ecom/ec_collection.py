@@ -11,7 +11,7 @@ def ec_collection():
         dash.html.Div: Layout for the page.
     """
     # Get the processed collection data from Flask's config
-    collection_data = current_app.config.get('ec_collection_data')
+    collection_data = current_app.config['ecom_data']['ec_collection_data']
 
     if collection_data is None or collection_data.empty:
         return html.Div(
@@ -2,6 +2,9 @@ from flask import current_app
 from dash import html, dcc
 import dash_mantine_components as dmc
 import plotly.express as px
+from data_preprocessing.leaderboards import partition_rows, top_n
+from data_preprocessing.faire_processing import WINTER_END_DATE, WINTER_START_DATE
+from data_preprocessing.sales_cube import PRODUCT_MIX, PRODUCT_MIX_MEASURES
 
 
 def faire_winter():
@@ -12,10 +15,14 @@ def faire_winter():
         dash.html.Div: Layout for the page.
     """
     # Access preloaded data
-    stats = current_app.config.get('winter_stats')
-    winter_data = current_app.config.get('winter_data')
+    stats = current_app.config['faire_data']['winter_stats']
+    # Product mix of the market days, rolled up from the sales cube
+    cube = current_app.config['root_data']['cube'].slice(
+        {"Channel": "Faire"}, start_date=WINTER_START_DATE, end_date=WINTER_END_DATE
+    )
+    winter_data = cube.rollup(PRODUCT_MIX, measures=PRODUCT_MIX_MEASURES, dropna=False)
 
-    if winter_data is None or winter_data.empty:
+    if winter_data.empty:
         return html.Div(
             [
                 html.H1("Winter Faire Data Unavailable", style={"textAlign": "center"}),
@@ -28,16 +35,6 @@ def faire_winter():
     clothing_data = winter_data[winter_data["Category Group"] == "CLOTHING"]
     jewelry_data = winter_data[winter_data["Category Group"] == "JEWELRY"]
 
-    # Group clothing and jewelry data by Parent SKU for the big table
-    clothing_data_grouped = clothing_data.groupby("SKU (Parent)", as_index=False).agg({
-        "Subtotal": "sum",
-        "Quantity": "sum",
-    })
-    jewelry_data_grouped = jewelry_data.groupby("SKU (Parent)", as_index=False).agg({
-        "Subtotal": "sum",
-        "Quantity": "sum",
-    })
-
     # Group clothing and jewelry data by SKU (not Parent SKU) for the small table
     clothing_sku_grouped = clothing_data.groupby("SKU", as_index=False).agg({
         "Subtotal": "sum",
@@ -68,16 +65,17 @@ def faire_winter():
         ),
     }
 
-    # Filter and sort top Parent SKUs by revenue for the big table
-    top_clothing = clothing_data_grouped.sort_values(by="Subtotal", ascending=False).head(15)
-    top_jewelry = jewelry_data_grouped.sort_values(by="Subtotal", ascending=False).head(15)
+    # Top Parent SKUs by revenue for the big table, for both category groups in one pass
+    parent_board = top_n(winter_data, ["SKU (Parent)"], partitions=["Category Group"], n=15)["SKU (Parent)"]
+    top_clothing = partition_rows(parent_board, {"Category Group": "CLOTHING"})
+    top_jewelry = partition_rows(parent_board, {"Category Group": "JEWELRY"})
 
     # Custom styles for each group
     clothing_style = {"backgroundColor": "#e0f7fa"}  # Light blue for clothing
     jewelry_style = {"backgroundColor": "#fce4ec"}  # Light pink for jewelry
     vertical_border_style = {"borderRight": "2px solid black"}  # Vertical separator
 
-    fabric_data = winter_data[(winter_data["Fabric SKU"] != 'A') & (winter_data["Fabric SKU"] != '<NA>')]
+    fabric_data = winter_data[(winter_data["Fabric SKU"] != 'A') & winter_data["Fabric SKU"].notna()]
 
     # Combined table rows with styling
     combined_rows = []
@@ -177,8 +175,7 @@ def faire_winter():
     )
 
     # SPSU25 Pie Chart
-    spsu25_distribution = winter_data["SPSU25 Status"].value_counts(normalize=True).reset_index()
-    spsu25_distribution.columns = ["SPSU25 Status", "proportion"]
+    spsu25_distribution = cube.distribution("SPSU25 Status")
 
     pie_chart = px.pie(
         spsu25_distribution,
@@ -188,10 +185,7 @@ def faire_winter():
     )
 
     # Fabric SKU Table
-    fabric_data_grouped = fabric_data.groupby("Fabric SKU", as_index=False).agg({
-        "Subtotal": "sum",
-        "Quantity": "sum",
-    })
+    fabric_data_grouped = top_n(fabric_data, ["Fabric SKU"], n=30)["Fabric SKU"]
 
     fabric_table = dmc.Table(
         [
@@ -213,7 +207,7 @@ def faire_winter():
                             html.Td(f"${row['Subtotal']:,.2f}"),
                         ]
                     )
-                    for _, row in fabric_data_grouped.sort_values(by="Subtotal", ascending=False).head(30).iterrows()
+                    for _, row in fabric_data_grouped.iterrows()
                 ]
             ),
         ],
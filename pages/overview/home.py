@@ -3,13 +3,30 @@ from dash import html, dcc
 import dash_mantine_components as dmc
 import plotly.express as px
 import pandas as pd
+from data_preprocessing import date_utils, root_processing
+from data_preprocessing.leaderboards import partition_rows, top_n
+from data_preprocessing.sales_cube import PRODUCT_MIX, PRODUCT_MIX_MEASURES
 
-def home():
+def home(start_date=None, end_date=None):
     # Access preloaded data
     root_data = current_app.config['root_data']
     stats = root_data['stats']
-    merged_data = root_data['merged_data']
+    # Product mix rolled up from the sales cube
+    cube = root_data['cube'].between(start_date, end_date)
+    merged_data = cube.rollup(PRODUCT_MIX, measures=PRODUCT_MIX_MEASURES, dropna=False)
     channel_stats_weeks = root_data['channel_stats_weeks']  
+
+    # Narrow the statistics and the weeks shown to the date filter
+    if start_date or end_date:
+        stats = root_processing.summarize_kpis(cube.kpis())
+        weeks = channel_stats_weeks["Sales Week"]
+        in_range = pd.Series(True, index=weeks.index)
+        if start_date:
+            first_week = date_utils.week_start([pd.Timestamp(start_date)], root_processing.SALES_WEEK_ANCHOR)[0]
+            in_range &= weeks >= first_week
+        if end_date:
+            in_range &= weeks <= pd.Timestamp(end_date)
+        channel_stats_weeks = channel_stats_weeks[in_range]
     
     # 1) Build the stacked area chart (weekly)
     stacked_line_chart = px.area(
@@ -37,23 +54,10 @@ def home():
     clothing_data = merged_data[merged_data["Category Group"] == "CLOTHING"]
     jewelry_data = merged_data[merged_data["Category Group"] == "JEWELRY"]
 
-    # Group clothing data by Parent SKU
-    clothing_data_grouped = (
-        clothing_data
-        .groupby("SKU (Parent)", as_index=False)
-        .agg({"Subtotal": "sum", "Quantity": "sum"})
-        .sort_values(by="Subtotal", ascending=False)
-        .head(15)
-    )
-
-    # Group jewelry data by Parent SKU
-    jewelry_data_grouped = (
-        jewelry_data
-        .groupby("SKU (Parent)", as_index=False)
-        .agg({"Subtotal": "sum", "Quantity": "sum"})
-        .sort_values(by="Subtotal", ascending=False)
-        .head(15)
-    )
+    # Top 15 Parent SKUs by revenue for both category groups in one pass
+    parent_board = top_n(merged_data, ["SKU (Parent)"], partitions=["Category Group"], n=15)["SKU (Parent)"]
+    clothing_data_grouped = partition_rows(parent_board, {"Category Group": "CLOTHING"})
+    jewelry_data_grouped = partition_rows(parent_board, {"Category Group": "JEWELRY"})
 
     # Compute Clothing vs. Jewelry stats by SKU
     clothing_data_sku_grouped = clothing_data.groupby("SKU", as_index=False).agg({"Subtotal": "sum", "Quantity": "sum"})
@@ -187,7 +191,7 @@ def home():
     # Fabric SKU Table
     fabric_data = merged_data[
         (merged_data["Fabric SKU"] != 'A') & 
-        (merged_data["Fabric SKU"] != '<NA>')
+        merged_data["Fabric SKU"].notna()
     ]
     fabric_table = dmc.Table(
         [
@@ -209,14 +213,7 @@ def home():
                             html.Td(f"${row['Subtotal']:,.2f}"),
                         ]
                     )
-                    for _, row in (
-                        fabric_data
-                        .groupby("Fabric SKU", as_index=False)
-                        .agg({"Quantity": "sum", "Subtotal": "sum"})
-                        .sort_values(by="Subtotal", ascending=False)
-                        .head(30)
-                        .iterrows()
-                    )
+                    for _, row in top_n(fabric_data, ["Fabric SKU"], n=30)["Fabric SKU"].iterrows()
                 ]
             ),
         ],
@@ -227,8 +224,7 @@ def home():
     )
 
     # SPSU25 Status Pie Chart
-    spsu25_distribution = merged_data["SPSU25 Status"].value_counts(normalize=True).reset_index()
-    spsu25_distribution.columns = ["SPSU25 Status", "proportion"]
+    spsu25_distribution = cube.distribution("SPSU25 Status")
     pie_chart = px.pie(
         spsu25_distribution,
         names="SPSU25 Status",
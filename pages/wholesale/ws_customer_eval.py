@@ -15,9 +15,9 @@ def ws_customer_eval():
     """
 
     # Access individual components if needed
-    customer_scatter_data = current_app.config.get('wholesale_customer_scatter_data')
-    geospatial_data = current_app.config.get('wholesale_geospatial_data')
-    customer_segmentation_data = current_app.config.get('wholesale_customer_segmentation_data')
+    customer_scatter_data = current_app.config['wholesale_data']['customer_scatter_data']
+    geospatial_data = current_app.config['wholesale_data']['geospatial_data']
+    customer_segmentation_data = current_app.config['wholesale_data']['customer_segmentation_data']
 
     # Scatter Plot Section
     scatter_section = html.Div()
@@ -2,33 +2,34 @@ from flask import current_app
 from dash import html, dcc
 import dash_mantine_components as dmc
 import plotly.express as px
+from data_preprocessing import wholesale_processing
+from data_preprocessing.leaderboards import partition_rows, top_n
+from data_preprocessing.sales_cube import PRODUCT_MIX, PRODUCT_MIX_MEASURES
 
 
-def ws_home():
+def ws_home(start_date=None, end_date=None):
     """
     Generates the layout for the Wholesale homepage.
 
+    Args:
+        start_date (str, optional): First sales day (YYYY-MM-DD) of the date filter.
+        end_date (str, optional): Last sales day (YYYY-MM-DD) of the date filter.
+
     Returns:
         dash.html.Div: Layout for the page.
     """
     # Access preloaded data
-    stats = current_app.config.get('wholesale_stats')
-    wholesale_data = current_app.config.get('wholesale_merged_data')
+    stats = current_app.config['wholesale_data']['stats']
+    # Product mix of the channel, rolled up from the sales cube
+    cube = current_app.config['root_data']['cube'].slice({"Sales Team": "Wholesale"}, start_date=start_date, end_date=end_date)
+    if start_date or end_date:
+        stats = wholesale_processing.summarize_kpis(cube.kpis())
+    wholesale_data = cube.rollup(PRODUCT_MIX, measures=PRODUCT_MIX_MEASURES, dropna=False)
 
     # Compute Clothing vs. Jewelry data
     clothing_data = wholesale_data[wholesale_data["Category Group"] == "CLOTHING"]
     jewelry_data = wholesale_data[wholesale_data["Category Group"] == "JEWELRY"]
 
-    # Group clothing and jewelry data by Parent SKU for the big table
-    clothing_data_grouped = clothing_data.groupby("SKU (Parent)", as_index=False).agg({
-        "Subtotal": "sum",
-        "Quantity": "sum",
-    })
-    jewelry_data_grouped = jewelry_data.groupby("SKU (Parent)", as_index=False).agg({
-        "Subtotal": "sum",
-        "Quantity": "sum",
-    })
-
     # Group clothing and jewelry data by SKU (not Parent SKU) for the small table
     clothing_sku_grouped = clothing_data.groupby("SKU", as_index=False).agg({
         "Subtotal": "sum",
@@ -59,16 +60,17 @@ def ws_home():
         ),
     }
 
-    # Filter and sort top Parent SKUs by revenue for the big table
-    top_clothing = clothing_data_grouped.sort_values(by="Subtotal", ascending=False).head(15)
-    top_jewelry = jewelry_data_grouped.sort_values(by="Subtotal", ascending=False).head(15)
+    # Top Parent SKUs by revenue for the big table, for both category groups in one pass
+    parent_board = top_n(wholesale_data, ["SKU (Parent)"], partitions=["Category Group"], n=15)["SKU (Parent)"]
+    top_clothing = partition_rows(parent_board, {"Category Group": "CLOTHING"})
+    top_jewelry = partition_rows(parent_board, {"Category Group": "JEWELRY"})
 
     # Custom styles for each group
     clothing_style = {"backgroundColor": "#e0f7fa"}  # Light blue for clothing
     jewelry_style = {"backgroundColor": "#fce4ec"}  # Light pink for jewelry
     vertical_border_style = {"borderRight": "2px solid black"}  # Vertical separator
 
-    fabric_data = wholesale_data[(wholesale_data["Fabric SKU"] != 'A') & (wholesale_data["Fabric SKU"] != '<NA>')]
+    fabric_data = wholesale_data[(wholesale_data["Fabric SKU"] != 'A') & wholesale_data["Fabric SKU"].notna()]
 
     # Combined table rows with styling
     combined_rows = []
@@ -168,8 +170,7 @@ def ws_home():
     )
 
     # SPSU25 Pie Chart
-    spsu25_distribution = wholesale_data["SPSU25 Status"].value_counts(normalize=True).reset_index()
-    spsu25_distribution.columns = ["SPSU25 Status", "proportion"]
+    spsu25_distribution = cube.distribution("SPSU25 Status")
 
     pie_chart = px.pie(
         spsu25_distribution,
@@ -179,10 +180,7 @@ def ws_home():
     )
 
     # Fabric SKU Table
-    fabric_data_grouped = fabric_data.groupby("Fabric SKU", as_index=False).agg({
-        "Subtotal": "sum",
-        "Quantity": "sum",
-    })
+    fabric_data_grouped = top_n(fabric_data, ["Fabric SKU"], n=30)["Fabric SKU"]
 
     fabric_table = dmc.Table(
         [
@@ -204,7 +202,7 @@ def ws_home():
                             html.Td(f"${row['Subtotal']:,.2f}"),
                         ]
                     )
-                    for _, row in fabric_data_grouped.sort_values(by="Subtotal", ascending=False).head(30).iterrows()
+                    for _, row in fabric_data_grouped.iterrows()
                 ]
             ),
         ],
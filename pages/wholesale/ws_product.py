@@ -10,7 +10,7 @@ def ws_product():
     Returns:
         dash.html.Div: Layout for the page.
     """
-    product_profit_analysis = current_app.config.get('wholesale_product_profit_analysis')
+    product_profit_analysis = current_app.config['wholesale_data']['product_profit_analysis']
 
     if product_profit_analysis is None or product_profit_analysis.empty:
         return html.Div(
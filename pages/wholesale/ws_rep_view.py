@@ -10,7 +10,7 @@ def ws_rep_view():
     Returns:
         dash.html.Div: Layout for the page.
     """
-    rep_summary = current_app.config.get('wholesale_rep_summary')
+    rep_summary = current_app.config['wholesale_data']['rep_summary']
 
     if rep_summary is None or rep_summary.empty:
         return html.Div(
@@ -12,7 +12,7 @@ def ws_shipping_fulfillment():
         dash.html.Div: Layout for the page.
     """
 
-    delivery_distribution = current_app.config.get('wholesale_delivery_distribution')
+    delivery_distribution = current_app.config['wholesale_data']['delivery_distribution']
 
     # Handle missing or None delivery distribution gracefully
     if delivery_distribution is None or delivery_distribution.empty:
@@ -0,0 +1,145 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from data_preprocessing import data_loader
+from data_preprocessing.data_sources import CSVSource, ParquetSnapshotSource
+from database import db_insert, db_setup
+
+ORDER_LINES = pd.DataFrame({
+    "Created on": ["2024-01-02 10:00:00", "2024-01-03 11:00:00", "2024-02-04 12:00:00", "2024-02-05 13:00:00"],
+    "Sales Date": ["2024-01-02 10:00:00", "2024-01-03 11:00:00", "2024-02-04 12:00:00", "2024-02-05 13:00:00"],
+    "Delivery Date": ["2024-01-09 10:00:00", "", "2024-02-11 12:00:00", ""],
+    "Order Reference": ["S001", "S001", "", "S002"],
+    "Sales Team": ["Wholesale", "Wholesale", "Shopify", "Shopify"],
+    "Salesperson": ["Ann", "Ann", "Bob", "Bob"],
+    "Customer": ["Shop A", "Shop A", "Web", "Web"],
+    "State": ["CA", "CA", "NY", "NY"],
+    "SKU": ["SKU-1", "", "SKU-2", "SKU-1"],
+    "Product": ["Shirt", "Unknown", "Ring", "Shirt"],
+    "Collection": ["Spring", "", "Gold", "Spring"],
+    "Quantity": [2, 1, 3, 1],
+    "Subtotal": [40.0, 5.0, 90.0, 20.0],
+    "Total Cost": [10.0, 1.0, 30.0, 5.0],
+    "Unit Cost": [5.0, 1.0, 10.0, 5.0],
+    "Unit Price": [20.0, 5.0, 30.0, 20.0],
+    "Order Status": ["sale", "sale", "draft", "sale"],
+    "Invoice Status": ["invoiced", "invoiced", "no", "invoiced"],
+    "Delivery Status": ["full", "full", "pending", "full"],
+    "Total Tax": [0.0, 0.0, 0.0, 0.0],
+})
+
+MASTER_SKU = pd.DataFrame({
+    "SKU": ["SKU-1", "SKU-2", ""],
+    "SKU (Parent)": ["SKU", "SKU", ""],
+    "Name": ["Shirt", "Ring", "Blank"],
+    "Category Group": ["CLOTHING", "JEWELRY", "JEWELRY"],
+    "Category": ["Tops", "Rings", "Rings"],
+    "Collection": ["Spring", "Gold", ""],
+    "SPSU25 Status": ["Active", "Active", "Active"],
+})
+
+TABLES = ["master_sku", "sale_order_line"]
+
+
+def build(db_file):
+    source = CSVSource(tables=TABLES)
+    return db_setup.rebuild_database(
+        lambda build_file: db_insert.insert_data_into_db(source, db_file=build_file),
+        db_file=db_file,
+        unchanged=lambda live_file: db_insert.sources_unchanged(source, live_file),
+    )
+
+
+@pytest.fixture
+def data_folder(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    folder = tmp_path / "data"
+    folder.mkdir()
+    monkeypatch.setattr(data_loader, "DATA_FOLDER", str(folder))
+    monkeypatch.setattr(data_loader, "SNAPSHOT_FOLDER", str(folder / ".snapshots"))
+    ORDER_LINES.to_csv(folder / data_loader.FILES["sale_order_line"], index=False)
+    MASTER_SKU.to_csv(folder / data_loader.FILES["master_sku"], index=False)
+    return folder
+
+
+def test_blank_keys_load(data_folder):
+    db_file = str(data_folder.parent / "app.db")
+    build(db_file)
+
+    conn = sqlite3.connect(db_file)
+    try:
+        lines = conn.execute("SELECT order_reference, sku FROM sale_order_line ORDER BY id;").fetchall()
+        skus = [row[0] for row in conn.execute("SELECT sku FROM master_sku ORDER BY sku;")]
+    finally:
+        conn.close()
+
+    assert len(lines) == len(ORDER_LINES)
+    assert (db_insert.MISSING_KEY, "SKU-2") in lines
+    assert ("S001", db_insert.MISSING_KEY) in lines
+    assert skus == ["SKU-1", "SKU-2"]
+
+
+def test_blank_keys_reload_unchanged(data_folder):
+    db_file = str(data_folder.parent / "app.db")
+    build(db_file)
+
+    # Touch the file so the load runs again over the same lines
+    ORDER_LINES.to_csv(data_folder / data_loader.FILES["sale_order_line"], index=False, lineterminator="\r\n")
+    conn = sqlite3.connect(db_file)
+    ids = conn.execute("SELECT id FROM sale_order_line ORDER BY id;").fetchall()
+    conn.close()
+
+    build(db_file)
+    conn = sqlite3.connect(db_file)
+    try:
+        assert conn.execute("SELECT id FROM sale_order_line ORDER BY id;").fetchall() == ids
+    finally:
+        conn.close()
+
+
+def test_removed_sku_is_deleted(data_folder):
+    db_file = str(data_folder.parent / "app.db")
+    build(db_file)
+
+    MASTER_SKU[MASTER_SKU["SKU"] != "SKU-2"].to_csv(data_folder / data_loader.FILES["master_sku"], index=False)
+    build(db_file)
+
+    conn = sqlite3.connect(db_file)
+    try:
+        skus = [row[0] for row in conn.execute("SELECT sku FROM master_sku ORDER BY sku;")]
+    finally:
+        conn.close()
+    assert skus == ["SKU-1"]
+
+
+def test_prefetch_defers_errors_to_access(data_folder):
+    (data_folder / data_loader.FILES["master_sku"]).unlink()
+    source = CSVSource(tables=TABLES)
+    source.prefetch()
+
+    pd.testing.assert_frame_equal(
+        source["sale_order_line"],
+        data_loader.read_csv_file("sale_order_line", source.source_file("sale_order_line")),
+    )
+    with pytest.raises(FileNotFoundError):
+        source["master_sku"]
+
+
+def test_snapshot_streams_when_fresh(data_folder):
+    source = ParquetSnapshotSource(tables=TABLES)
+    file_path = source.source_file("sale_order_line")
+
+    chunks, _ = source.open_table("sale_order_line", chunksize=3)
+    from_csv = list(chunks)
+    assert data_loader.snapshot_fresh("sale_order_line", file_path)
+
+    chunks, _ = source.open_table("sale_order_line", chunksize=3)
+    from_snapshot = list(chunks)
+    assert [len(chunk) for chunk in from_snapshot] == [len(chunk) for chunk in from_csv]
+    for snapshot_chunk, csv_chunk in zip(from_snapshot, from_csv):
+        assert (
+            pd.util.hash_pandas_object(snapshot_chunk, index=False).tolist()
+            == pd.util.hash_pandas_object(csv_chunk, index=False).tolist()
+        )